@@ -26,17 +26,28 @@ from pydantic import BaseModel
 import uvicorn
 import json
 import logging
-from typing import Optional
+from typing import Optional, Union
 from datetime import datetime
 
 from api.models import TaskSubmission, TaskResponse, TaskStatus
 from core.database_manager import database
-from core.websocket_messages import WebSocketMessage, MessageType
+from core.websocket_messages import WebSocketMessage, MessageType, set_broadcaster
+from core.websocket_fanout import WebSocketFanout
 from core.event_integration import event_integration
 from core.entities.entity_manager import EntityManager
-from core.runtime.runtime_integration import initialize_runtime_integration, get_runtime_integration, RuntimeIntegration
+from core.runtime.runtime_integration import initialize_runtime_integration, RuntimeIntegration
+from core.runtime.event_bus import EventBusClient, EventBusServer
+from core.runtime.remote_runtime import RemoteRuntimeIntegration, connect_api_worker, serve_runtime
 from core.runtime.state_machine import TaskState
+from core.runtime.task_notifications import task_notifier, TaskCompletion, is_terminal
 from config.settings import settings
+from config.connection_pool import get_all_pool_stats
+from core.entity_cache import get_all_cache_stats
+from core.ai_models import ai_model_manager
+from core.model_router import model_router
+from core.context_loader import context_loader
+from core.message_timeline import message_timeline
+from core.prompt_builder import prompt_builder
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +56,20 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     print("🚀 Starting Agent System API...")
+    await start_services(settings.process_role)
+    print("✅ Agent System API is ready!")
+    
+    yield
+    
+    # Cleanup
+    print("🛑 Shutting down Agent System API...")
+    await stop_services()
+    print("✅ Shutdown complete")
+
+
+async def start_services(role: str = "all"):
+    """Start the services a process role needs ("all", "api" or "runtime")"""
+    global runtime_integration, tool_system_manager, event_bus
     
     # Initialize database
     await database.initialize()
@@ -175,6 +200,22 @@ async def lifespan(app: FastAPI):
     # Initialize event system integration
     await event_integration.initialize()
     
+    if role == "api":
+        # The runtime engine lives in the runtime process; reach it over the event bus
+        print("🔄 Connecting to the runtime process...")
+        event_bus = EventBusClient(
+            settings.event_bus_path,
+            call_timeout_seconds=settings.event_bus_call_timeout_seconds
+        )
+        runtime_integration = connect_api_worker(event_bus, manager.fanout.publish)
+        manager.attach_bus(event_bus)
+        await event_bus.start()
+        
+        # Legacy tool registry, for /system/tools
+        from tools import initialize_tools
+        initialize_tools()
+        return
+    
     # Initialize entity system (Phase 3)
     print("🔄 Initializing Entity Management Layer...")
     from core.entities.entity_manager import EntityManager
@@ -186,7 +227,6 @@ async def lifespan(app: FastAPI):
     
     # Initialize runtime system (Phase 4)
     print("🔄 Initializing Process Framework & Runtime Engine...")
-    global runtime_integration
     runtime_integration = await initialize_runtime_integration(
         event_manager=event_integration.event_manager,
         entity_manager=entity_manager,
@@ -197,7 +237,6 @@ async def lifespan(app: FastAPI):
     # Initialize tool system (Phase 5)
     print("🔄 Initializing Optional Tooling System...")
     from tools.mcp_servers.startup import initialize_tool_system
-    global tool_system_manager
     tool_system_manager = await initialize_tool_system(
         db_manager=database,
         entity_manager=entity_manager,
@@ -218,13 +257,17 @@ async def lifespan(app: FastAPI):
     
     # No need to start old task manager - runtime engine handles everything
     
-    print("✅ Agent System API is ready!")
-    
-    yield
-    
-    # Cleanup
-    print("🛑 Shutting down Agent System API...")
-    
+    if role == "runtime":
+        # Serve the runtime to API workers
+        event_bus = EventBusServer(settings.event_bus_path)
+        serve_runtime(event_bus, runtime_integration, app.state, component_statistics)
+        manager.attach_bus(event_bus)
+        await event_bus.start()
+        print(f"✅ Runtime serving API workers on {settings.event_bus_path}")
+
+
+async def stop_services():
+    """Stop everything start_services started"""
     # Shutdown tool system
     if tool_system_manager:
         from tools.mcp_servers.startup import shutdown_tool_system
@@ -234,17 +277,24 @@ async def lifespan(app: FastAPI):
     if runtime_integration:
         await runtime_integration.shutdown()
     
+    if event_bus:
+        await event_bus.stop()
+    
     await event_integration.shutdown()
+    await ai_model_manager.usage_ledger.flush()
+    await manager.fanout.close()
     await database.disconnect()
-    print("✅ Shutdown complete")
 
 
-# Global runtime integration instance
-runtime_integration: Optional[RuntimeIntegration] = None
+# Global runtime integration instance (RemoteRuntimeIntegration in API workers)
+runtime_integration: Optional[Union[RuntimeIntegration, RemoteRuntimeIntegration]] = None
 
 # Global tool system manager
 tool_system_manager = None
 
+# Event bus to the runtime process (API workers) or to the workers (runtime process)
+event_bus: Optional[Union[EventBusClient, EventBusServer]] = None
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -274,44 +324,79 @@ app.add_middleware(
 
 # WebSocket connection manager
 class ConnectionManager:
+    """Publishes to WebSocket clients through the non-blocking fan-out"""
+    
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.fanout = WebSocketFanout(
+            queue_size=settings.websocket_send_queue_size,
+            policy=settings.websocket_slow_consumer_policy,
+            send_timeout_seconds=settings.websocket_send_timeout_seconds
+        )
+        self.bus = None
+
+    def attach_bus(self, bus):
+        """Also publish broadcasts to the other processes on the event bus"""
+        self.bus = bus
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.fanout.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        self.fanout.remove(websocket)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    def subscribe(self, websocket: WebSocket, **filters) -> dict:
+        return self.fanout.subscribe(websocket, **filters).to_dict()
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Connection closed, remove it
-                self.active_connections.remove(connection)
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        self.fanout.send_to(websocket, message)
+
+    async def broadcast(self, message: str, tree_id: Optional[int] = None,
+                        task_id: Optional[int] = None, message_type: Optional[str] = None):
+        self.fanout.publish(message, tree_id=tree_id, task_id=task_id, message_type=message_type)
+        if self.bus:
+            self.bus.publish("ws", {
+                "text": message,
+                "tree_id": tree_id,
+                "task_id": task_id,
+                "message_type": message_type
+            })
     
     async def broadcast_message(self, ws_message: WebSocketMessage):
         """Broadcast a structured WebSocket message"""
-        await self.broadcast(ws_message.to_json())
+        await self.broadcast(
+            ws_message.to_json(),
+            tree_id=ws_message.tree_id,
+            task_id=ws_message.task_id,
+            message_type=ws_message.type.value
+        )
+    
+    async def broadcast_json(self, data: dict):
+        """Broadcast a JSON message, routed by its tree_id/task_id/type"""
+        await self.broadcast(
+            json.dumps(data),
+            tree_id=data.get("tree_id"),
+            task_id=data.get("task_id"),
+            message_type=data.get("type")
+        )
     
     async def broadcast_user_message(self, message_data: dict):
         """Broadcast user message to all connected clients"""
-        import json
-        message_json = json.dumps(message_data)
-        await self.broadcast(message_json)
+        await self.broadcast_json(message_data)
 
 
 manager = ConnectionManager()
+set_broadcaster(manager.broadcast_message)
 
 # Websocket manager is now global
 # (Previously was: task_manager.websocket_manager = manager)
 
 
+def _timestamp(unix_time: Optional[float]) -> Optional[str]:
+    """ISO timestamp for a tree summary's Unix time (None when unknown)"""
+    return datetime.fromtimestamp(unix_time).isoformat() if unix_time else None
+
+
 # API Routes
 
 @app.get("/")
@@ -334,10 +419,9 @@ async def health_check():
         
         # Check runtime integration if available
         runtime_stats = {}
-        runtime = get_runtime_integration()
-        if runtime:
+        if runtime_integration:
             runtime_stats = {
-                "processes_registered": len(runtime.process_registry.processes) if runtime.process_registry else 0
+                "processes_registered": await runtime_integration.get_process_count()
             }
         
         return {
@@ -386,11 +470,11 @@ async def submit_task(submission: TaskSubmission):
             raise RuntimeError(f"Task {task_id} not found after creation")
         
         # Broadcast task creation to WebSocket clients
-        await manager.broadcast(json.dumps({
+        await manager.broadcast_json({
             "type": "task_created",
             "task_id": task_id,
             "tree_id": task.get("tree_id", task_id)  # Use task_id as tree_id if not set
-        }))
+        })
         
         return TaskResponse(
             task_id=str(task_id),
@@ -412,17 +496,25 @@ async def get_active_tasks():
         # Get active tasks from database directly
         active_tasks = await database.tasks.get_active_tasks()
         
-        # Group by tree_id
+        # Group by tree_id, with each tree's counts from its summary row
         trees = {}
         for task in active_tasks:
-            if task.tree_id not in trees:
-                trees[task.tree_id] = {
-                    "tree_id": task.tree_id,
+            tree_id = task.get("tree_id") or task.get("id")
+            if tree_id not in trees:
+                trees[tree_id] = {
+                    "tree_id": tree_id,
                     "tasks": [],
-                    "started_at": task.created_at,
+                    "started_at": None,
                     "status": "active"
                 }
-            trees[task.tree_id]["tasks"].append(task)
+            trees[tree_id]["tasks"].append(task)
+        
+        summaries = await database.tasks.get_tree_summaries_for(list(trees))
+        for tree_id, tree in trees.items():
+            summary = summaries.get(tree_id) or {}
+            tree["started_at"] = _timestamp(summary.get("created_at"))
+            tree["task_count"] = summary.get("task_count", len(tree["tasks"]))
+            tree["status_counts"] = summary.get("status_counts", {})
         
         return {"active_trees": list(trees.values())}
     except Exception as e:
@@ -430,39 +522,52 @@ async def get_active_tasks():
 
 
 @app.get("/tasks/all")
-async def get_all_task_trees():
-    """Get all task trees including completed ones"""
+async def get_all_task_trees(limit: int = 50, cursor: Optional[int] = None, include_tasks: bool = False):
+    """
+    Get task trees including completed ones, newest first.
+    
+    Trees come a page at a time with their aggregates from one grouped
+    query; pass next_cursor back as cursor for the following page. Task
+    lists are loaded per tree from /tasks/tree/{tree_id}, or for the whole
+    page with include_tasks=true.
+    """
     try:
-        # Get all root tasks (tasks with no parent)
-        all_tasks = await database.tasks.get_all_root_tasks()
+        limit = max(1, min(limit, 500))
+        summaries = await database.tasks.get_tree_summaries(limit + 1, before_tree_id=cursor)
+        has_more = len(summaries) > limit
+        summaries = summaries[:limit]
+        
+        tasks_by_tree = {}
+        if include_tasks:
+            for task in await database.tasks.get_by_tree_ids([summary["tree_id"] for summary in summaries]):
+                tasks_by_tree.setdefault(task.get("tree_id"), []).append(task)
         
-        # For each root task, get the full tree
         trees = []
-        for root_task in all_tasks:
-            # Get all tasks in this tree (root_task is a dict)
-            tree_id = root_task.get("tree_id", root_task.get("id"))
-            tree_tasks = await database.tasks.get_by_tree_id(str(tree_id))
-            
-            # Calculate tree metadata
-            has_running_tasks = any(task.get("status") in ["running", "agent_responding", "waiting_on_dependencies"] for task in tree_tasks)
-            has_completed_tasks = any(task.get("status") in ["completed", "failed"] for task in tree_tasks)
-            
-            # Build tree structure
+        for summary in summaries:
+            created_at = _timestamp(summary["created_at"])
             tree = {
-                "tree_id": tree_id,
-                "tasks": tree_tasks,  # Already dicts from database
-                "started_at": None,  # Tasks table doesn't have created_at column
-                "created_at": "2025-06-25T20:00:00",  # Default timestamp for display
-                "status": root_task.get("status"),
-                "has_running_tasks": has_running_tasks,
-                "has_completed_tasks": has_completed_tasks,
-                "task_count": len(tree_tasks),
-                "instruction": root_task.get("instruction", ""),
-                "root_instruction": root_task.get("instruction", "No instruction")
+                "tree_id": summary["tree_id"],
+                "started_at": created_at,
+                "created_at": created_at or "2025-06-25T20:00:00",  # Default timestamp for display
+                "last_activity_at": _timestamp(summary["last_activity_at"]),
+                "status": summary["root_status"],
+                "has_running_tasks": summary["has_running_tasks"],
+                "has_completed_tasks": summary["has_completed_tasks"],
+                "task_count": summary.get("task_count", 0),
+                "status_counts": summary["status_counts"],
+                "depth": summary["max_depth"],
+                "instruction": summary["root_instruction"] or "",
+                "root_instruction": summary["root_instruction"] or "No instruction"
             }
+            if include_tasks:
+                tree["tasks"] = tasks_by_tree.get(summary["tree_id"], [])
             trees.append(tree)
         
-        return {"all_trees": trees}
+        return {
+            "all_trees": trees,
+            "next_cursor": trees[-1]["tree_id"] if has_more else None,
+            "has_more": has_more
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -474,18 +579,15 @@ async def get_task_tree(tree_id: int):
         tasks = await database.tasks.get_by_tree_id(tree_id)
         
         # Build hierarchical structure
-        task_dict = {task.get('id'): task for task in tasks}
-        
-        # Add children to each task
-        for task in tasks:
-            task_dict[task.id]["children"] = []
+        task_dict = {task.get("id"): {**task, "children": []} for task in tasks}
         
         for task in tasks:
-            if task.parent_task_id and task.parent_task_id in task_dict:
-                task_dict[task.parent_task_id]["children"].append(task_dict[task.id])
+            parent_id = task.get("parent_task_id")
+            if parent_id and parent_id in task_dict:
+                task_dict[parent_id]["children"].append(task_dict[task.get("id")])
         
         # Return root tasks (no parent)
-        root_tasks = [task_dict[task.id] for task in tasks if not task.parent_task_id]
+        root_tasks = [task_dict[task.get("id")] for task in tasks if not task.get("parent_task_id")]
         
         return {"tree_id": tree_id, "tasks": root_tasks}
     except Exception as e:
@@ -493,105 +595,14 @@ async def get_task_tree(tree_id: int):
 
 
 @app.get("/tasks/tree/{tree_id}/messages")
-async def get_tree_messages(tree_id: int):
-    """Get all messages for a task tree"""
+async def get_tree_messages(tree_id: int, since: Optional[int] = None, limit: Optional[int] = None):
+    """
+    Get the messages of a task tree, oldest first.
+    
+    Pass the returned cursor as since to fetch only messages added after it.
+    """
     try:
-        # Get all tasks in the tree (returns list of dicts)
-        tree_tasks = await database.tasks.get_by_tree_id(str(tree_id))
-        task_ids = [task.get("id") for task in tree_tasks if task.get("id")]
-        
-        # Get all messages for these tasks
-        messages = []
-        for task_id in task_ids:
-            task_messages = await database.messages.get_by_task_id(str(task_id))
-            for msg in task_messages:
-                # Get task info for agent name (msg is a dict)
-                task = next((t for t in tree_tasks if t.get("id") == task_id), None)
-                agent_name = "Unknown"
-                if task and task.get("agent_id"):
-                    agent = await database.agents.get_by_id(str(task.get("agent_id")))
-                    if agent:
-                        agent_name = agent.get("name", "Unknown")
-                
-                # Convert to WebSocket message format based on message type
-                msg_type = msg.get("message_type", "").lower()
-                
-                # Build content based on message type
-                content = {}
-                msg_content = msg.get("content", "")
-                if msg_type == "system_event" and msg_content.startswith("Starting task execution:"):
-                    # This is an agent_started message
-                    ws_msg_type = "agent_started"
-                    instruction = msg_content.replace("Starting task execution: ", "")
-                    content = {
-                        "instruction": instruction,
-                        "status": "initializing"
-                    }
-                elif msg_type == "error" and msg_content.startswith("Task failed:"):
-                    # This is an error message
-                    ws_msg_type = "agent_error"
-                    error_msg = msg_content.replace("Task failed: ", "")
-                    content = {"error": error_msg}
-                elif msg_type == "tool_call":
-                    ws_msg_type = "agent_tool_call"
-                    # Parse metadata if it's a string
-                    metadata = msg.get("metadata", {})
-                    if isinstance(metadata, str):
-                        try:
-                            import json
-                            metadata = json.loads(metadata)
-                        except:
-                            metadata = {}
-                    content = {
-                        "tool_name": metadata.get("tool_name", ""),
-                        "tool_input": metadata.get("parameters", {})
-                    }
-                elif msg_type == "tool_response":
-                    ws_msg_type = "agent_tool_result"
-                    tool_result = msg_content.replace("Tool result: ", "")
-                    # Parse metadata if it's a string
-                    metadata = msg.get("metadata", {})
-                    if isinstance(metadata, str):
-                        try:
-                            import json
-                            metadata = json.loads(metadata)
-                        except:
-                            metadata = {}
-                    content = {
-                        "tool_name": metadata.get("tool_name", ""),
-                        "tool_output": tool_result,
-                        "success": metadata.get("success", True)
-                    }
-                elif msg_type == "agent_response":
-                    ws_msg_type = "agent_thinking"
-                    content = {"thought": msg_content}
-                else:
-                    # Default format
-                    ws_msg_type = msg_type
-                    # Parse metadata if it's a string
-                    metadata = msg.get("metadata", {})
-                    if isinstance(metadata, str):
-                        try:
-                            import json
-                            metadata = json.loads(metadata)
-                        except:
-                            metadata = {}
-                    content = metadata if metadata else {"message": msg_content}
-                
-                ws_msg = {
-                    "type": ws_msg_type,
-                    "task_id": task_id,
-                    "tree_id": tree_id,
-                    "agent_name": agent_name,
-                    "content": content,
-                    "timestamp": msg.get("timestamp")
-                }
-                messages.append(ws_msg)
-        
-        # Sort by timestamp
-        messages.sort(key=lambda x: x["timestamp"] or "")
-        
-        return {"tree_id": tree_id, "messages": messages}
+        return await message_timeline.get(tree_id, since=since, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -606,8 +617,9 @@ async def get_task_status(task_id: int):
             raise HTTPException(status_code=404, detail="Task not found")
         
         # Get task tree info
-        tree_id = task.get("tree_id", task_id)
-        tree_tasks = await database.tasks.get_by_tree_id(str(tree_id))
+        tree_id = task.get("tree_id") or task_id
+        summary = await database.tasks.get_tree_summary(tree_id) or {}
+        status_counts = summary.get("status_counts", {})
         
         # Get recent messages
         messages = await database.messages.get_by_task_id(str(task_id))
@@ -616,16 +628,19 @@ async def get_task_status(task_id: int):
         # Get runtime status if available
         runtime_active = False
         if runtime_integration and runtime_integration.runtime_engine:
-            runtime_active = task_id in runtime_integration.runtime_engine.active_agents
+            runtime_active = await runtime_integration.is_task_running(task_id)
         
         return {
             "task": task,
             "tree_info": {
                 "tree_id": tree_id,
-                "total_tasks": len(tree_tasks),
-                "completed_tasks": len([t for t in tree_tasks if t.get("status") == "completed"]),
-                "failed_tasks": len([t for t in tree_tasks if t.get("status") == "failed"]),
-                "active_tasks": len([t for t in tree_tasks if t.get("status") in ["running", "queued", "created"]])
+                "total_tasks": summary.get("task_count", 0),
+                "completed_tasks": status_counts.get("completed", 0),
+                "failed_tasks": status_counts.get("failed", 0),
+                "active_tasks": sum(status_counts.get(status, 0) for status in ("running", "queued", "created")),
+                "status_counts": status_counts,
+                "depth": summary.get("max_depth"),
+                "last_activity_at": _timestamp(summary.get("last_activity_at"))
             },
             "recent_messages": recent_messages,
             "is_running": runtime_active
@@ -656,7 +671,7 @@ async def cancel_task_tree(tree_id: int):
                         {"reason": "Tree cancelled"}
                     )
         
-        await manager.broadcast(f"tree_cancelled:{tree_id}")
+        await manager.broadcast(f"tree_cancelled:{tree_id}", tree_id=tree_id)
         return {"message": f"Task tree {tree_id} cancelled"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -958,6 +973,24 @@ async def initialize_system(settings: dict = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def component_statistics() -> dict:
+    """Statistics of the components that run tasks, from this process"""
+    cache_stats = get_all_cache_stats()
+    return {
+        "entity_system": {
+            "entity_manager_active": True,
+            "entities_cached": cache_stats["entries"],
+            "cache": cache_stats
+        },
+        "llm_response_cache": ai_model_manager.get_cache_stats(),
+        "llm_gateway": ai_model_manager.get_gateway_stats(),
+        "llm_usage": ai_model_manager.get_usage_stats(),
+        "model_routing": model_router.get_statistics(),
+        "agent_context_loader": context_loader.get_statistics(),
+        "prompt_builder": prompt_builder.get_statistics()
+    }
+
+
 @app.get("/system/stats")
 async def get_system_stats():
     """Get system statistics"""
@@ -966,39 +999,56 @@ async def get_system_stats():
         active_tasks = await database.tasks.get_active_tasks()
         recent_messages = await database.messages.get_recent_messages(50)
         
-        # Get entity system stats
-        entity_stats = {
-            "entity_manager_active": True,
-            "entities_cached": 0  # Could get from entity manager if needed
-        }
-        
         # Get runtime system stats
         runtime_stats = {}
-        runtime_integration_local = get_runtime_integration()
-        if runtime_integration_local:
-            runtime_stats = await runtime_integration_local.get_runtime_statistics()
+        if runtime_integration:
+            runtime_stats = await runtime_integration.get_runtime_statistics()
+        engine_stats = runtime_stats.get("runtime_engine", {})
+        
+        # API workers only hold idle copies of these; the runtime process sends its own
+        components = runtime_stats.pop("components", None) or component_statistics()
         
         # Calculate task stats from runtime
         task_stats = {
-            "running_agents": len(runtime_integration_local.runtime_engine.active_agents) if runtime_integration_local and runtime_integration_local.runtime_engine else 0,
-            "queued_tasks": len([t for t in active_tasks if t.status == TaskStatus.QUEUED]),
-            "max_concurrent_agents": runtime_integration_local.runtime_engine.settings.max_concurrent_agents if runtime_integration_local and runtime_integration_local.runtime_engine else 5,
-            "is_running": runtime_integration_local is not None and runtime_integration_local.runtime_engine is not None
+            "running_agents": engine_stats.get("active_agents", 0),
+            "queued_tasks": len([t for t in active_tasks if t.get("status") == TaskStatus.QUEUED.value]),
+            "max_concurrent_agents": engine_stats.get("settings", {}).get("max_concurrent_agents", 5),
+            "is_running": bool(runtime_stats.get("runtime_active"))
         }
         
         return {
             "task_manager": task_stats,
             "database": {
                 "active_tasks": len(active_tasks),
-                "recent_messages": len(recent_messages)
+                "recent_messages": len(recent_messages),
+                "connection_pools": get_all_pool_stats()
             },
-            "entity_system": entity_stats,
+            **components,
+            "event_system": event_integration.event_manager.get_metrics(),
+            "message_timeline": message_timeline.get_statistics(),
+            "websocket_fanout": manager.fanout.get_stats(),
+            "event_bus": event_bus.get_stats() if event_bus else None,
             "runtime_system": runtime_stats
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/system/usage")
+async def get_usage(group_by: str = "tree", limit: int = 20, since: Optional[float] = None, order_by: str = "total_tokens"):
+    """Top token/cost consumers grouped by task, tree, agent or model"""
+    try:
+        return {
+            "group_by": group_by,
+            "order_by": order_by,
+            "usage": await ai_model_manager.usage_ledger.aggregate(group_by, limit, since, order_by)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/system/tools")
 async def list_tools():
     """List all available MCP tools with details"""
@@ -1069,7 +1119,7 @@ async def get_system_state():
         # Determine state
         if not has_knowledge or not has_agents:
             state = "uninitialized"
-        elif hasattr(app.state, "initializing") and app.state.initializing:
+        elif await is_initializing():
             state = "initializing"
         else:
             state = "ready"
@@ -1085,23 +1135,38 @@ async def get_system_state():
         return {"state": "uninitialized", "error": str(e)}
 
 
+async def is_initializing() -> bool:
+    """Whether system initialization is running; API workers ask the runtime process"""
+    if isinstance(runtime_integration, RemoteRuntimeIntegration):
+        return await runtime_integration.is_initializing()
+    return getattr(app.state, "initializing", False)
+
+
+async def set_initializing(value: bool):
+    """Record whether system initialization is running, where every worker sees it"""
+    app.state.initializing = value
+    if isinstance(runtime_integration, RemoteRuntimeIntegration):
+        await runtime_integration.set_initializing(value)
+
+
 @app.post("/system/initialize")
 async def initialize_system(settings: dict):
     """Start system initialization with provided settings"""
     try:
         # Mark system as initializing
-        app.state.initializing = True
+        await set_initializing(True)
         
         # Broadcast state change
-        await manager.broadcast(json.dumps({
+        await manager.broadcast_json({
             "type": "system_state_change",
             "state": "initializing"
-        }))
+        })
         
-        # Update system config with initialization settings
+        # Update system config with initialization settings, applied before the task starts
         if runtime_integration and runtime_integration.runtime_engine:
             runtime_integration.runtime_engine.settings.manual_stepping_enabled = settings.get("manualStepMode", True)
             runtime_integration.runtime_engine.settings.max_concurrent_agents = settings.get("maxConcurrentAgents", 1)
+            await runtime_integration.runtime_engine.apply_settings()
         
         # Create initialization task with proper process
         initialization_task_id = await runtime_integration.create_task(
@@ -1130,35 +1195,40 @@ async def initialize_system(settings: dict):
             "settings": settings
         }
     except Exception as e:
-        app.state.initializing = False
+        await set_initializing(False)
         logger.error(f"Error starting initialization: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 async def monitor_initialization_completion(task_id: int):
     """Monitor initialization task and update system state when complete"""
+    async def lookup(tid: int) -> Optional[TaskCompletion]:
+        task = await database.tasks.get_by_id(tid)
+        status = task.get("status") if task else None
+        if is_terminal(status):
+            return TaskCompletion(tid, "failed" if status == "failed" else "completed")
+        return None
+    
     try:
-        while True:
-            await asyncio.sleep(5)  # Check every 5 seconds
-            
-            task = await database.tasks.get_by_id(task_id)
-            if task and task.status in ["completed", "failed"]:
-                app.state.initializing = False
-                
-                new_state = "ready" if task.status == "completed" else "uninitialized"
-                
-                # Broadcast state change
-                await manager.broadcast(json.dumps({
-                    "type": "system_state_change",
-                    "state": new_state
-                }))
-                
-                logger.info(f"System initialization {task.status}. New state: {new_state}")
-                break
+        # Woken by the task completion notifier instead of polling
+        completions = await task_notifier.wait_for([task_id], lookup=lookup)
+        completion = completions[task_id]
+        
+        await set_initializing(False)
+        
+        new_state = "ready" if completion.succeeded else "uninitialized"
+        
+        # Broadcast state change
+        await manager.broadcast_json({
+            "type": "system_state_change",
+            "state": new_state
+        })
+        
+        logger.info(f"System initialization {completion.state}. New state: {new_state}")
                 
     except Exception as e:
         logger.error(f"Error monitoring initialization: {e}")
-        app.state.initializing = False
+        await set_initializing(False)
 
 
 @app.get("/system/config")
@@ -1192,12 +1262,13 @@ async def update_system_config(config: SystemConfig):
             runtime_integration.runtime_engine.settings.max_concurrent_agents = config.max_parallel_tasks
             runtime_integration.runtime_engine.settings.manual_stepping_enabled = config.step_mode
             setattr(runtime_integration.runtime_engine.settings, "step_mode_threads", config.step_mode_threads)
+            await runtime_integration.runtime_engine.apply_settings()
         
         # Broadcast configuration change
-        await manager.broadcast(json.dumps({
+        await manager.broadcast_json({
             "type": "config_updated",
             "config": config.model_dump()
-        }))
+        })
         
         return {"message": "Configuration updated", "config": config.model_dump()}
     except Exception as e:
@@ -1264,7 +1335,20 @@ async def websocket_endpoint(websocket: WebSocket):
             # Handle client commands
             try:
                 command = json.loads(data)
-                if command.get("type") == "continue_step":
+                if command.get("type") in ("subscribe", "unsubscribe"):
+                    # Limit this connection to some trees/tasks/message types; unsubscribe = everything
+                    filters = {}
+                    if command["type"] == "subscribe":
+                        filters = {
+                            key: command.get(key) or []
+                            for key in ("tree_ids", "task_ids", "message_types")
+                        }
+                    subscription = manager.subscribe(websocket, **filters)
+                    await manager.send_personal_message(
+                        json.dumps({"type": "subscribed", **subscription}),
+                        websocket
+                    )
+                elif command.get("type") == "continue_step":
                     task_id = command.get("task_id")
                     if task_id and runtime_integration and runtime_integration.runtime_engine:
                         await runtime_integration.runtime_engine.update_task_state(
@@ -1280,6 +1364,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 await manager.send_personal_message(f"Echo: {data}", websocket)
             
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 
@@ -1407,10 +1493,28 @@ if __name__ == "__main__":
     print(f"API docs available at http://{host}:{port}/docs")
     print(f"Web interface at http://{host}:{port}/app")
     
-    uvicorn.run(
-        "api.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.debug_mode,
-        log_level="info"
-    )
\ No newline at end of file
+    if settings.api_workers > 1:
+        # One runtime process plus API_WORKERS API workers sharing it over the event bus
+        import subprocess
+        print(f"Starting runtime process and {settings.api_workers} API workers")
+        runtime_process = subprocess.Popen([sys.executable, "-m", "api.runtime_process"])
+        os.environ["PROCESS_ROLE"] = "api"
+        try:
+            uvicorn.run(
+                "api.main:app",
+                host="0.0.0.0",
+                port=8000,
+                workers=settings.api_workers,
+                log_level="info"
+            )
+        finally:
+            runtime_process.terminate()
+            runtime_process.wait()
+    else:
+        uvicorn.run(
+            "api.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=settings.debug_mode,
+            log_level="info"
+        )
\ No newline at end of file
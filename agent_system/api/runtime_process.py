@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Runtime process for the multi-worker deployment.
+
+Runs the runtime engine, scheduler and tool system without an HTTP server
+and serves them over the event bus socket (settings.event_bus_path) to API
+workers started with PROCESS_ROLE=api. `API_WORKERS=4 python -m api.main`
+starts this process together with the workers.
+
+Usage:
+    python -m api.runtime_process
+"""
+
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.main import start_services, stop_services
+
+
+async def main():
+    """Main entry point"""
+    print("🚀 Starting runtime process...")
+    await start_services("runtime")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await stopping.wait()
+
+    print("🛑 Shutting down runtime process...")
+    await stop_services()
+    print("✅ Shutdown complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,273 @@
+"""
+Shared SQLite connection pool.
+
+All database access layers (config.database.DatabaseManager, the
+EntityManager and everything built on top of them) share one pool per
+database file. The pool keeps a single long-lived writer connection and a
+small set of reader connections in WAL mode, so hot-path lookups reuse an
+open connection instead of paying for a new thread, file open and schema
+parse on every call.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, FrozenSet, Optional
+
+import aiosqlite
+
+from .settings import settings
+
+
+# Writer holds of the current task; tasks it creates (gather, create_task)
+# inherit them, so they reuse the writer instead of waiting on their parent
+_held_writers: ContextVar[FrozenSet[object]] = ContextVar("held_writers", default=frozenset())
+
+
+class ConnectionPool:
+    """Single-writer / multi-reader pool of aiosqlite connections."""
+
+    def __init__(
+        self,
+        db_path: str,
+        reader_count: int = 4,
+        cached_statements: int = 256,
+        busy_timeout_ms: int = 5000
+    ):
+        self.db_path = db_path
+        self.in_memory = db_path == ":memory:" or db_path.startswith("file::memory:")
+        # In-memory databases are private to one connection, so every
+        # read has to go through the writer.
+        self.reader_count = 0 if self.in_memory else max(0, reader_count)
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._writer_hold: Optional[object] = None  # Marks the current writer hold
+        self._writer_guests = 0  # Reentrant uses in progress
+        self._writer_guests_done = asyncio.Event()
+        self._writer_guests_done.set()
+        self._readers: asyncio.Queue = asyncio.Queue()
+        self._all_readers = []
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+
+        # Pool metrics
+        self.stats: Dict[str, Dict[str, Any]] = {
+            "reader": self._empty_stats(),
+            "writer": self._empty_stats()
+        }
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
+            "acquisitions": 0,
+            "hits": 0,          # Connection was free immediately
+            "waits": 0,         # Caller had to wait for a connection
+            "reentrant": 0,     # Nested use inside an existing writer scope
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open and configure a single connection."""
+        conn = await aiosqlite.connect(
+            self.db_path,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = aiosqlite.Row
+        await self._pragma(conn, f"busy_timeout = {int(self.busy_timeout_ms)}")
+        await self._pragma(conn, "foreign_keys = ON")
+        await self._pragma(conn, "synchronous = NORMAL")
+        return conn
+
+    @staticmethod
+    async def _pragma(conn: aiosqlite.Connection, pragma: str):
+        """Run a PRAGMA and close its cursor so no statement stays active."""
+        cursor = await conn.execute(f"PRAGMA {pragma}")
+        await cursor.fetchall()
+        await cursor.close()
+
+    async def open(self):
+        """Open the writer and reader connections (idempotent)."""
+        if self._opened:
+            return
+
+        async with self._open_lock:
+            if self._opened:
+                return
+
+            if not self.in_memory:
+                directory = os.path.dirname(os.path.abspath(self.db_path))
+                os.makedirs(directory, exist_ok=True)
+
+            self._writer = await self._connect()
+            if not self.in_memory:
+                # WAL lets readers run concurrently with the single writer
+                await self._pragma(self._writer, "journal_mode = WAL")
+
+            for _ in range(self.reader_count):
+                reader = await self._connect()
+                self._all_readers.append(reader)
+                self._readers.put_nowait(reader)
+
+            self._opened = True
+
+    async def close(self):
+        """Close all pooled connections."""
+        async with self._open_lock:
+            if not self._opened:
+                return
+
+            for reader in self._all_readers:
+                await reader.close()
+            self._all_readers.clear()
+            self._readers = asyncio.Queue()
+
+            if self._writer:
+                await self._writer.close()
+                self._writer = None
+
+            self._opened = False
+
+    def _record(self, kind: str, waited: bool, wait_seconds: float):
+        """Record an acquisition in the pool metrics."""
+        stats = self.stats[kind]
+        wait_ms = wait_seconds * 1000
+        stats["acquisitions"] += 1
+        if waited:
+            stats["waits"] += 1
+        else:
+            stats["hits"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+
+    def _holds_writer(self) -> bool:
+        """Check if the current task, or the task that created it, holds the writer."""
+        return self._writer_hold is not None and self._writer_hold in _held_writers.get()
+
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Acquire the writer connection.
+
+        Writes are serialized through a single connection. Any transaction
+        left open when the block exits is rolled back, mirroring the old
+        behaviour of closing a per-call connection without committing.
+
+        Acquiring is reentrant for the holder and the tasks it starts while
+        holding, which share its connection and transaction. The holder
+        releases the writer only once those tasks are done with it.
+        """
+        await self.open()
+
+        if self._holds_writer():
+            self.stats["writer"]["reentrant"] += 1
+            self._writer_guests += 1
+            self._writer_guests_done.clear()
+            try:
+                yield self._writer
+            finally:
+                self._writer_guests -= 1
+                if not self._writer_guests:
+                    self._writer_guests_done.set()
+            return
+
+        start = time.perf_counter()
+        waited = self._writer_lock.locked()
+        async with self._writer_lock:
+            self._record("writer", waited, time.perf_counter() - start)
+            self._writer_hold = hold = object()
+            context_token = _held_writers.set(_held_writers.get() | {hold})
+            try:
+                yield self._writer
+            finally:
+                # Tasks started during the hold may still be using the writer
+                await self._writer_guests_done.wait()
+                _held_writers.reset(context_token)
+                self._writer_hold = None
+                if self._writer.in_transaction:
+                    await self._writer.rollback()
+
+    @asynccontextmanager
+    async def reader(self):
+        """Acquire a read-only connection from the pool."""
+        await self.open()
+
+        if self.reader_count == 0 or self._holds_writer():
+            # Reads inside a writer scope must see uncommitted changes and
+            # must not block on a connection the caller is holding.
+            async with self.writer() as conn:
+                yield conn
+            return
+
+        start = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+            waited = False
+        except asyncio.QueueEmpty:
+            conn = await self._readers.get()
+            waited = True
+        self._record("reader", waited, time.perf_counter() - start)
+
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool hit/wait metrics."""
+        def summarize(stats: Dict[str, Any]) -> Dict[str, Any]:
+            summary = dict(stats)
+            acquisitions = stats["acquisitions"]
+            summary["hit_rate"] = stats["hits"] / acquisitions if acquisitions else 0.0
+            summary["avg_wait_ms"] = stats["total_wait_ms"] / acquisitions if acquisitions else 0.0
+            return summary
+
+        return {
+            "db_path": self.db_path,
+            "open": self._opened,
+            "readers_total": self.reader_count,
+            "readers_idle": self._readers.qsize(),
+            "writer_busy": self._writer_lock.locked(),
+            "reader": summarize(self.stats["reader"]),
+            "writer": summarize(self.stats["writer"])
+        }
+
+
+# Pools are shared per database file
+_pools: Dict[str, ConnectionPool] = {}
+
+
+def _pool_key(db_path: str) -> str:
+    if db_path == ":memory:" or db_path.startswith("file:"):
+        return db_path
+    return os.path.abspath(db_path)
+
+
+def get_connection_pool(db_path: str) -> ConnectionPool:
+    """Get or create the shared pool for a database file."""
+    key = _pool_key(db_path)
+    if key not in _pools:
+        _pools[key] = ConnectionPool(
+            db_path,
+            reader_count=settings.db_pool_readers,
+            cached_statements=settings.db_statement_cache_size,
+            busy_timeout_ms=settings.db_busy_timeout_ms
+        )
+    return _pools[key]
+
+
+async def close_connection_pool(db_path: str):
+    """Close and forget the shared pool for a database file."""
+    pool = _pools.pop(_pool_key(db_path), None)
+    if pool:
+        await pool.close()
+
+
+def get_all_pool_stats() -> Dict[str, Any]:
+    """Get metrics for every open pool."""
+    return {key: pool.get_stats() for key, pool in _pools.items()}
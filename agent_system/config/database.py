@@ -2,13 +2,15 @@
 Minimal database configuration for entity-based architecture.
 
 All database schema is managed through migrations in the database/migrations directory.
-This file only provides connection management.
+This file only provides connection management. Connections come from the
+shared pool in config.connection_pool, so this manager, the EntityManager
+and the permission manager all reuse the same long-lived connections.
 """
 
-import aiosqlite
 from typing import Optional, Dict, Any, List
 from contextlib import asynccontextmanager
 from .settings import settings
+from .connection_pool import ConnectionPool, get_connection_pool, close_connection_pool
 
 
 class DatabaseManager:
@@ -16,31 +18,38 @@ class DatabaseManager:
     
     def __init__(self, db_url: str = None):
         self.db_url = db_url or settings.database_url.replace("sqlite:///", "")
-        self._connection: Optional[aiosqlite.Connection] = None
+        self.pool: Optional[ConnectionPool] = None
     
     async def connect(self):
-        """Initialize database connection"""
-        self._connection = await aiosqlite.connect(self.db_url)
-        self._connection.row_factory = aiosqlite.Row
-        # Enable foreign keys
-        await self._connection.execute("PRAGMA foreign_keys = ON")
+        """Initialize the shared connection pool"""
+        self.pool = get_connection_pool(self.db_url)
+        await self.pool.open()
     
     async def disconnect(self):
-        """Close database connection"""
-        if self._connection:
-            await self._connection.close()
-            self._connection = None
+        """Close the shared connection pool"""
+        if self.pool:
+            await close_connection_pool(self.db_url)
+            self.pool = None
     
     @asynccontextmanager
     async def get_connection(self):
-        """Get database connection context manager"""
-        if not self._connection:
+        """Get the writer connection context manager"""
+        if not self.pool:
             await self.connect()
-        yield self._connection
+        async with self.pool.writer() as conn:
+            yield conn
+    
+    @asynccontextmanager
+    async def get_read_connection(self):
+        """Get a pooled reader connection context manager"""
+        if not self.pool:
+            await self.connect()
+        async with self.pool.reader() as conn:
+            yield conn
     
     async def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as list of dicts"""
-        async with self.get_connection() as conn:
+        async with self.get_read_connection() as conn:
             cursor = await conn.execute(query, params or ())
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
@@ -58,6 +67,10 @@ class DatabaseManager:
             await conn.executescript(script)
             await conn.commit()
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool hit/wait metrics"""
+        return self.pool.get_stats() if self.pool else {}
+    
     async def get_schema_version(self) -> int:
         """Get current schema version from migrations table"""
         try:
@@ -69,6 +69,21 @@ GEMINI_25_MODELS = {
 }
 
 
+# Gemini models from cheapest to most capable; routing escalates along this list
+GEMINI_MODEL_TIERS = ["gemini-2.5-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"]
+
+
+# Context windows (tokens) for models outside the Gemini table, matched by prefix
+OTHER_MODEL_CONTEXT_WINDOWS = {
+    "claude-": 200_000,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385
+}
+DEFAULT_CONTEXT_WINDOW = 128_000
+
+
 class ModelSelector:
     """Helper class for selecting appropriate models based on task requirements"""
     
@@ -119,6 +134,53 @@ class ModelSelector:
         
         return model
     
+    @staticmethod
+    def get_context_window(model: str) -> int:
+        """
+        Get the context window size for a model.
+        
+        Args:
+            model: Model name
+            
+        Returns:
+            Context window in tokens
+        """
+        if model in GEMINI_25_MODELS:
+            return GEMINI_25_MODELS[model]["context_window"]
+        for prefix, window in OTHER_MODEL_CONTEXT_WINDOWS.items():
+            if model and model.startswith(prefix):
+                return window
+        return DEFAULT_CONTEXT_WINDOW
+    
+    @staticmethod
+    def get_tier(model: str) -> int:
+        """
+        Get a model's position in GEMINI_MODEL_TIERS.
+        
+        Args:
+            model: Model name
+            
+        Returns:
+            Tier index (0 = cheapest), or -1 for models outside the tiers
+        """
+        return GEMINI_MODEL_TIERS.index(model) if model in GEMINI_MODEL_TIERS else -1
+    
+    @staticmethod
+    def next_tier(model: str) -> str:
+        """
+        Get the next more capable model.
+        
+        Args:
+            model: Model name
+            
+        Returns:
+            The next model up, or "" at the top or outside the tiers
+        """
+        tier = ModelSelector.get_tier(model)
+        if tier < 0 or tier + 1 >= len(GEMINI_MODEL_TIERS):
+            return ""
+        return GEMINI_MODEL_TIERS[tier + 1]
+    
     @staticmethod
     def estimate_cost(model: str, tokens: int) -> float:
         """
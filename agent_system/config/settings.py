@@ -19,8 +19,30 @@ class Settings(BaseSettings):
     # System Configuration
     system_secret_key: str = "default-secret-key-change-me"
     database_url: str = "sqlite:///data/agent_system.db"
+    db_pool_readers: int = 4               # Reader connections per database file
+    db_statement_cache_size: int = 256     # Prepared statements cached per connection
+    db_busy_timeout_ms: int = 5000
+    
+    # Entity cache
+    entity_cache_max_entries: int = 2000
+    entity_cache_max_memory_mb: int = 64
+    entity_cache_ttl_seconds: dict = {
+        "agent": 600,       # Definitions change rarely
+        "tool": 600,
+        "document": 600,
+        "process": 600,
+        "task": 30,         # Tasks change state constantly
+        "event": 60
+    }
     max_concurrent_agents: int = 3
+    # Concurrent agent calls per budget, keyed "provider:model", model or provider
+    agent_concurrency_limits: dict = {
+        "gemini-2.5-flash-lite": 8,
+        "gemini-2.5-flash": 4,
+        "gemini-2.5-pro": 2
+    }
     default_timeout_seconds: int = 300
+    max_parallel_tool_calls: int = 4  # Read-only tool calls run concurrently up to this
     environment: str = "development"
     debug_mode: bool = True
     
@@ -30,6 +52,40 @@ class Settings(BaseSettings):
     default_temperature: float = 0.1
     default_max_tokens: int = 4000
     
+    # Model routing: Gemini tier per call from task complexity, agent preference,
+    # success history and latency; a failed cheaper call escalates one tier
+    model_routing_enabled: bool = True
+    model_routing_short_instruction_tokens: int = 150   # At or below: one tier down
+    model_routing_long_instruction_tokens: int = 1500   # Above: one tier up
+    model_routing_deep_task_depth: int = 3              # Subtasks this deep: one tier down
+    model_routing_min_success_rate: float = 0.6         # Below: one tier up
+    model_routing_max_escalations: int = 2
+    model_latency_slo_ms: int = 0                       # Step down while observed latency exceeds it; 0 = off
+    
+    # Prompt assembly
+    prompt_history_messages: int = 10  # Most recent messages included in a prompt
+    prompt_token_budget: int = 0  # Cap on prompt tokens; 0 = model context window minus output
+    
+    # LLM response cache
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_max_temperature: float = 0.2  # Hotter calls are never cached
+    
+    # Provider gateway: per "provider:model", model or provider limits (requests/tokens per minute)
+    llm_rate_limits: dict = {
+        "google": {"rpm": 1000, "tpm": 4_000_000},
+        "anthropic": {"rpm": 50, "tpm": 40_000},
+        "openai": {"rpm": 500, "tpm": 200_000}
+    }
+    llm_max_retries: int = 4
+    llm_retry_base_delay: float = 1.0
+    llm_retry_max_delay: float = 30.0
+    
+    # Google provider: native async calls; blocking calls use a dedicated pool when disabled
+    google_async_client: bool = True
+    google_executor_workers: int = 32
+    
     # Available Gemini 2.5 models
     gemini_models: dict = {
         "flash-lite": "gemini-2.5-flash-lite",  # Fastest and most cost-efficient
@@ -45,6 +101,20 @@ class Settings(BaseSettings):
     # CORS Configuration
     allowed_origins: str = "http://localhost:3000"
     
+    # WebSocket fan-out: per-client send queue; a full queue drops the oldest
+    # message ("drop_oldest") or closes the client ("disconnect")
+    websocket_send_queue_size: int = 256
+    websocket_slow_consumer_policy: str = "drop_oldest"
+    websocket_send_timeout_seconds: float = 10.0
+
+    # Process layout: "all" runs API and runtime in one process; "runtime" runs
+    # the runtime engine alone and "api" runs an API worker that reaches it
+    # over the event bus socket (python -m api.main --workers N starts both)
+    process_role: str = "all"
+    event_bus_path: str = "data/runtime_bus.sock"
+    event_bus_call_timeout_seconds: float = 30.0
+    api_workers: int = 1
+
     class Config:
         env_file = ".env"
         case_sensitive = False
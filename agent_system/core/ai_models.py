@@ -1,12 +1,22 @@
-from typing import Dict, Any, List, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator, Union
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 import asyncio
+import functools
 import json
 import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from config.settings import settings
+from config.database import db_manager
 from .models import AIModelConfig as ModelConfig, MCPToolCall
+from .response_cache import ResponseCache, make_cache_key
+from .provider_gateway import ProviderGateway
+from .prompt_builder import estimate_tokens
+from .usage_accounting import UsageLedger, UsageContext, UsageRecord
 
 
 class AIModelProvider(ABC):
@@ -33,6 +43,68 @@ class AIModelProvider(ABC):
     def parse_tool_calls(self, response: str) -> List[MCPToolCall]:
         """Parse tool calls from the model response"""
         pass
+    
+    async def stream_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a response as deltas.
+        
+        Yields {"type": "text", "text": ...} as text arrives,
+        {"type": "tool_call", "tool_call": MCPToolCall} as soon as a native
+        tool call block is complete, and finally {"type": "done",
+        "response": {...}} with the dict generate_response would return.
+        Providers without streaming support yield the whole response at once.
+        """
+        response = await self.generate_response(messages, tools, **kwargs)
+        if response.get("content"):
+            yield {"type": "text", "text": response["content"]}
+        for tool_call in response.get("tool_calls") or []:
+            yield {"type": "tool_call", "tool_call": tool_call}
+        yield {"type": "done", "response": response}
+
+
+class ToolCallStreamParser:
+    """Detects <tool_call> blocks in streamed text as soon as each one closes"""
+    
+    CLOSE_TAG = "</tool_call>"
+    
+    def __init__(self, parse_tool_calls):
+        self._parse = parse_tool_calls
+        self._buffer = ""
+        self._position = 0
+        self._seen_ids = set()
+        self.count = 0
+    
+    def feed(self, text: str) -> List[MCPToolCall]:
+        """Add streamed text and return tool calls completed by it"""
+        self._buffer += text
+        calls = []
+        while True:
+            end = self._buffer.find(self.CLOSE_TAG, self._position)
+            if end == -1:
+                break
+            end += len(self.CLOSE_TAG)
+            for call in self._parse(self._buffer[self._position:end]):
+                # Text parsers number calls per parse, so keep ids unique
+                if not call.call_id or call.call_id in self._seen_ids:
+                    call.call_id = f"call_{self.count}"
+                self._seen_ids.add(call.call_id)
+                self.count += 1
+                calls.append(call)
+            self._position = end
+        return calls
+
+
+@dataclass
+class AIResponse:
+    """Model response as returned to agent runtimes"""
+    content: str
+    tool_calls: List[MCPToolCall] = None
+    usage: Optional[Dict[str, Any]] = None
+    cached: bool = False
+    usage_record: Optional[UsageRecord] = None
 
 
 class AnthropicProvider(AIModelProvider):
@@ -54,17 +126,7 @@ class AnthropicProvider(AIModelProvider):
         """Generate response using Anthropic Claude"""
         
         # Convert messages to Anthropic format
-        anthropic_messages = []
-        system_message = ""
-        
-        for msg in messages:
-            if msg["role"] == "system":
-                system_message = msg["content"]
-            else:
-                anthropic_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+        system_message, anthropic_messages = self._convert_messages(messages)
         
         # Prepare request parameters
         request_params = {
@@ -91,7 +153,8 @@ class AnthropicProvider(AIModelProvider):
                 "usage": {
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens,
-                    "total_tokens": response.usage.input_tokens + response.usage.output_tokens
+                    "total_tokens": response.usage.input_tokens + response.usage.output_tokens,
+                    **self._cache_usage(response.usage)
                 },
                 "model": response.model,
                 "stop_reason": response.stop_reason,
@@ -101,6 +164,115 @@ class AnthropicProvider(AIModelProvider):
         except Exception as e:
             raise Exception(f"Anthropic API error: {str(e)}")
     
+    async def stream_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream response deltas from Anthropic Claude"""
+        system_message, anthropic_messages = self._convert_messages(messages)
+        
+        request_params = {
+            "model": self.config.model,
+            "max_tokens": self.config.max_tokens or 1024,
+            "temperature": self.config.temperature,
+            "messages": anthropic_messages,
+            "stream": True
+        }
+        if system_message:
+            request_params["system"] = system_message
+        if tools:
+            request_params["tools"] = tools
+        request_params.update(kwargs)
+        
+        content_parts = []
+        tool_calls = []
+        blocks: Dict[int, Dict[str, Any]] = {}
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        model = self.config.model
+        stop_reason = None
+        
+        try:
+            stream = await self.client.messages.create(**request_params)
+            async for event in stream:
+                if event.type == "message_start":
+                    model = event.message.model
+                    usage["input_tokens"] = event.message.usage.input_tokens
+                    usage.update(self._cache_usage(event.message.usage))
+                elif event.type == "content_block_start":
+                    block = event.content_block
+                    if block.type == "tool_use":
+                        blocks[event.index] = {"id": block.id, "name": block.name, "json": []}
+                elif event.type == "content_block_delta":
+                    if event.delta.type == "text_delta":
+                        content_parts.append(event.delta.text)
+                        yield {"type": "text", "text": event.delta.text}
+                    elif event.delta.type == "input_json_delta" and event.index in blocks:
+                        blocks[event.index]["json"].append(event.delta.partial_json)
+                elif event.type == "content_block_stop" and event.index in blocks:
+                    # A tool_use block is complete - surface it immediately
+                    block = blocks.pop(event.index)
+                    try:
+                        parameters = json.loads("".join(block["json"]) or "{}")
+                    except json.JSONDecodeError:
+                        parameters = {}
+                    tool_call = MCPToolCall(
+                        tool_name=block["name"],
+                        parameters=parameters,
+                        call_id=block["id"]
+                    )
+                    tool_calls.append(tool_call)
+                    yield {"type": "tool_call", "tool_call": tool_call}
+                elif event.type == "message_delta":
+                    stop_reason = event.delta.stop_reason
+                    usage["output_tokens"] = event.usage.output_tokens
+        except Exception as e:
+            raise Exception(f"Anthropic API error: {str(e)}")
+        
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        yield {
+            "type": "done",
+            "response": {
+                "content": "".join(content_parts),
+                "usage": usage,
+                "model": model,
+                "stop_reason": stop_reason,
+                "tool_calls": tool_calls
+            }
+        }
+    
+    @staticmethod
+    def _convert_messages(messages: List[Dict[str, Any]]):
+        """
+        Split out the system prompt and convert the rest to Anthropic format.
+        
+        A system message flagged "cacheable" (the stable prompt prefix) is
+        sent as a content block with a cache_control breakpoint, so repeat
+        calls read it from the prompt cache instead of re-processing it.
+        """
+        system_message: Union[str, List[Dict[str, Any]]] = ""
+        anthropic_messages = []
+        for msg in messages:
+            if msg["role"] == "system":
+                if msg.get("cacheable"):
+                    system_message = [{
+                        "type": "text",
+                        "text": msg["content"],
+                        "cache_control": {"type": "ephemeral"}
+                    }]
+                else:
+                    system_message = msg["content"]
+            else:
+                anthropic_messages.append({"role": msg["role"], "content": msg["content"]})
+        return system_message, anthropic_messages
+    
+    @staticmethod
+    def _cache_usage(usage) -> Dict[str, int]:
+        """Prompt cache token counts reported by the API"""
+        return {
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0
+        }
+    
     def _extract_tool_calls(self, response) -> List[MCPToolCall]:
         """Extract tool calls from Anthropic response"""
         tool_calls = []
@@ -139,7 +311,22 @@ class AnthropicProvider(AIModelProvider):
 
 
 class GoogleProvider(AIModelProvider):
-    """Google Gemini model provider"""
+    """
+    Google Gemini model provider
+    
+    Calls use the SDK's native async API (generate_content_async /
+    send_message_async), so concurrent requests share the SDK's single
+    async client and its connection pool instead of each occupying a
+    worker thread. If the async API is disabled (settings.google_async_client)
+    or missing from the installed SDK, blocking calls run on a dedicated
+    executor sized by settings.google_executor_workers rather than the
+    default asyncio thread pool.
+    """
+    
+    # Models are cached per system instruction; the prompt prefix is stable per agent
+    MAX_CACHED_MODELS = 64
+    
+    _executor: Optional[ThreadPoolExecutor] = None
     
     async def initialize(self):
         try:
@@ -152,6 +339,8 @@ class GoogleProvider(AIModelProvider):
             
             genai.configure(api_key=api_key)
             self.client = genai.GenerativeModel(self.config.model)
+            self._models: "OrderedDict[str, Any]" = OrderedDict()
+            self.use_async = settings.google_async_client and hasattr(self.client, "generate_content_async")
             
         except ImportError:
             raise ImportError("google-generativeai package not installed. Run: pip install google-generativeai")
@@ -161,11 +350,69 @@ class GoogleProvider(AIModelProvider):
                               tools: List[Dict[str, Any]] = None,
                               **kwargs) -> Dict[str, Any]:
         """Generate response using Google Gemini"""
+        system_instruction, gemini_messages = self._convert_messages(messages)
+        model = self._model_for(system_instruction)
         
-        # Convert messages to Gemini format
-        gemini_messages = []
-        system_instruction = ""
+        try:
+            if self.use_async:
+                response = await self._send(model, gemini_messages)
+            else:
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(),
+                    functools.partial(self._send_blocking, model, gemini_messages)
+                )
+            
+            return {
+                "content": response.text if response.text else "",
+                "usage": self._usage(response.usage_metadata),
+                "model": self.config.model,
+                "stop_reason": response.candidates[0].finish_reason.name if response.candidates else "stop",
+                "tool_calls": self._extract_tool_calls(response)
+            }
+            
+        except Exception as e:
+            raise Exception(f"Google API error: {str(e)}")
+    
+    async def stream_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream response deltas from Google Gemini"""
+        system_instruction, gemini_messages = self._convert_messages(messages)
+        model = self._model_for(system_instruction)
+        
+        chunks = self._stream_async(model, gemini_messages) if self.use_async else self._stream_threaded(model, gemini_messages)
+        content_parts = []
+        last_chunk = None
+        async for chunk in chunks:
+            last_chunk = chunk
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata)
+                text = ""
+            if text:
+                content_parts.append(text)
+                yield {"type": "text", "text": text}
         
+        candidates = getattr(last_chunk, "candidates", None)
+        content = "".join(content_parts)
+        yield {
+            "type": "done",
+            "response": {
+                "content": content,
+                "usage": self._usage(getattr(last_chunk, "usage_metadata", None)),
+                "model": self.config.model,
+                "stop_reason": candidates[0].finish_reason.name if candidates else "stop",
+                "tool_calls": self.parse_tool_calls(content)
+            }
+        }
+    
+    @staticmethod
+    def _convert_messages(messages: List[Dict[str, Any]]):
+        """Split out the system instruction and convert the rest to Gemini format"""
+        system_instruction = ""
+        gemini_messages = []
         for msg in messages:
             if msg["role"] == "system":
                 system_instruction = msg["content"]
@@ -173,55 +420,113 @@ class GoogleProvider(AIModelProvider):
                 gemini_messages.append({"role": "user", "parts": [msg["content"]]})
             elif msg["role"] == "assistant":
                 gemini_messages.append({"role": "model", "parts": [msg["content"]]})
-        
-        # Prepare generation config
-        generation_config = {
+        return system_instruction, gemini_messages
+    
+    def _generation_config(self) -> Dict[str, Any]:
+        return {
             "temperature": self.config.temperature,
             "max_output_tokens": self.config.max_tokens,
         }
-        
+    
+    def _model_for(self, system_instruction: str):
+        """The model for a system instruction, created once and reused"""
+        if not system_instruction:
+            return self.client
+        model = self._models.get(system_instruction)
+        if model is None:
+            model = self.genai.GenerativeModel(self.config.model, system_instruction=system_instruction)
+            self._models[system_instruction] = model
+            while len(self._models) > self.MAX_CACHED_MODELS:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(system_instruction)
+        return model
+    
+    async def _send(self, model, gemini_messages: List[Dict[str, Any]], stream: bool = False):
+        """Send the last message (with the rest as chat history) through the async API"""
+        if len(gemini_messages) > 1:
+            chat = model.start_chat(history=gemini_messages[:-1])
+            return await chat.send_message_async(
+                gemini_messages[-1]["parts"][0],
+                generation_config=self._generation_config(),
+                stream=stream
+            )
+        return await model.generate_content_async(
+            gemini_messages[0]["parts"][0] if gemini_messages else "",
+            generation_config=self._generation_config(),
+            stream=stream
+        )
+    
+    def _send_blocking(self, model, gemini_messages: List[Dict[str, Any]], stream: bool = False):
+        """Blocking counterpart of _send, run on the dedicated executor"""
+        if len(gemini_messages) > 1:
+            chat = model.start_chat(history=gemini_messages[:-1])
+            return chat.send_message(
+                gemini_messages[-1]["parts"][0],
+                generation_config=self._generation_config(),
+                stream=stream
+            )
+        return model.generate_content(
+            gemini_messages[0]["parts"][0] if gemini_messages else "",
+            generation_config=self._generation_config(),
+            stream=stream
+        )
+    
+    async def _stream_async(self, model, gemini_messages: List[Dict[str, Any]]):
         try:
-            # Create model with system instruction if provided
-            if system_instruction:
-                model = self.genai.GenerativeModel(
-                    self.config.model,
-                    system_instruction=system_instruction
-                )
-            else:
-                model = self.client
-            
-            # Convert messages to Gemini chat history format
-            if len(gemini_messages) > 1:
-                # Start chat with history
-                chat = model.start_chat(history=gemini_messages[:-1])
-                response = await asyncio.to_thread(
-                    chat.send_message,
-                    gemini_messages[-1]["parts"][0],
-                    generation_config=generation_config
-                )
-            else:
-                # Single message
-                response = await asyncio.to_thread(
-                    model.generate_content,
-                    gemini_messages[0]["parts"][0] if gemini_messages else "",
-                    generation_config=generation_config
-                )
-            
-            return {
-                "content": response.text if response.text else "",
-                "usage": {
-                    "input_tokens": getattr(response.usage_metadata, 'prompt_token_count', 0),
-                    "output_tokens": getattr(response.usage_metadata, 'candidates_token_count', 0),
-                    "total_tokens": getattr(response.usage_metadata, 'total_token_count', 0)
-                },
-                "model": self.config.model,
-                "stop_reason": response.candidates[0].finish_reason.name if response.candidates else "stop",
-                "tool_calls": self._extract_tool_calls(response)
-            }
-            
+            response = await self._send(model, gemini_messages, stream=True)
+            async for chunk in response:
+                yield chunk
         except Exception as e:
             raise Exception(f"Google API error: {str(e)}")
     
+    async def _stream_threaded(self, model, gemini_messages: List[Dict[str, Any]]):
+        # The blocking SDK stream is drained on the dedicated executor,
+        # which feeds chunks into an asyncio queue
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        
+        def pump():
+            try:
+                for chunk in self._send_blocking(model, gemini_messages, stream=True):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+        
+        producer = loop.run_in_executor(self._get_executor(), pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise Exception(f"Google API error: {str(item)}")
+                yield item
+        finally:
+            await producer
+    
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        # One pool for every Gemini model, so fallback concurrency is
+        # bounded by settings rather than the default executor size
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=settings.google_executor_workers,
+                thread_name_prefix="gemini"
+            )
+        return cls._executor
+    
+    @staticmethod
+    def _usage(usage_metadata) -> Dict[str, int]:
+        return {
+            "input_tokens": getattr(usage_metadata, 'prompt_token_count', 0),
+            "output_tokens": getattr(usage_metadata, 'candidates_token_count', 0),
+            "total_tokens": getattr(usage_metadata, 'total_token_count', 0)
+        }
+    
     def _extract_tool_calls(self, response) -> List[MCPToolCall]:
         """Extract tool calls from Google response"""
         tool_calls = []
@@ -276,7 +581,7 @@ class OpenAIProvider(AIModelProvider):
         # Prepare request parameters
         request_params = {
             "model": self.config.model,
-            "messages": messages,
+            "messages": self._convert_messages(messages),
             "max_tokens": self.config.max_tokens,
             "temperature": self.config.temperature
         }
@@ -306,6 +611,99 @@ class OpenAIProvider(AIModelProvider):
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
     
+    async def stream_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream response deltas from OpenAI GPT"""
+        request_params = {
+            "model": self.config.model,
+            "messages": self._convert_messages(messages),
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if tools:
+            request_params["tools"] = [{"type": "function", "function": tool} for tool in tools]
+            request_params["tool_choice"] = "auto"
+        request_params.update(kwargs)
+        
+        content_parts = []
+        tool_calls = []
+        partial_calls: Dict[int, Dict[str, Any]] = {}
+        usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        model = self.config.model
+        stop_reason = None
+        
+        def finish_call(index: int) -> MCPToolCall:
+            partial = partial_calls.pop(index)
+            try:
+                parameters = json.loads("".join(partial["arguments"]) or "{}")
+            except json.JSONDecodeError:
+                parameters = {}
+            tool_call = MCPToolCall(
+                tool_name=partial["name"],
+                parameters=parameters,
+                call_id=partial["id"]
+            )
+            tool_calls.append(tool_call)
+            return tool_call
+        
+        try:
+            stream = await self.client.chat.completions.create(**request_params)
+            async for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage:
+                    usage = {
+                        "input_tokens": chunk.usage.prompt_tokens,
+                        "output_tokens": chunk.usage.completion_tokens,
+                        "total_tokens": chunk.usage.total_tokens
+                    }
+                if not chunk.choices:
+                    continue
+                
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield {"type": "text", "text": delta.content}
+                
+                for call_delta in delta.tool_calls or []:
+                    if call_delta.index not in partial_calls:
+                        # A new call index means every earlier call is complete
+                        for index in sorted(i for i in partial_calls if i < call_delta.index):
+                            yield {"type": "tool_call", "tool_call": finish_call(index)}
+                        partial_calls[call_delta.index] = {"id": call_delta.id, "name": "", "arguments": []}
+                    partial = partial_calls[call_delta.index]
+                    if call_delta.function:
+                        partial["name"] += call_delta.function.name or ""
+                        partial["arguments"].append(call_delta.function.arguments or "")
+                
+                if choice.finish_reason:
+                    stop_reason = choice.finish_reason
+                    for index in sorted(partial_calls):
+                        yield {"type": "tool_call", "tool_call": finish_call(index)}
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        
+        yield {
+            "type": "done",
+            "response": {
+                "content": "".join(content_parts),
+                "usage": usage,
+                "model": model,
+                "stop_reason": stop_reason,
+                "tool_calls": tool_calls
+            }
+        }
+    
+    @staticmethod
+    def _convert_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        # OpenAI caches long shared prefixes automatically; only the
+        # fields it accepts are passed through
+        return [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+    
     def _extract_tool_calls(self, message) -> List[MCPToolCall]:
         """Extract tool calls from OpenAI response"""
         tool_calls = []
@@ -330,6 +728,28 @@ class OpenAIProvider(AIModelProvider):
         return []  # OpenAI handles tool calls differently
 
 
+def _to_stored(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain-data form of a provider response, as kept in the response cache"""
+    stored = dict(response)
+    stored["tool_calls"] = [
+        call.model_dump() if hasattr(call, "model_dump") else call
+        for call in response.get("tool_calls") or []
+    ]
+    return stored
+
+
+def _is_cacheable(response: Dict[str, Any]) -> bool:
+    """Whether a response may be cached; an empty reply is usually transient and would be replayed on every retry"""
+    return bool((response.get("content") or "").strip() or response.get("tool_calls"))
+
+
+def _from_stored(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """A new response object built from its stored form"""
+    response = dict(stored)
+    response["tool_calls"] = [MCPToolCall(**call) for call in stored.get("tool_calls") or []]
+    return response
+
+
 class AIModelManager:
     """Manager for AI model providers"""
     
@@ -340,6 +760,21 @@ class AIModelManager:
             "google": GoogleProvider
         }
         self._instances: Dict[str, AIModelProvider] = {}
+        self.response_cache = ResponseCache(
+            database=db_manager,
+            max_entries=settings.llm_cache_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_temperature=settings.llm_cache_max_temperature,
+            enabled=settings.llm_cache_enabled
+        )
+        self.gateway = ProviderGateway(
+            limits=settings.llm_rate_limits,
+            max_retries=settings.llm_max_retries,
+            base_delay=settings.llm_retry_base_delay,
+            max_delay=settings.llm_retry_max_delay
+        )
+        self.usage_ledger = UsageLedger(database=db_manager)
+        self._default_config: Optional[ModelConfig] = None
     
     async def get_provider(self, config: ModelConfig) -> AIModelProvider:
         """Get or create an AI model provider instance"""
@@ -356,46 +791,246 @@ class AIModelManager:
         
         return self._instances[provider_key]
     
+    async def generate(
+        self,
+        provider: AIModelProvider,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Call provider.generate_response through the gateway.
+        
+        Repeated requests are answered from the response cache, and
+        identical cache-eligible requests in flight share one call.
+        """
+        config = provider.config
+        if not use_cache or not self.response_cache.is_eligible(config.temperature, kwargs.get("stream", False)):
+            return await self._gateway_call(provider, messages, tools, kwargs)
+        
+        key = make_cache_key(
+            config.provider, config.model, config.temperature, config.max_tokens,
+            messages, tools, kwargs
+        )
+        cached = await self.response_cache.get(key)
+        if cached is not None:
+            response = _from_stored(cached)
+            response["cached"] = True
+            return response
+        
+        async def generate_and_store() -> Dict[str, Any]:
+            # Runs once per coalesced group: one provider call, one cache write
+            response = await provider.generate_response(messages, tools, **kwargs)
+            stored = _to_stored(response)
+            if _is_cacheable(stored):
+                await self.response_cache.put(key, stored, config.provider, config.model)
+            return stored
+        
+        stored = await self.gateway.call(
+            f"{config.provider}:{config.model}",
+            generate_and_store,
+            estimated_tokens=self._estimate_request_tokens(messages, config),
+            coalesce_key=key,
+            actual_tokens=lambda response: (response.get("usage") or {}).get("total_tokens")
+        )
+        # Every coalesced caller gets its own response object
+        return _from_stored(stored)
+    
+    async def _gateway_call(
+        self,
+        provider: AIModelProvider,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        config = provider.config
+        return await self.gateway.call(
+            f"{config.provider}:{config.model}",
+            lambda: provider.generate_response(messages, tools, **kwargs),
+            estimated_tokens=self._estimate_request_tokens(messages, config),
+            actual_tokens=lambda response: (response.get("usage") or {}).get("total_tokens")
+        )
+    
+    @staticmethod
+    def _estimate_request_tokens(messages: List[Dict[str, Any]], config: ModelConfig) -> int:
+        """Prompt estimate plus the output allowance, settled against real usage later"""
+        prompt_tokens = sum(estimate_tokens(str(msg.get("content", ""))) for msg in messages)
+        return prompt_tokens + (config.max_tokens or settings.default_max_tokens)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit-rate metrics"""
+        return self.response_cache.get_stats()
+    
+    def get_gateway_stats(self) -> Dict[str, Any]:
+        """Get rate-limit, retry and coalescing metrics"""
+        return self.gateway.get_statistics()
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Get token, latency and cost totals"""
+        return self.usage_ledger.get_stats()
+    
     def register_provider(self, name: str, provider_class: type):
         """Register a new AI model provider"""
         self._providers[name] = provider_class
     
-    async def get_response(self, prompt: str, model_config: Optional[ModelConfig] = None) -> 'AIResponse':
-        """Get a response from the AI model"""
-        from dataclasses import dataclass
-        from typing import List
-        
-        @dataclass
-        class AIResponse:
-            content: str
-            tool_calls: List[MCPToolCall] = None
+    async def get_response(
+        self,
+        prompt: Union[str, List[Dict[str, Any]]],
+        model_config: Optional[ModelConfig] = None,
+        usage_context: Optional[UsageContext] = None
+    ) -> AIResponse:
+        """
+        Get a response from the AI model for a prompt string or message list.
         
+        The call's tokens, latency and cost are recorded against
+        usage_context (task, tree and agent).
+        """
         # Use default config if none provided
-        if model_config is None:
-            model_config = ModelConfig(
-                provider="anthropic",
-                model="claude-3-sonnet-20240229"
-            )
+        model_config = self.resolve_model_config(model_config)
         
         # Get provider
         provider = await self.get_provider(model_config)
         
         # Prepare messages
-        messages = [{"role": "user", "content": prompt}]
+        messages = self._prompt_messages(prompt)
         
-        # Generate response
-        response = await provider.generate_response(messages)
+        # Generate response (identical requests are served from the cache)
+        started = time.perf_counter()
+        response = await self.generate(provider, messages)
+        record = await self.usage_ledger.record(
+            usage_context, model_config.provider, model_config.model, response.get("usage"),
+            time.perf_counter() - started, cached=response.get("cached", False)
+        )
         
         # Parse tool calls
         tool_calls = provider.parse_tool_calls(response.get("content", ""))
         
         return AIResponse(
             content=response.get("content", ""),
-            tool_calls=tool_calls
+            tool_calls=tool_calls,
+            usage=response.get("usage"),
+            cached=response.get("cached", False),
+            usage_record=record
+        )
+    
+    async def stream_response(
+        self,
+        prompt: Union[str, List[Dict[str, Any]]],
+        model_config: Optional[ModelConfig] = None,
+        usage_context: Optional[UsageContext] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a response from the AI model.
+        
+        Yields text and tool_call deltas as they arrive (tool calls written
+        as <tool_call> blocks are detected as soon as each block closes),
+        then {"type": "done", "response": AIResponse}. Cache hits are
+        replayed as a single text delta. Usage is recorded against
+        usage_context as in get_response.
+        """
+        model_config = self.resolve_model_config(model_config)
+        started = time.perf_counter()
+        
+        provider = await self.get_provider(model_config)
+        messages = self._prompt_messages(prompt)
+        config = provider.config
+        
+        key = None
+        if self.response_cache.is_eligible(config.temperature):
+            key = make_cache_key(
+                config.provider, config.model, config.temperature, config.max_tokens,
+                messages, None, {}
+            )
+            cached = await self.response_cache.get(key)
+            if cached is not None:
+                content = cached.get("content", "")
+                if content:
+                    yield {"type": "text", "text": content}
+                tool_calls = provider.parse_tool_calls(content)
+                for tool_call in tool_calls:
+                    yield {"type": "tool_call", "tool_call": tool_call}
+                record = await self.usage_ledger.record(
+                    usage_context, config.provider, config.model, cached.get("usage"),
+                    time.perf_counter() - started, cached=True, streamed=True
+                )
+                yield {
+                    "type": "done",
+                    "response": AIResponse(content, tool_calls, cached.get("usage"), cached=True, usage_record=record)
+                }
+                return
+        
+        parser = ToolCallStreamParser(provider.parse_tool_calls)
+        tool_calls: List[MCPToolCall] = []
+        response: Dict[str, Any] = {}
+        
+        stream = self.gateway.stream(
+            f"{config.provider}:{config.model}",
+            lambda: provider.stream_response(messages),
+            estimated_tokens=self._estimate_request_tokens(messages, config),
+            actual_tokens=lambda delta: (
+                (delta["response"].get("usage") or {}).get("total_tokens")
+                if delta["type"] == "done" else None
+            )
         )
+        async for delta in stream:
+            if delta["type"] == "text":
+                yield delta
+                for tool_call in parser.feed(delta["text"]):
+                    tool_calls.append(tool_call)
+                    yield {"type": "tool_call", "tool_call": tool_call}
+            elif delta["type"] == "tool_call":
+                tool_calls.append(delta["tool_call"])
+                yield delta
+            elif delta["type"] == "done":
+                response = delta["response"]
+        
+        if key is not None and (tool_calls or _is_cacheable(response)):
+            await self.response_cache.put(key, _to_stored(response), config.provider, config.model)
+        
+        record = await self.usage_ledger.record(
+            usage_context, config.provider, config.model, response.get("usage"),
+            time.perf_counter() - started, streamed=True
+        )
+        yield {
+            "type": "done",
+            "response": AIResponse(
+                content=response.get("content", ""),
+                tool_calls=tool_calls,
+                usage=response.get("usage"),
+                usage_record=record
+            )
+        }
+    
+    def resolve_model_config(self, model_config: Optional[ModelConfig] = None) -> ModelConfig:
+        """The config a call will use: the given one, or the default"""
+        if model_config is None:
+            return self._default_model_config()
+        return model_config
+    
+    def set_default_model_config(self, model_config: Optional[ModelConfig]):
+        """Use model_config for calls that do not name one (None restores the built-in default)"""
+        self._default_config = model_config
+    
+    def _default_model_config(self) -> ModelConfig:
+        if self._default_config is not None:
+            return self._default_config
+        return ModelConfig(
+            provider=settings.default_model_provider,
+            model=settings.default_model_name,
+            temperature=settings.default_temperature,
+            max_tokens=settings.default_max_tokens
+        )
+    
+    @staticmethod
+    def _prompt_messages(prompt: Union[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+        return list(prompt)
     
     async def close_all(self):
         """Close all provider connections"""
+        await self.usage_ledger.flush()
         for provider in self._instances.values():
             if hasattr(provider, 'close'):
                 await provider.close()
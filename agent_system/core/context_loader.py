@@ -0,0 +1,295 @@
+"""
+Agent execution context loading.
+
+Builds the AgentExecutionContext for a task in as few database round trips
+as possible:
+
+1. The task row and its message history are read concurrently.
+2. The agent definition comes from the definition cache, or one query.
+3. Missing context documents and tools (agent defaults plus the task's
+   additional_context/additional_tools) are read with one IN query each,
+   concurrently with the MCP permission lookup.
+
+Agent, tool and document definitions rarely change, so they are cached as
+ready-made model objects. The caches take part in the entity_cache
+invalidation hub: any write through EntityManager or the repositories
+drops the stale definition, and the TTL bounds anything written elsewhere.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database_manager import database
+from .entity_cache import EntityCache
+from .models import (
+    Task, Agent, ContextDocument, Tool, Message, AgentExecutionContext
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_AGENT_NAME = "agent_selector"
+
+
+def _json_field(value: Any, default: Any) -> Any:
+    """Decode a JSON column, tolerating values that are already decoded."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except (TypeError, ValueError):
+            return default
+    return value
+
+
+class AgentContextLoader:
+    """Loads agent execution contexts with cached agent/tool/document definitions."""
+
+    def __init__(self, max_definitions: int = 2000, ttl_seconds: float = 300.0):
+        self.definitions = EntityCache(
+            max_entries=max_definitions,
+            max_memory_bytes=32 * 1024 * 1024,
+            default_ttl_seconds=ttl_seconds
+        )
+        # (kind, name) -> id, so name lookups can hit the id-keyed cache
+        self._names: Dict[Tuple[str, str], Any] = {}
+        self.stats = {
+            "loads": 0,
+            "queries": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0
+        }
+
+    async def load(self, task_id: int, tool_system: Any = None) -> Tuple[AgentExecutionContext, Dict[str, Any]]:
+        """
+        Build the execution context for a task.
+
+        Returns the context and the raw task row. Raises ValueError when
+        the task or its agent does not exist.
+        """
+        started = time.perf_counter()
+        queries = 0
+
+        task, message_history = await asyncio.gather(
+            database.tasks.get_by_id(str(task_id)),
+            database.messages.get_by_task_id(str(task_id))
+        )
+        queries += 2
+        if not task:
+            raise ValueError(f"Task {task_id} not found")
+
+        metadata = _json_field(task.get("metadata"), {})
+
+        agent, agent_queries = await self._load_agent(task, metadata)
+        queries += agent_queries
+        if not agent:
+            raise ValueError(f"Agent for task {task_id} not found")
+
+        document_names = self._merge_names(agent.context_documents, metadata.get("additional_context"))
+        tool_names = self._merge_names(agent.available_tools, metadata.get("additional_tools"))
+        agent_type = metadata.get("agent_type", agent.name or "neutral_task_agent")
+
+        (documents, doc_queries), (tools, tool_queries), mcp_tools = await asyncio.gather(
+            self._load_definitions("document", document_names),
+            self._load_definitions("tool", tool_names),
+            self._load_mcp_tools(tool_system, agent_type, task_id)
+        )
+        queries += doc_queries + tool_queries
+
+        task_obj = Task(
+            id=task.get("id"),
+            parent_task_id=task.get("parent_task_id"),
+            tree_id=task.get("tree_id"),
+            agent_id=task.get("agent_id"),
+            instruction=task.get("instruction") or "",
+            status=task.get("status") or "created",
+            result=_json_field(task.get("result"), {}),
+            metadata=metadata,
+            created_at=task.get("created_at"),
+            updated_at=task.get("updated_at")
+        )
+
+        messages = [
+            Message(
+                id=msg.get("id"),
+                task_id=msg.get("task_id"),
+                message_type=msg.get("message_type") or "agent_response",
+                content=msg.get("content") or "",
+                metadata=_json_field(msg.get("metadata"), {}),
+                timestamp=msg.get("timestamp")
+            ).model_dump()
+            for msg in message_history
+        ]
+
+        context = AgentExecutionContext(
+            task=task_obj,
+            agent=agent,
+            context_documents=documents,
+            available_tools=tools + mcp_tools,
+            execution_metadata={"message_history": messages}
+        )
+
+        elapsed = time.perf_counter() - started
+        self.stats["loads"] += 1
+        self.stats["queries"] += queries
+        self.stats["total_seconds"] += elapsed
+        self.stats["max_seconds"] = max(self.stats["max_seconds"], elapsed)
+        return context, task
+
+    async def load_agent(self, task: Dict[str, Any]) -> Tuple[Optional[Agent], Dict[str, Any]]:
+        """The agent a task row runs with, as load() resolves it, and the task's metadata."""
+        metadata = _json_field(task.get("metadata"), {})
+        agent, _ = await self._load_agent(task, metadata)
+        return agent, metadata
+
+    # Definitions
+
+    async def _load_agent(self, task: Dict[str, Any], metadata: Dict[str, Any]) -> Tuple[Optional[Agent], int]:
+        queries = 0
+        agent_id = task.get("agent_id")
+        if agent_id:
+            agent = self.definitions.get("agent", agent_id)
+            if agent is None:
+                row = await database.agents.get_by_id(str(agent_id))
+                queries += 1
+                agent = self._remember("agent", row) if row else None
+            if agent:
+                return agent, queries
+
+        # Fall back to the assigned agent name, then the agent selector
+        agent_name = metadata.get("assigned_agent") or DEFAULT_AGENT_NAME
+        agent = self._cached_by_name("agent", agent_name)
+        if agent is None:
+            row = await database.agents.get_by_name(agent_name)
+            queries += 1
+            agent = self._remember("agent", row) if row else None
+        return agent, queries
+
+    async def _load_definitions(self, kind: str, names: List[str]) -> Tuple[List[Any], int]:
+        """Resolve names to cached definitions, querying only the misses."""
+        if not names:
+            return [], 0
+
+        found: Dict[str, Any] = {}
+        missing = []
+        for name in names:
+            definition = self._cached_by_name(kind, name)
+            if definition is None:
+                missing.append(name)
+            else:
+                found[name] = definition
+
+        queries = 0
+        if missing:
+            repository = database.context_documents if kind == "document" else database.tools
+            rows = await repository.get_by_names(missing)
+            queries = 1
+            for row in rows:
+                definition = self._remember(kind, row)
+                if definition is not None:
+                    found[definition.name] = definition
+
+        # Keep the requested order; unknown names are skipped
+        return [found[name] for name in names if name in found], queries
+
+    def _cached_by_name(self, kind: str, name: str) -> Optional[Any]:
+        entity_id = self._names.get((kind, name))
+        if entity_id is None:
+            return None
+        definition = self.definitions.get(kind, entity_id)
+        if definition is None or definition.name != name:
+            self._names.pop((kind, name), None)
+            return None
+        return definition
+
+    def _remember(self, kind: str, row: Dict[str, Any]) -> Optional[Any]:
+        try:
+            definition = self._build(kind, row)
+        except Exception as e:
+            logger.warning(f"Skipping invalid {kind} definition {row.get('name')}: {e}")
+            return None
+        if definition.id is not None:
+            self.definitions.put(kind, definition.id, definition)
+            self._names[(kind, definition.name)] = definition.id
+        return definition
+
+    def _build(self, kind: str, row: Dict[str, Any]) -> Any:
+        if kind == "agent":
+            return Agent(
+                id=row.get("id"),
+                name=row.get("name") or "",
+                instruction=row.get("instruction") or "",
+                context_documents=_json_field(row.get("context_documents"), []),
+                available_tools=_json_field(row.get("available_tools"), []),
+                permissions=_json_field(row.get("permissions"), []),
+                constraints=_json_field(row.get("constraints"), []),
+                metadata=_json_field(row.get("metadata"), {}),
+                created_at=row.get("created_at"),
+                updated_at=row.get("updated_at")
+            )
+        if kind == "document":
+            return ContextDocument(
+                id=row.get("id"),
+                name=row.get("name") or "",
+                title=row.get("title") or "",
+                category=row.get("category") or "system",
+                content=row.get("content") or "",
+                format=row.get("format") or "markdown",
+                version=str(row.get("version") or "1.0.0"),
+                created_at=row.get("created_at"),
+                updated_at=row.get("updated_at")
+            )
+        return Tool(
+            id=row.get("id"),
+            name=row.get("name") or "",
+            description=row.get("description") or "",
+            category=row.get("category") or "system",
+            implementation=row.get("implementation") or row.get("function_name") or row.get("name") or "",
+            parameters=_json_field(row.get("parameters"), {}),
+            permissions=_json_field(row.get("permissions"), []),
+            created_at=row.get("created_at"),
+            updated_at=row.get("updated_at")
+        )
+
+    async def _load_mcp_tools(self, tool_system: Any, agent_type: str, task_id: int) -> List[Tool]:
+        if not tool_system:
+            return []
+        tool_names = await tool_system.get_agent_tools(agent_type, task_id)
+        # Pseudo-tool objects for MCP servers
+        return [
+            Tool(
+                id=0,
+                name=tool_name,
+                description=f"MCP Server: {tool_name} - Access to {tool_name} operations",
+                implementation="mcp",
+                parameters={}
+            )
+            for tool_name in tool_names
+        ]
+
+    @staticmethod
+    def _merge_names(*groups: Any) -> List[str]:
+        names: List[str] = []
+        for group in groups:
+            for name in _json_field(group, []) or []:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def get_statistics(self) -> Dict[str, Any]:
+        loads = self.stats["loads"]
+        return {
+            **self.stats,
+            "avg_seconds": self.stats["total_seconds"] / loads if loads else 0.0,
+            "avg_queries": self.stats["queries"] / loads if loads else 0.0,
+            "definition_cache": self.definitions.get_stats()
+        }
+
+
+# Global context loader instance
+context_loader = AgentContextLoader()
@@ -5,8 +5,21 @@ Provides centralized database access and repository pattern implementation.
 
 from typing import List, Optional, Dict, Any
 import json
+import time
+from pathlib import Path
 from datetime import datetime
 from config.database import db_manager
+from .entity_cache import invalidate_entity
+from .runtime.task_notifications import task_notifier
+
+
+# Task statuses that mark a tree as running / as having finished work
+RUNNING_TREE_STATUSES = ("running", "agent_responding", "waiting_on_dependencies")
+FINISHED_TREE_STATUSES = ("completed", "failed")
+
+# Materialized per-tree summary (migration 020), kept current by triggers
+TREE_SUMMARY_TABLE = "task_tree_summary"
+TREE_SUMMARY_MIGRATION = Path(__file__).parent.parent / "database" / "migrations" / "020_add_task_tree_summary.sql"
 
 
 class AgentRepository:
@@ -37,12 +50,17 @@ class AgentRepository:
         query = f"INSERT INTO agents ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
         values = [kwargs[col] for col in columns]
         await db_manager.execute_command(query, values)
+        invalidate_entity("agent", kwargs.get('id'))
         return kwargs.get('id')
 
 
 class TaskRepository:
     """Repository for task-related database operations"""
     
+    def __init__(self):
+        self._summary_available = False
+        self._summary_checked_at = 0.0
+    
     async def get_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task by ID"""
         query = "SELECT * FROM tasks WHERE id = ?"
@@ -55,6 +73,21 @@ class TaskRepository:
         results = await db_manager.execute_query(query, (tree_id,))
         return results if results else []
     
+    async def get_depth(self, task_id: str) -> int:
+        """Number of ancestors above a task (0 for a root)"""
+        query = """
+            WITH RECURSIVE ancestors(id, parent_task_id, depth) AS (
+                SELECT id, parent_task_id, 0 FROM tasks WHERE id = ?
+                UNION ALL
+                SELECT t.id, t.parent_task_id, a.depth + 1
+                FROM tasks t JOIN ancestors a ON t.id = a.parent_task_id
+                WHERE a.depth < 50
+            )
+            SELECT MAX(depth) AS depth FROM ancestors
+        """
+        results = await db_manager.execute_query(query, (task_id,))
+        return (results[0]["depth"] or 0) if results else 0
+    
     async def create(self, **kwargs) -> str:
         """Create a new task"""
         # Handle JSON serialization for context and metadata
@@ -70,10 +103,13 @@ class TaskRepository:
         query = f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
         values = [kwargs[col] for col in columns]
         await db_manager.execute_command(query, values)
+        invalidate_entity("task", kwargs.get('id'))
         return kwargs.get('id')
     
     async def update(self, task_id: str, **kwargs) -> None:
         """Update a task"""
+        result = kwargs.get('result')
+        
         # Handle JSON serialization
         if 'context' in kwargs and isinstance(kwargs['context'], dict):
             kwargs['context'] = json.dumps(kwargs['context'])
@@ -86,6 +122,15 @@ class TaskRepository:
         query = f"UPDATE tasks SET {', '.join(set_clauses)} WHERE id = ?"
         values = list(kwargs.values()) + [task_id]
         await db_manager.execute_command(query, values)
+        invalidate_entity("task", task_id)
+        
+        if 'status' in kwargs:
+            task_notifier.notify(
+                task_id,
+                kwargs['status'],
+                result=result if isinstance(result, dict) else None,
+                error=kwargs.get('error')
+            )
     
     async def get_pending_tasks(self) -> List[Dict[str, Any]]:
         """Get all pending tasks"""
@@ -99,6 +144,113 @@ class TaskRepository:
         results = await db_manager.execute_query(query)
         return results if results else []
     
+    async def get_tree_summaries(self, limit: int = 50, before_tree_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        One page of task trees, newest first, with per-tree aggregates.
+        
+        Keyset pagination on the root task id: pass the last tree_id of a
+        page as before_tree_id to get the next one.
+        """
+        if await self._has_tree_summary():
+            where = "WHERE root_task_id IS NOT NULL"
+            params: tuple = ()
+            if before_tree_id is not None:
+                where += " AND tree_id < ?"
+                params = (before_tree_id,)
+            query = f"SELECT * FROM {TREE_SUMMARY_TABLE} {where} ORDER BY tree_id DESC LIMIT ?"
+            results = await db_manager.execute_query(query, params + (limit,))
+            return [_tree_summary(row) for row in results]
+        
+        # Without migration 020: aggregate the page's trees in one grouped query
+        where = "WHERE parent_task_id IS NULL"
+        params = ()
+        if before_tree_id is not None:
+            where += " AND id < ?"
+            params = (before_tree_id,)
+        running = ",".join(["?" for _ in RUNNING_TREE_STATUSES])
+        finished = ",".join(["?" for _ in FINISHED_TREE_STATUSES])
+        query = f"""
+            WITH page AS (
+                SELECT id, COALESCE(tree_id, id) AS tree_id, status, instruction
+                FROM tasks
+                {where}
+                ORDER BY id DESC
+                LIMIT ?
+            )
+            SELECT page.tree_id AS tree_id,
+                   page.id AS root_task_id,
+                   page.status AS root_status,
+                   page.instruction AS root_instruction,
+                   COUNT(t.id) AS task_count,
+                   COALESCE(MAX(t.status IN ({running})), 0) AS has_running_tasks,
+                   COALESCE(MAX(t.status IN ({finished})), 0) AS has_completed_tasks
+            FROM page
+            LEFT JOIN tasks t ON t.tree_id = page.tree_id
+            GROUP BY page.id
+            ORDER BY page.id DESC
+        """
+        params += (limit,) + RUNNING_TREE_STATUSES + FINISHED_TREE_STATUSES
+        results = await db_manager.execute_query(query, params)
+        return [_tree_summary(row) for row in results]
+    
+    async def get_tree_summary(self, tree_id: int) -> Optional[Dict[str, Any]]:
+        """Counts and root details for one tree"""
+        summaries = await self.get_tree_summaries_for([tree_id])
+        return summaries.get(int(tree_id))
+    
+    async def get_tree_summaries_for(self, tree_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Summaries of the given trees, keyed by tree_id"""
+        tree_ids = [int(tree_id) for tree_id in tree_ids]
+        if not tree_ids:
+            return {}
+        placeholders = ",".join(["?" for _ in tree_ids])
+        
+        if await self._has_tree_summary():
+            query = f"SELECT * FROM {TREE_SUMMARY_TABLE} WHERE tree_id IN ({placeholders})"
+            results = await db_manager.execute_query(query, tuple(tree_ids))
+            return {row["tree_id"]: _tree_summary(row) for row in results}
+        
+        # Without migration 020: count statuses per tree, then attach the roots
+        query = f"""
+            SELECT tree_id, COALESCE(status, 'created') AS status, COUNT(*) AS tasks_in_status
+            FROM tasks WHERE tree_id IN ({placeholders})
+            GROUP BY tree_id, status
+        """
+        summaries: Dict[int, Dict[str, Any]] = {}
+        for row in await db_manager.execute_query(query, tuple(tree_ids)):
+            summary = summaries.setdefault(row["tree_id"], {"tree_id": row["tree_id"], "status_counts": {}})
+            summary["status_counts"][row["status"]] = row["tasks_in_status"]
+        query = f"SELECT id, instruction, status FROM tasks WHERE id IN ({placeholders}) AND parent_task_id IS NULL"
+        for root in await db_manager.execute_query(query, tuple(tree_ids)):
+            if root["id"] in summaries:
+                summaries[root["id"]].update(
+                    root_task_id=root["id"], root_instruction=root["instruction"], root_status=root["status"]
+                )
+        return {tree_id: _tree_summary(summary) for tree_id, summary in summaries.items()}
+    
+    async def rebuild_tree_summaries(self) -> int:
+        """
+        Recompute task_tree_summary and task_depth from the tasks table.
+        
+        Re-runs migration 020, which creates the tables and triggers when
+        missing and ends with the backfill. Returns the number of trees.
+        """
+        async with db_manager.get_connection() as conn:
+            await conn.executescript(TREE_SUMMARY_MIGRATION.read_text())
+            await conn.commit()
+        self._summary_checked_at = 0.0
+        results = await db_manager.execute_query(f"SELECT COUNT(*) AS trees FROM {TREE_SUMMARY_TABLE}")
+        return results[0]["trees"] if results else 0
+    
+    async def get_by_tree_ids(self, tree_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get all tasks in several trees"""
+        if not tree_ids:
+            return []
+        placeholders = ",".join(["?" for _ in tree_ids])
+        query = f"SELECT * FROM tasks WHERE tree_id IN ({placeholders}) ORDER BY id"
+        results = await db_manager.execute_query(query, tuple(tree_ids))
+        return results if results else []
+    
     async def get_active_tasks(self) -> List[Dict[str, Any]]:
         """Get all active tasks (running, queued, created)"""
         query = "SELECT * FROM tasks WHERE status IN ('running', 'queued', 'created') ORDER BY id DESC"
@@ -106,6 +258,40 @@ class TaskRepository:
         return results if results else []
 
 
+    async def _has_tree_summary(self) -> bool:
+        # Re-checked once a minute so applying migration 020 later switches reads over
+        if self._summary_available or time.time() - self._summary_checked_at < 60:
+            return self._summary_available
+        self._summary_checked_at = time.time()
+        try:
+            results = await db_manager.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TREE_SUMMARY_TABLE,)
+            )
+            self._summary_available = bool(results)
+        except Exception:
+            self._summary_available = False
+        return self._summary_available
+
+
+def _tree_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A tree summary with decoded status counts and the running / finished flags"""
+    summary = dict(row)
+    counts = summary.get("status_counts") or {}
+    if isinstance(counts, str):
+        counts = json.loads(counts)
+    counts = {status: count for status, count in counts.items() if count}
+    summary["status_counts"] = counts
+    summary.setdefault("task_count", sum(counts.values()))
+    if counts or "has_running_tasks" not in summary:
+        summary["has_running_tasks"] = any(counts.get(status) for status in RUNNING_TREE_STATUSES)
+        summary["has_completed_tasks"] = any(counts.get(status) for status in FINISHED_TREE_STATUSES)
+    summary["has_running_tasks"] = bool(summary["has_running_tasks"])
+    summary["has_completed_tasks"] = bool(summary["has_completed_tasks"])
+    for key in ("root_task_id", "root_instruction", "root_status", "max_depth", "created_at", "last_activity_at"):
+        summary.setdefault(key, None)
+    return summary
+
+
 class MessageRepository:
     """Repository for message-related database operations"""
     
@@ -122,11 +308,67 @@ class MessageRepository:
         await db_manager.execute_command(query, values)
         return kwargs.get('id')
     
+    async def create_many(self, messages: List[Dict[str, Any]]) -> int:
+        """Create several messages with the same columns in one transaction"""
+        if not messages:
+            return 0
+        
+        columns = list(messages[0].keys())
+        placeholders = ["?" for _ in columns]
+        query = f"INSERT INTO messages ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
+        rows = []
+        for message in messages:
+            values = []
+            for col in columns:
+                value = message.get(col)
+                if col == 'metadata' and isinstance(value, dict):
+                    value = json.dumps(value)
+                values.append(value)
+            rows.append(values)
+        
+        async with db_manager.get_connection() as conn:
+            await conn.executemany(query, rows)
+            await conn.commit()
+        return len(rows)
+    
     async def get_by_task_id(self, task_id: str) -> List[Dict[str, Any]]:
         """Get all messages for a task"""
         query = "SELECT * FROM messages WHERE task_id = ? ORDER BY timestamp"
         results = await db_manager.execute_query(query, (task_id,))
         return results if results else []
+    
+    async def get_tree_timeline(
+        self,
+        tree_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the messages of a task tree with their agent names, oldest first.
+        
+        Pages (limit set) are in id order so a page's largest id is a safe
+        cursor: buffered messages are timestamped when built but numbered
+        when flushed, so timestamp order can put a smaller id after the page.
+        """
+        where = "WHERE t.tree_id = ?"
+        params: tuple = (tree_id,)
+        if after_id is not None:
+            where += " AND m.id > ?"
+            params += (after_id,)
+        query = f"""
+            SELECT m.id, m.task_id, m.message_type, m.content, m.metadata, m.timestamp,
+                   a.name AS agent_name
+            FROM tasks t
+            JOIN messages m ON m.task_id = t.id
+            LEFT JOIN agents a ON a.id = t.agent_id
+            {where}
+            ORDER BY {"m.id" if limit is not None else "m.timestamp, m.id"}
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        results = await db_manager.execute_query(query, params)
+        return results if results else []
 
 
 class ToolRepository:
@@ -166,6 +408,7 @@ class ToolRepository:
         query = f"INSERT INTO tools ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
         values = [kwargs[col] for col in columns]
         await db_manager.execute_command(query, values)
+        invalidate_entity("tool", kwargs.get('id'))
         return kwargs.get('id')
 
 
@@ -206,6 +449,7 @@ class ContextDocumentRepository:
         query = f"INSERT INTO context_documents ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
         values = [kwargs[col] for col in columns]
         await db_manager.execute_command(query, values)
+        invalidate_entity("document", kwargs.get('id'))
         return kwargs.get('id')
 
 
@@ -239,6 +483,7 @@ class EventRepository:
         query = f"INSERT INTO events ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
         values = [kwargs[col] for col in columns]
         await db_manager.execute_command(query, values)
+        invalidate_entity("event", kwargs.get('id'))
         return kwargs.get('id')
 
 
@@ -1,11 +1,14 @@
 """Entity Manager for CRUD operations on all entity types."""
 
 import asyncio
-from typing import Dict, List, Optional, Any, Type, Union
+from typing import Dict, List, Optional, Any, Tuple, Type, Union
 from datetime import datetime
 import json
-import aiosqlite
+import re
+import time
 
+from config.connection_pool import get_connection_pool
+from config.settings import settings
 from .base import Entity, EntityState
 from .agent_entity import AgentEntity
 from .task_entity import TaskEntity, TaskState
@@ -15,6 +18,13 @@ from .process_entity import ProcessEntity, ProcessType
 from .event_entity import EventEntity
 from ..events.event_types import EntityType, EventType
 from ..events.event_manager import EventManager
+from ..entity_cache import EntityCache, invalidate_entity
+from ..entity_search import SEARCH_TABLE, INDEX_EXISTS_QUERY, build_search_query
+from ..runtime.task_notifications import task_notifier, is_terminal
+
+
+# Keys allowed after "metadata." in list/search filters
+_METADATA_KEY_RE = re.compile(r"\w+")
 
 
 class EntityManager:
@@ -24,6 +34,9 @@ class EntityManager:
         self.db_path = db_path
         self.event_manager = event_manager
         
+        # Shared long-lived connections (one writer, N readers)
+        self.pool = get_connection_pool(db_path)
+        
         # Entity type mapping
         self.entity_classes: Dict[EntityType, Type[Entity]] = {
             EntityType.AGENT: AgentEntity,
@@ -34,13 +47,19 @@ class EntityManager:
             EntityType.EVENT: EventEntity
         }
         
-        # Cache for frequently accessed entities
-        self.cache: Dict[str, Entity] = {}
-        self.cache_size = 100
-    
-    def _get_cache_key(self, entity_type: EntityType, entity_id: int) -> str:
-        """Generate cache key for an entity."""
-        return f"{entity_type.value}:{entity_id}"
+        # Bounded LRU/TTL cache for frequently accessed entities
+        self.cache = EntityCache(
+            max_entries=settings.entity_cache_max_entries,
+            max_memory_bytes=settings.entity_cache_max_memory_mb * 1024 * 1024,
+            ttl_seconds=settings.entity_cache_ttl_seconds
+        )
+        
+        # Whether the FTS index (migration 016) exists, and when that was last checked
+        self._search_index_available = False
+        self._search_index_checked_at = 0.0
+        
+        # Column names per table, for validating list/search filters
+        self._table_columns: Dict[str, set] = {}
     
     async def create_entity(
         self,
@@ -49,7 +68,7 @@ class EntityManager:
         **kwargs
     ) -> Entity:
         """Create a new entity of the specified type."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             # Begin transaction
             await db.execute("BEGIN")
             
@@ -87,35 +106,35 @@ class EntityManager:
                 
                 await db.commit()
                 
-                # Create entity instance
-                entity_class = self.entity_classes[entity_type]
-                entity = entity_class(
-                    entity_id=entity_id,
-                    name=name,
-                    **kwargs
-                )
-                
-                # Set event manager
-                entity.event_manager = self.event_manager
-                
-                # Log creation event
-                if self.event_manager:
-                    await self.event_manager.log_event(
-                        EventType.ENTITY_CREATED,
-                        entity_type,
-                        entity_id,
-                        event_data={"name": name}
-                    )
-                
-                # Cache the entity
-                cache_key = self._get_cache_key(entity_type, entity_id)
-                self.cache[cache_key] = entity
-                
-                return entity
-                
             except Exception as e:
                 await db.rollback()
                 raise e
+        
+        # Create entity instance
+        entity_class = self.entity_classes[entity_type]
+        entity = entity_class(
+            entity_id=entity_id,
+            name=name,
+            **kwargs
+        )
+        
+        # Set event manager
+        entity.event_manager = self.event_manager
+        
+        # Log creation event (after releasing the writer, since event
+        # flushes write through the same pool)
+        if self.event_manager:
+            await self.event_manager.log_event(
+                EventType.ENTITY_CREATED,
+                entity_type,
+                entity_id,
+                event_data={"name": name}
+            )
+        
+        # Cache the entity
+        self.cache.put(entity_type, entity_id, entity)
+        
+        return entity
     
     async def get_entity(
         self,
@@ -124,13 +143,11 @@ class EntityManager:
     ) -> Optional[Entity]:
         """Retrieve an entity by type and ID."""
         # Check cache first
-        cache_key = self._get_cache_key(entity_type, entity_id)
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cached = self.cache.get(entity_type, entity_id)
+        if cached:
+            return cached
         
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
+        async with self.pool.reader() as db:
             # Get from entities table
             cursor = await db.execute("""
                 SELECT * FROM entities 
@@ -146,24 +163,54 @@ class EntityManager:
             if not type_data:
                 return None
             
-            # Merge data
-            entity_data = dict(entity_row)
-            entity_data.update(type_data)
-            entity_data['metadata'] = json.loads(entity_data.get('metadata', '{}'))
-            
             # Get relationships
             relationships = await self._get_entity_relationships(db, entity_type, entity_id)
-            entity_data['relationships'] = relationships
-            
-            # Create entity instance
-            entity_class = self.entity_classes[entity_type]
-            entity = await entity_class.from_dict(entity_data)
-            entity.event_manager = self.event_manager
-            
-            # Cache it
-            self.cache[cache_key] = entity
+        
+        entity = await self._build_entity(entity_type, entity_row, type_data, relationships)
+        
+        # Cache it
+        self.cache.put(entity_type, entity_id, entity)
+        
+        return entity
+    
+    async def get_entities(
+        self,
+        entity_type: EntityType,
+        entity_ids: List[int]
+    ) -> List[Entity]:
+        """
+        Retrieve several entities of one type in a constant number of queries.
+        
+        Results keep the order of entity_ids; missing ids are skipped.
+        """
+        entities: Dict[int, Entity] = {}
+        missing = []
+        for entity_id in entity_ids:
+            cached = self.cache.get(entity_type, entity_id)
+            if cached:
+                entities[entity_id] = cached
+            elif entity_id not in missing:
+                missing.append(entity_id)
+        
+        if missing:
+            async with self.pool.reader() as db:
+                entity_rows = {}
+                for chunk in self._chunks(missing):
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = await db.execute(f"""
+                        SELECT * FROM entities
+                        WHERE entity_type = ? AND entity_id IN ({placeholders})
+                    """, [entity_type.value, *chunk])
+                    for row in await cursor.fetchall():
+                        entity_rows[row['entity_id']] = row
+                
+                loaded = await self._hydrate(db, entity_type, list(entity_rows.values()))
             
-            return entity
+            for entity in loaded:
+                self.cache.put(entity_type, entity.entity_id, entity)
+                entities[entity.entity_id] = entity
+        
+        return [entities[entity_id] for entity_id in entity_ids if entity_id in entities]
     
     async def update_entity(
         self,
@@ -171,7 +218,7 @@ class EntityManager:
         **updates
     ) -> bool:
         """Update an entity with new values."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("BEGIN")
             
             try:
@@ -204,30 +251,39 @@ class EntityManager:
                 
                 await db.commit()
                 
-                # Update entity object
-                for key, value in updates.items():
-                    if hasattr(entity, key):
-                        setattr(entity, key, value)
-                entity.updated_at = datetime.now()
-                
-                # Log update event
-                if self.event_manager:
-                    await self.event_manager.log_event(
-                        EventType.ENTITY_UPDATED,
-                        entity.entity_type,
-                        entity.entity_id,
-                        event_data={"updates": updates}
-                    )
-                
-                # Update cache
-                cache_key = self._get_cache_key(entity.entity_type, entity.entity_id)
-                self.cache[cache_key] = entity
-                
-                return True
-                
             except Exception as e:
                 await db.rollback()
                 raise e
+        
+        # Update entity object
+        for key, value in updates.items():
+            if hasattr(entity, key):
+                setattr(entity, key, value)
+        entity.updated_at = datetime.now()
+        
+        # Log update event
+        if self.event_manager:
+            await self.event_manager.log_event(
+                EventType.ENTITY_UPDATED,
+                entity.entity_type,
+                entity.entity_id,
+                event_data={"updates": updates}
+            )
+        
+        # Write through: drop stale copies everywhere, then cache the new one
+        invalidate_entity(entity.entity_type, entity.entity_id)
+        self.cache.put(entity.entity_type, entity.entity_id, entity)
+        
+        # Wake anything waiting on this task
+        if entity.entity_type == EntityType.TASK and is_terminal(entity.task_state):
+            task_notifier.notify(
+                entity.entity_id,
+                entity.task_state,
+                result=entity.result,
+                error=entity.error
+            )
+        
+        return True
     
     async def delete_entity(
         self,
@@ -242,7 +298,7 @@ class EntityManager:
         
         if hard_delete:
             # Hard delete from database
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute("BEGIN")
                 
                 try:
@@ -290,10 +346,8 @@ class EntityManager:
                 hard_delete=hard_delete
             )
         
-        # Remove from cache
-        cache_key = self._get_cache_key(entity_type, entity_id)
-        if cache_key in self.cache:
-            del self.cache[cache_key]
+        # Remove from every cache
+        invalidate_entity(entity_type, entity_id)
         
         return True
     
@@ -302,48 +356,95 @@ class EntityManager:
         entity_type: EntityType,
         state: Optional[EntityState] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Entity]:
-        """List entities of a specific type."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            query = """
-                SELECT entity_id FROM entities 
-                WHERE entity_type = ?
-            """
-            params = [entity_type.value]
+        """
+        List entities of a specific type.
+        
+        filters match columns of the entities row or the type's table
+        (e.g. {"name": ...}), or metadata keys as "metadata.<key>". They are
+        applied in SQL, so limit and offset page over the matching rows.
+        """
+        async with self.pool.reader() as db:
+            join, conditions, params = await self._filter_sql(db, entity_type, filters)
             
             if state:
-                query += " AND state = ?"
+                conditions.append("e.status = ?")
                 params.append(state.value)
             
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+            query = f"SELECT e.* FROM entities e{join} WHERE {' AND '.join(conditions)}"
+            query += " ORDER BY e.created_at DESC LIMIT ? OFFSET ?"
             params.extend([limit, offset])
             
             cursor = await db.execute(query, params)
             rows = await cursor.fetchall()
             
-            entities = []
+            # Fresh cache entries are reused; the rest of the page is
+            # hydrated with one query per table instead of one per row.
+            cached = {}
+            to_load = []
             for row in rows:
-                entity = await self.get_entity(entity_type, row['entity_id'])
+                entity = self.cache.get(entity_type, row['entity_id'])
                 if entity:
-                    entities.append(entity)
+                    cached[row['entity_id']] = entity
+                else:
+                    to_load.append(row)
             
-            return entities
+            loaded = await self._hydrate(db, entity_type, to_load)
+        
+        for entity in loaded:
+            self.cache.put(entity_type, entity.entity_id, entity)
+            cached[entity.entity_id] = entity
+        
+        return [cached[row['entity_id']] for row in rows if row['entity_id'] in cached]
     
     async def search_entities(
         self,
         entity_type: EntityType,
         search_term: str,
         fields: List[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Entity]:
-        """Search entities by text in specified fields."""
+        """
+        Search entities by text in specified fields.
+        
+        Uses the FTS5 index (BM25-ranked, supports "phrases" and prefix*
+        terms) when it exists, otherwise falls back to a substring scan.
+        filters work as in list_entities and are applied before paging.
+        """
         if not fields:
             fields = ['name', 'instruction', 'description', 'title', 'content']
         
-        entities = await self.list_entities(entity_type, limit=1000)  # Get more for filtering
+        if await self._has_search_index():
+            async with self.pool.reader() as db:
+                restrict = None
+                if filters:
+                    join, conditions, filter_params = await self._filter_sql(db, entity_type, filters)
+                    restrict = (
+                        f"entity_id IN (SELECT e.entity_id FROM entities e{join} WHERE {' AND '.join(conditions)})",
+                        filter_params
+                    )
+                search = build_search_query(
+                    search_term,
+                    entity_types=[entity_type],
+                    fields=fields,
+                    limit=limit,
+                    offset=offset,
+                    restrict=restrict
+                )
+                if search is None:
+                    return []
+                
+                query, params = search
+                cursor = await db.execute(query, params)
+                rows = await cursor.fetchall()
+            
+            return await self.get_entities(entity_type, [row['entity_id'] for row in rows])
+        
+        entities = await self.list_entities(entity_type, limit=1000, filters=filters)  # Get more for filtering
         
         results = []
         search_lower = search_term.lower()
@@ -356,7 +457,66 @@ class EntityManager:
                         results.append(entity)
                         break
         
-        return results[:limit]
+        return results[offset:offset + limit]
+    
+    async def _filter_sql(
+        self,
+        db,
+        entity_type: EntityType,
+        filters: Optional[Dict[str, Any]]
+    ) -> Tuple[str, List[str], List[Any]]:
+        """
+        Turn list/search filters into SQL over entities e (joined to the
+        type's table as t when a filter needs it).
+        
+        Returns (join, conditions, params); conditions always include the
+        entity type. Unknown filter keys raise ValueError.
+        """
+        conditions = ["e.entity_type = ?"]
+        params: List[Any] = [entity_type.value]
+        join = ""
+        if not filters:
+            return join, conditions, params
+        
+        table = self._type_tables.get(entity_type)
+        entity_columns = await self._columns(db, "entities")
+        type_columns = await self._columns(db, table) if table else set()
+        
+        for key, value in filters.items():
+            if key.startswith("metadata.") and _METADATA_KEY_RE.fullmatch(key[len("metadata."):]):
+                conditions.append(f"json_extract(e.metadata, '$.{key[len('metadata.'):]}') = ?")
+            elif key in entity_columns:
+                conditions.append(f"e.{key} = ?")
+            elif key in type_columns:
+                join = f" JOIN {table} t ON t.id = e.entity_id"
+                conditions.append(f"t.{key} = ?")
+            else:
+                raise ValueError(f"Unknown {entity_type.value} filter: {key}")
+            
+            # JSON columns hold encoded text
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            params.append(value)
+        
+        return join, conditions, params
+    
+    async def _columns(self, db, table: str) -> set:
+        """Column names of a table (cached)."""
+        if table not in self._table_columns:
+            cursor = await db.execute(f"PRAGMA table_info({table})")
+            self._table_columns[table] = {row['name'] for row in await cursor.fetchall()}
+        return self._table_columns[table]
+    
+    async def _has_search_index(self) -> bool:
+        """Check whether the full-text search migration is applied."""
+        # Re-checked once a minute so applying migration 016 later switches searches over
+        if self._search_index_available or time.time() - self._search_index_checked_at < 60:
+            return self._search_index_available
+        self._search_index_checked_at = time.time()
+        async with self.pool.reader() as db:
+            cursor = await db.execute(INDEX_EXISTS_QUERY, (SEARCH_TABLE,))
+            self._search_index_available = await cursor.fetchone() is not None
+        return self._search_index_available
     
     # Relationship management methods
     async def create_relationship(
@@ -367,7 +527,7 @@ class EntityManager:
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Create a relationship between two entities."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT INTO entity_relationships 
                 (source_type, source_id, target_type, target_id, relationship_type, metadata, created_at)
@@ -383,6 +543,10 @@ class EntityManager:
             ))
             await db.commit()
         
+        # Other caches hold the source without the new relationship
+        invalidate_entity(source_entity.entity_type, source_entity.entity_id)
+        self.cache.put(source_entity.entity_type, source_entity.entity_id, source_entity)
+        
         # Update entity objects
         await source_entity.add_relationship(
             relationship_type,
@@ -399,9 +563,7 @@ class EntityManager:
         target_type: Optional[EntityType] = None
     ) -> List[Entity]:
         """Get entities related to the given entity."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
+        async with self.pool.reader() as db:
             query = """
                 SELECT target_type, target_id, relationship_type
                 FROM entity_relationships
@@ -419,18 +581,24 @@ class EntityManager:
             
             cursor = await db.execute(query, params)
             rows = await cursor.fetchall()
-            
-            related_entities = []
-            for row in rows:
-                target_entity_type = EntityType(row['target_type'])
-                target_entity = await self.get_entity(
-                    target_entity_type,
-                    row['target_id']
-                )
-                if target_entity:
-                    related_entities.append(target_entity)
-            
-            return related_entities
+        
+        # Group targets by type so each type is loaded in one batch
+        targets_by_type: Dict[EntityType, List[int]] = {}
+        for row in rows:
+            targets_by_type.setdefault(EntityType(row['target_type']), []).append(row['target_id'])
+        
+        loaded: Dict[tuple, Entity] = {}
+        for target_entity_type, target_ids in targets_by_type.items():
+            for target_entity in await self.get_entities(target_entity_type, target_ids):
+                loaded[(target_entity_type, target_entity.entity_id)] = target_entity
+        
+        related_entities = []
+        for row in rows:
+            key = (EntityType(row['target_type']), row['target_id'])
+            if key in loaded:
+                related_entities.append(loaded[key])
+        
+        return related_entities
     
     # Helper methods for type-specific operations
     async def _create_agent_record(self, db, entity_id: int, name: str, **kwargs):
@@ -514,6 +682,85 @@ class EntityManager:
         # Events are already created through the event system
         pass
     
+    # Type-specific tables keyed by entity type
+    _type_tables = {
+        EntityType.AGENT: "agents",
+        EntityType.TASK: "tasks",
+        EntityType.TOOL: "tools",
+        EntityType.DOCUMENT: "context_documents",
+        EntityType.PROCESS: "processes",
+        EntityType.EVENT: "events"
+    }
+    
+    # Columns stored as JSON text
+    _json_fields = ['context_documents', 'available_tools', 'permissions',
+                    'constraints', 'parameters', 'steps', 'rollback_steps',
+                    'result', 'metadata', 'data']
+    
+    # Stay well below SQLite's bound-parameter limit
+    _batch_size = 500
+    
+    @classmethod
+    def _chunks(cls, ids: List[Any]):
+        for start in range(0, len(ids), cls._batch_size):
+            yield ids[start:start + cls._batch_size]
+    
+    def _parse_json_fields(self, row) -> Dict[str, Any]:
+        """Convert a type-specific row to a dict with JSON fields decoded."""
+        data = dict(row)
+        for field in self._json_fields:
+            if field in data and data[field]:
+                try:
+                    data[field] = json.loads(data[field])
+                except:
+                    pass
+        return data
+    
+    async def _build_entity(
+        self,
+        entity_type: EntityType,
+        entity_row,
+        type_data: Dict[str, Any],
+        relationships: Dict[str, List[int]]
+    ) -> Entity:
+        """Merge an entities row with its type data into an entity instance."""
+        entity_data = dict(entity_row)
+        entity_data.update(type_data)
+        entity_data['metadata'] = json.loads(entity_data.get('metadata', '{}'))
+        entity_data['relationships'] = relationships
+        
+        entity_class = self.entity_classes[entity_type]
+        entity = await entity_class.from_dict(entity_data)
+        entity.event_manager = self.event_manager
+        return entity
+    
+    async def _hydrate(
+        self,
+        db,
+        entity_type: EntityType,
+        entity_rows: List[Any]
+    ) -> List[Entity]:
+        """Build entities for a set of entities rows using batched lookups."""
+        if not entity_rows:
+            return []
+        
+        entity_ids = [row['entity_id'] for row in entity_rows]
+        type_data = await self._get_type_specific_data_batch(db, entity_type, entity_ids)
+        relationships = await self._get_entity_relationships_batch(db, entity_type, entity_ids)
+        
+        entities = []
+        for row in entity_rows:
+            data = type_data.get(row['entity_id'])
+            if not data:
+                continue
+            entities.append(await self._build_entity(
+                entity_type,
+                row,
+                data,
+                relationships.get(row['entity_id'], {})
+            ))
+        return entities
+    
     async def _get_type_specific_data(
         self,
         db,
@@ -521,54 +768,41 @@ class EntityManager:
         entity_id: int
     ) -> Optional[Dict[str, Any]]:
         """Get type-specific data for an entity."""
-        if entity_type == EntityType.AGENT:
-            cursor = await db.execute(
-                "SELECT * FROM agents WHERE id = ?",
-                (entity_id,)
-            )
-        elif entity_type == EntityType.TASK:
-            cursor = await db.execute(
-                "SELECT * FROM tasks WHERE id = ?",
-                (entity_id,)
-            )
-        elif entity_type == EntityType.TOOL:
-            cursor = await db.execute(
-                "SELECT * FROM tools WHERE id = ?",
-                (entity_id,)
-            )
-        elif entity_type == EntityType.DOCUMENT:
-            cursor = await db.execute(
-                "SELECT * FROM context_documents WHERE id = ?",
-                (entity_id,)
-            )
-        elif entity_type == EntityType.PROCESS:
-            cursor = await db.execute(
-                "SELECT * FROM processes WHERE id = ?",
-                (entity_id,)
-            )
-        elif entity_type == EntityType.EVENT:
-            cursor = await db.execute(
-                "SELECT * FROM events WHERE id = ?",
-                (entity_id,)
-            )
-        else:
+        table = self._type_tables.get(entity_type)
+        if not table:
             return None
         
+        cursor = await db.execute(
+            f"SELECT * FROM {table} WHERE id = ?",
+            (entity_id,)
+        )
         row = await cursor.fetchone()
         if row:
-            data = dict(row)
-            # Parse JSON fields
-            for field in ['context_documents', 'available_tools', 'permissions', 
-                         'constraints', 'parameters', 'steps', 'rollback_steps',
-                         'result', 'metadata', 'data']:
-                if field in data and data[field]:
-                    try:
-                        data[field] = json.loads(data[field])
-                    except:
-                        pass
-            return data
+            return self._parse_json_fields(row)
         return None
     
+    async def _get_type_specific_data_batch(
+        self,
+        db,
+        entity_type: EntityType,
+        entity_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Get type-specific data for many entities, keyed by id."""
+        table = self._type_tables.get(entity_type)
+        if not table:
+            return {}
+        
+        results = {}
+        for chunk in self._chunks(entity_ids):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await db.execute(
+                f"SELECT * FROM {table} WHERE id IN ({placeholders})",
+                chunk
+            )
+            for row in await cursor.fetchall():
+                results[row['id']] = self._parse_json_fields(row)
+        return results
+    
     async def _get_entity_relationships(
         self,
         db,
@@ -593,6 +827,27 @@ class EntityManager:
         
         return relationships
     
+    async def _get_entity_relationships_batch(
+        self,
+        db,
+        entity_type: EntityType,
+        entity_ids: List[int]
+    ) -> Dict[int, Dict[str, List[int]]]:
+        """Get relationships for many entities, keyed by source id."""
+        results: Dict[int, Dict[str, List[int]]] = {}
+        for chunk in self._chunks(entity_ids):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await db.execute(f"""
+                SELECT source_id, relationship_type, target_id
+                FROM entity_relationships
+                WHERE source_type = ? AND source_id IN ({placeholders})
+            """, [entity_type.value, *chunk])
+            
+            for row in await cursor.fetchall():
+                relationships = results.setdefault(row['source_id'], {})
+                relationships.setdefault(row['relationship_type'], []).append(row['target_id'])
+        return results
+    
     async def _update_agent_record(self, db, entity: AgentEntity, **updates):
         """Update agent-specific fields."""
         if any(field in updates for field in ['instruction', 'context_documents', 
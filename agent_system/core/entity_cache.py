@@ -0,0 +1,251 @@
+"""
+Bounded entity cache with write-through invalidation.
+
+The cache is an LRU bounded by both entry count and approximate memory use,
+with a per-entity-type TTL. Every cache registers itself with a module-level
+invalidation hub, so any code path that writes an entity row (EntityManager,
+the repositories in core.database_manager, ...) can drop stale copies from
+every live cache with invalidate_entity().
+
+This module deliberately has no imports from the rest of core so that the
+repositories can use it without creating import cycles.
+"""
+
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _type_key(entity_type: Any) -> str:
+    """Normalize an EntityType enum or plain string to its value."""
+    return getattr(entity_type, "value", entity_type)
+
+
+def _id_key(entity_id: Any) -> Any:
+    """Normalize ids passed as strings by the repositories."""
+    try:
+        return int(entity_id)
+    except (TypeError, ValueError):
+        return entity_id
+
+
+def _estimate_size(obj: Any, depth: int = 0, seen: Optional[set] = None) -> int:
+    """Approximate the memory footprint of an entity and its plain data."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or depth > 4:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key, depth + 1, seen)
+            size += _estimate_size(value, depth + 1, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _estimate_size(item, depth + 1, seen)
+    elif hasattr(obj, "__dict__") and depth == 0:
+        # Only walk the entity's own attributes; shared collaborators such
+        # as the event manager are not owned by the cache entry.
+        for value in vars(obj).values():
+            if isinstance(value, (str, bytes, int, float, dict, list, tuple, set)) or value is None:
+                size += _estimate_size(value, depth + 1, seen)
+    return size
+
+
+class EntityCache:
+    """LRU + TTL cache for entity objects."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        default_ttl_seconds: float = 300.0
+    ):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = {_type_key(k): v for k, v in (ttl_seconds or {}).items()}
+        self.default_ttl_seconds = default_ttl_seconds
+
+        # key -> (entity, expires_at, size_bytes)
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[Any, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        _register_cache(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ttl_for(self, entity_type: str) -> float:
+        return self.ttl_seconds.get(entity_type, self.default_ttl_seconds)
+
+    def get(self, entity_type: Any, entity_id: Any) -> Optional[Any]:
+        """Get a cached entity, or None on miss/expiry."""
+        key = (_type_key(entity_type), _id_key(entity_id))
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        entity, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entity
+
+    def put(self, entity_type: Any, entity_id: Any, entity: Any):
+        """Insert or refresh an entity and enforce the size bounds."""
+        type_key = _type_key(entity_type)
+        key = (type_key, _id_key(entity_id))
+
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = self._ttl_for(type_key)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        size = _estimate_size(entity)
+        if size > self.max_memory_bytes:
+            return
+
+        self._entries[key] = (entity, time.monotonic() + ttl, size)
+        self._memory_bytes += size
+        self._evict()
+
+    def invalidate(self, entity_type: Any, entity_id: Any) -> bool:
+        """Drop a single entity from the cache."""
+        key = (_type_key(entity_type), _id_key(entity_id))
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+            return True
+        return False
+
+    def invalidate_type(self, entity_type: Any) -> int:
+        """Drop every cached entity of a type."""
+        type_key = _type_key(entity_type)
+        keys = [key for key in self._entries if key[0] == type_key]
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        """Drop all entries."""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._memory_bytes = 0
+
+    def _remove(self, key: Tuple[str, Any]):
+        _, _, size = self._entries.pop(key)
+        self._memory_bytes -= size
+
+    def _evict(self):
+        """Evict least recently used entries until within bounds."""
+        while self._entries and (
+            len(self._entries) > self.max_entries or
+            self._memory_bytes > self.max_memory_bytes
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_bytes": self._memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+# Invalidation hub - every live cache is notified of writes
+_caches: "weakref.WeakSet[EntityCache]" = weakref.WeakSet()
+
+
+def _register_cache(cache: EntityCache):
+    _caches.add(cache)
+
+
+# Called with (entity_type, entity_id or None for the whole type) after
+# local invalidations, so other processes can drop their copies too
+_invalidation_listeners: List[Callable[[str, Any], None]] = []
+
+
+def add_invalidation_listener(listener: Callable[[str, Any], None]):
+    _invalidation_listeners.append(listener)
+
+
+def _notify_listeners(entity_type: Any, entity_id: Any):
+    for listener in list(_invalidation_listeners):
+        try:
+            listener(_type_key(entity_type), entity_id)
+        except Exception:
+            pass
+
+
+def invalidate_entity(entity_type: Any, entity_id: Any, propagate: bool = True):
+    """Invalidate an entity in every live cache. Call after any row write."""
+    if entity_id is None:
+        return
+    for cache in list(_caches):
+        cache.invalidate(entity_type, entity_id)
+    if propagate:
+        _notify_listeners(entity_type, entity_id)
+
+
+def invalidate_entity_type(entity_type: Any, propagate: bool = True):
+    """Invalidate all entities of a type in every live cache."""
+    for cache in list(_caches):
+        cache.invalidate_type(entity_type)
+    if propagate:
+        _notify_listeners(entity_type, None)
+
+
+def get_all_cache_stats() -> Dict[str, Any]:
+    """Aggregate counters across every live cache."""
+    totals = {
+        "caches": 0,
+        "entries": 0,
+        "memory_bytes": 0,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "expirations": 0,
+        "invalidations": 0
+    }
+    for cache in list(_caches):
+        stats = cache.get_stats()
+        totals["caches"] += 1
+        for key in ("entries", "memory_bytes", "hits", "misses",
+                    "evictions", "expirations", "invalidations"):
+            totals[key] += stats[key]
+    lookups = totals["hits"] + totals["misses"]
+    totals["hit_rate"] = totals["hits"] / lookups if lookups else 0.0
+    return totals
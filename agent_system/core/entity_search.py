@@ -0,0 +1,128 @@
+"""
+Full-text search over entities backed by the SQLite FTS5 index.
+
+The entity_search virtual table (migration 016) indexes the searchable text
+of agents, tasks, tools and context documents and is kept in sync by
+triggers. This module only builds queries against it, so both the async
+EntityManager and the synchronous SQLite MCP server can share it.
+
+Like core.entity_cache it has no imports from the rest of core.
+"""
+
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+SEARCH_TABLE = "entity_search"
+INDEX_EXISTS_QUERY = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+
+# Indexed text columns, in table order after entity_type/entity_id
+SEARCH_COLUMNS = ["name", "title", "description", "instruction", "content"]
+
+# BM25 column weights - a hit in a name counts more than one in a body
+SEARCH_WEIGHTS = {
+    "name": 10.0,
+    "title": 5.0,
+    "description": 2.0,
+    "instruction": 1.0,
+    "content": 1.0
+}
+
+# Source tables covered by the index
+SEARCH_TABLES = {
+    "agents": "agent",
+    "tasks": "task",
+    "tools": "tool",
+    "context_documents": "document"
+}
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _type_key(entity_type: Any) -> str:
+    return getattr(entity_type, "value", entity_type)
+
+
+def build_match_expression(search_term: str, prefix: bool = True) -> Optional[str]:
+    """
+    Turn user input into a safe FTS5 MATCH expression.
+
+    Quoted text is kept as a phrase, a trailing * on a word asks for a prefix
+    match, and with prefix=True the last bare word is also matched as a
+    prefix so search-as-you-type works. All other FTS5 syntax is escaped.
+    Terms are ANDed. Returns None when nothing searchable remains.
+    """
+    parts = []
+    tokens = list(_TOKEN_RE.finditer(search_term or ""))
+
+    for index, match in enumerate(tokens):
+        phrase, word = match.groups()
+        if phrase is not None:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+            continue
+
+        wants_prefix = word.endswith("*") or (prefix and index == len(tokens) - 1)
+        pieces = _WORD_RE.findall(word)
+        for position, piece in enumerate(pieces):
+            quoted = f'"{piece}"'
+            if wants_prefix and position == len(pieces) - 1:
+                quoted += "*"
+            parts.append(quoted)
+
+    if not parts:
+        return None
+    return " AND ".join(parts)
+
+
+def build_search_query(
+    search_term: str,
+    entity_types: Optional[Sequence[Any]] = None,
+    fields: Optional[Sequence[str]] = None,
+    limit: int = 50,
+    offset: int = 0,
+    prefix: bool = True,
+    restrict: Optional[Tuple[str, Sequence[Any]]] = None
+) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Build a ranked search query.
+
+    Rows come back as (entity_type, entity_id, score, snippet), best match
+    first. restrict is an extra (condition, params) on the index columns,
+    applied before paging. Returns None if the search term has no
+    searchable words.
+    """
+    expression = build_match_expression(search_term, prefix=prefix)
+    if expression is None:
+        return None
+
+    if fields:
+        columns = [field for field in fields if field in SEARCH_COLUMNS]
+        if columns:
+            expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+
+    weights = ", ".join(["0.0", "0.0"] + [str(SEARCH_WEIGHTS[c]) for c in SEARCH_COLUMNS])
+    query = f"""
+        SELECT entity_type, entity_id,
+               bm25({SEARCH_TABLE}, {weights}) AS score,
+               snippet({SEARCH_TABLE}, -1, '[', ']', '...', 16) AS snippet
+        FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH ?
+    """
+    params: List[Any] = [expression]
+
+    if entity_types:
+        types = [_type_key(t) for t in entity_types]
+        query += f" AND entity_type IN ({','.join('?' * len(types))})"
+        params.extend(types)
+
+    if restrict:
+        condition, restrict_params = restrict
+        query += f" AND {condition}"
+        params.extend(restrict_params)
+
+    query += " ORDER BY score LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    return query, params
@@ -21,6 +21,9 @@ class EventSystemIntegration:
     async def initialize(self):
         """Initialize event system integration"""
         if self.event_system_enabled:
+            # Rebuild rolling statistics and start the optimization consumer
+            await event_manager.start()
+            
             # Start periodic event flush task
             self.flush_task = asyncio.create_task(self._periodic_flush())
             print("Event system integration initialized")
@@ -34,8 +37,9 @@ class EventSystemIntegration:
             except asyncio.CancelledError:
                 pass
         
-        # Final flush of any remaining events
+        # Final flush of any remaining events, then drain optimization checks
         await event_manager.flush()
+        await event_manager.stop()
         print("Event system integration shut down")
     
     async def _periodic_flush(self):
@@ -7,13 +7,27 @@ import json
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import random
+from collections import deque
 from contextlib import asynccontextmanager
 
+from config.database import db_manager
 from .event_types import EventType, EventOutcome, EntityType, CounterType
 from .models import Event, ResourceUsage, ReviewCounter
+from .event_stats import EventStatsEngine
 from ..database_manager import database
 
 
+# Map event types to the review counter they increment
+COUNTER_MAPPINGS = {
+    EventType.TOOL_CALLED: (CounterType.USAGE, 1),
+    EventType.TOOL_COMPLETED: (CounterType.SUCCESS, 1),
+    EventType.TOOL_FAILED: (CounterType.FAILURE, 1),
+    EventType.TASK_COMPLETED: (CounterType.SUCCESS, 1),
+    EventType.TASK_FAILED: (CounterType.FAILURE, 1),
+    EventType.SYSTEM_ERROR: (CounterType.ERROR, 1),
+}
+
+
 class EventManager:
     """Manages comprehensive event logging and processing"""
     
@@ -25,6 +39,31 @@ class EventManager:
         self._flush_lock = asyncio.Lock()
         self._context_stack = []
         
+        # Rolling-window aggregates used by the optimization checks
+        self.stats = EventStatsEngine()
+        
+        # Opportunities and reviews are written off the flush path by a consumer task
+        self.optimization_queue_size = 10000
+        self._optimization_queue: Optional[asyncio.Queue] = None
+        self._optimization_task: Optional[asyncio.Task] = None
+        
+        # Ingestion metrics
+        self.metrics: Dict[str, Any] = {
+            "events_logged": 0,
+            "events_flushed": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+            "counter_updates": 0,
+            "reviews_triggered": 0,
+            "optimization_checks": 0,
+            "optimization_checks_dropped": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+        self._ingest_window_seconds = 60
+        self._ingest_samples: deque = deque()  # (timestamp, events flushed)
+        
     @asynccontextmanager
     async def event_context(self, tree_id: Optional[int] = None, parent_event_id: Optional[int] = None):
         """Context manager for event tracking"""
@@ -87,6 +126,7 @@ class EventManager:
         # Add to buffer
         async with self._flush_lock:
             self.event_buffer.append(event)
+            self.metrics["events_logged"] += 1
             
             # Check if we should flush
             if len(self.event_buffer) >= self.batch_size:
@@ -116,43 +156,58 @@ class EventManager:
         event.metadata['event_version'] = '1.0'
     
     async def _flush_events(self):
-        """Flush event buffer to database"""
+        """
+        Flush event buffer to database.
+        
+        The whole batch is written in one transaction: one executemany for
+        the events and one aggregated update per review counter. Optimization
+        checks are handed to the consumer task instead of running here.
+        """
         if not self.event_buffer:
             return
         
         events_to_flush = self.event_buffer.copy()
         self.event_buffer.clear()
         self.last_flush_time = time.time()
+        start = time.perf_counter()
         
         try:
-            # Batch insert events
-            for event in events_to_flush:
-                event_id = await self._insert_event(event)
-                event.id = event_id
-                
-                # Update rolling review counters
-                await self._update_review_counters(event)
-                
-                # Check for optimization opportunities
-                await self._check_optimization_triggers(event)
-                
+            async with db_manager.get_connection() as conn:
+                await conn.execute("BEGIN")
+                try:
+                    await self._insert_events(conn, events_to_flush)
+                    reviews = await self._apply_counter_updates(
+                        conn,
+                        self._aggregate_counter_updates(events_to_flush)
+                    )
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+            
         except Exception as e:
             # Log error without creating recursive events
             print(f"Error flushing events: {e}")
+            self.metrics["flush_failures"] += 1
             # Re-add events to buffer for retry
             self.event_buffer.extend(events_to_flush)
-    
-    async def _insert_event(self, event: Event) -> int:
-        """Insert event into database"""
-        query = """
-        INSERT INTO events (
-            event_type, primary_entity_type, primary_entity_id,
-            related_entities, event_data, outcome, tree_id,
-            parent_event_id, duration_seconds, timestamp, metadata
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+            return
         
-        params = (
+        self._record_flush(len(events_to_flush), time.perf_counter() - start)
+        
+        for event in events_to_flush:
+            for opportunity in self._check_optimization_triggers(event):
+                self._enqueue_optimization(("opportunity", opportunity))
+        for review in reviews:
+            self._enqueue_optimization(("review", review))
+    
+    def _event_params(self, event: Event) -> tuple:
+        """Row values for an events insert"""
+        metadata = event.metadata
+        if event.resource_usage:
+            # The events table has no usage columns; analyzers read it from metadata
+            metadata = {**metadata, "resource_usage": event.resource_usage.model_dump(exclude_none=True)}
+        return (
             event.event_type.value,
             event.primary_entity_type.value,
             event.primary_entity_id,
@@ -163,81 +218,183 @@ class EventManager:
             event.parent_event_id,
             event.duration_seconds,
             datetime.fromtimestamp(event.timestamp),
-            json.dumps(event.metadata)
+            json.dumps(metadata)
         )
-        
-        return await database.execute_command(query, params)
     
-    async def _update_review_counters(self, event: Event):
-        """Update rolling review counters based on event"""
-        # Map event types to counter types
-        counter_mappings = {
-            EventType.TOOL_CALLED: (CounterType.USAGE, 1),
-            EventType.TOOL_COMPLETED: (CounterType.SUCCESS, 1),
-            EventType.TOOL_FAILED: (CounterType.FAILURE, 1),
-            EventType.TASK_COMPLETED: (CounterType.SUCCESS, 1),
-            EventType.TASK_FAILED: (CounterType.FAILURE, 1),
-            EventType.SYSTEM_ERROR: (CounterType.ERROR, 1),
-        }
-        
-        if event.event_type in counter_mappings:
-            counter_type, increment = counter_mappings[event.event_type]
-            await self._increment_counter(
-                event.primary_entity_type,
-                event.primary_entity_id,
-                counter_type,
-                increment
-            )
-    
-    async def _increment_counter(
-        self,
-        entity_type: EntityType,
-        entity_id: int,
-        counter_type: CounterType,
-        increment: int = 1
-    ) -> bool:
-        """Increment counter and check for review triggers"""
-        # Get or create counter
+    async def _insert_events(self, conn, events: List[Event]):
+        """Insert a batch of events and assign their ids"""
         query = """
-        SELECT * FROM rolling_review_counters
-        WHERE entity_type = ? AND entity_id = ? AND counter_type = ?
+        INSERT INTO events (
+            event_type, primary_entity_type, primary_entity_id,
+            related_entities, event_data, outcome, tree_id,
+            parent_event_id, duration_seconds, timestamp, metadata
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
-        params = (entity_type.value, entity_id, counter_type.value)
         
-        results = await database.execute_query(query, params)
+        await conn.executemany(query, [self._event_params(event) for event in events])
         
-        if results:
-            # Update existing counter
-            counter = results[0]
-            new_count = counter['count'] + increment
-            
-            # Check if threshold reached
-            if new_count >= counter['threshold']:
-                await self._trigger_review(entity_type, entity_id, counter_type, counter)
-                # Reset counter
-                update_query = """
-                UPDATE rolling_review_counters
-                SET count = 0, last_review_at = ?
-                WHERE entity_type = ? AND entity_id = ? AND counter_type = ?
-                """
-                await database.execute_command(
-                    update_query,
-                    (datetime.utcnow(), entity_type.value, entity_id, counter_type.value)
+        # Rows inserted by one statement on the single writer connection
+        # get consecutive ids ending at last_insert_rowid()
+        cursor = await conn.execute("SELECT last_insert_rowid()")
+        last_id = (await cursor.fetchone())[0]
+        first_id = last_id - len(events) + 1
+        for offset, event in enumerate(events):
+            event.id = first_id + offset
+    
+    def _aggregate_counter_updates(
+        self,
+        events: List[Event]
+    ) -> Dict[Tuple[str, int, str], int]:
+        """Sum counter increments per (entity_type, entity_id, counter_type)"""
+        increments: Dict[Tuple[str, int, str], int] = {}
+        for event in events:
+            if event.event_type in COUNTER_MAPPINGS:
+                counter_type, increment = COUNTER_MAPPINGS[event.event_type]
+                key = (
+                    event.primary_entity_type.value,
+                    event.primary_entity_id,
+                    counter_type.value
                 )
-                return True
-            else:
-                # Just increment
-                update_query = """
+                increments[key] = increments.get(key, 0) + increment
+        return increments
+    
+    async def _apply_counter_updates(
+        self,
+        conn,
+        increments: Dict[Tuple[str, int, str], int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply aggregated counter increments and reset counters that reached
+        their threshold. Returns the counters that need a review.
+        """
+        if not increments:
+            return []
+        
+        await conn.executemany("""
+            UPDATE rolling_review_counters
+            SET count = count + ?
+            WHERE entity_type = ? AND entity_id = ? AND counter_type = ?
+        """, [(increment, *key) for key, increment in increments.items()])
+        self.metrics["counter_updates"] += len(increments)
+        
+        # Find counters that crossed their threshold in this batch
+        keys = list(increments.keys())
+        reviews = []
+        for start in range(0, len(keys), 300):
+            chunk = keys[start:start + 300]
+            values = ", ".join(["(?, ?, ?)"] * len(chunk))
+            cursor = await conn.execute(f"""
+                SELECT * FROM rolling_review_counters
+                WHERE count >= threshold
+                AND (entity_type, entity_id, counter_type) IN (VALUES {values})
+            """, [part for key in chunk for part in key])
+            reviews.extend(dict(row) for row in await cursor.fetchall())
+        
+        if reviews:
+            await conn.executemany("""
                 UPDATE rolling_review_counters
-                SET count = count + ?
+                SET count = 0, last_review_at = ?
                 WHERE entity_type = ? AND entity_id = ? AND counter_type = ?
-                """
-                await database.execute_command(
-                    update_query,
-                    (increment, entity_type.value, entity_id, counter_type.value)
-                )
+            """, [
+                (datetime.utcnow(), r['entity_type'], r['entity_id'], r['counter_type'])
+                for r in reviews
+            ])
+        
+        return reviews
+    
+    def _record_flush(self, event_count: int, elapsed_seconds: float):
+        """Update flush latency and ingest rate metrics"""
+        elapsed_ms = elapsed_seconds * 1000
+        self.metrics["flushes"] += 1
+        self.metrics["events_flushed"] += event_count
+        self.metrics["last_flush_ms"] = elapsed_ms
+        self.metrics["max_flush_ms"] = max(self.metrics["max_flush_ms"], elapsed_ms)
+        self.metrics["total_flush_ms"] += elapsed_ms
+        
+        now = time.time()
+        self._ingest_samples.append((now, event_count))
+        while self._ingest_samples and self._ingest_samples[0][0] < now - self._ingest_window_seconds:
+            self._ingest_samples.popleft()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get ingestion pipeline metrics"""
+        now = time.time()
+        recent = sum(
+            count for timestamp, count in self._ingest_samples
+            if timestamp >= now - self._ingest_window_seconds
+        )
+        flushes = self.metrics["flushes"]
+        return {
+            **self.metrics,
+            "avg_flush_ms": self.metrics["total_flush_ms"] / flushes if flushes else 0.0,
+            "ingest_rate_per_second": recent / self._ingest_window_seconds,
+            "buffered_events": len(self.event_buffer),
+            "optimization_queue_depth": (
+                self._optimization_queue.qsize() if self._optimization_queue else 0
+            ),
+            "rolling_stats": self.stats.get_stats()
+        }
+    
+    # Optimization consumer stage
+    async def start(self):
+        """Rebuild rolling statistics from the database and start the consumer"""
+        try:
+            await self.stats.rebuild(db_manager)
+        except Exception as e:
+            print(f"Error rebuilding event statistics: {e}")
+        self._ensure_optimization_consumer()
+    
+    def _enqueue_optimization(self, item: Tuple[str, Any]):
+        """Hand a flushed event or review to the optimization consumer"""
+        self._ensure_optimization_consumer()
+        try:
+            self._optimization_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Checks are advisory - never slow down ingestion for them
+            self.metrics["optimization_checks_dropped"] += 1
+    
+    def _ensure_optimization_consumer(self):
+        """Start the consumer task on first use"""
+        if self._optimization_queue is None:
+            self._optimization_queue = asyncio.Queue(maxsize=self.optimization_queue_size)
+        if self._optimization_task is None or self._optimization_task.done():
+            self._optimization_task = asyncio.create_task(self._optimization_consumer())
+    
+    async def _optimization_consumer(self):
+        """Record optimization opportunities and run reviews for flushed events"""
+        while True:
+            kind, item = await self._optimization_queue.get()
+            try:
+                if kind == "opportunity":
+                    await self._log_optimization_opportunity(*item)
+                else:
+                    await self._trigger_review(
+                        EntityType(item['entity_type']),
+                        item['entity_id'],
+                        CounterType(item['counter_type']),
+                        item
+                    )
+                    self.metrics["reviews_triggered"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in optimization check: {e}")
+            finally:
+                self._optimization_queue.task_done()
+    
+    async def stop(self):
+        """Drain pending optimization checks and stop the consumer"""
+        if self._optimization_task and not self._optimization_task.done():
+            await self._optimization_queue.join()
+            self._optimization_task.cancel()
+            try:
+                await self._optimization_task
+            except asyncio.CancelledError:
+                pass
+        self._optimization_task = None
         
-        return False
+        # Reviews triggered while draining log events of their own
+        await self.flush()
     
     async def _trigger_review(
         self,
@@ -264,82 +421,71 @@ class EventManager:
         # This will be implemented when we integrate with the task system
         pass
     
-    async def _check_optimization_triggers(self, event: Event):
-        """Check if event should trigger optimization analysis"""
-        # Check for repeated failures
-        if event.outcome == EventOutcome.FAILURE:
-            await self._check_failure_pattern(event)
+    def _check_optimization_triggers(self, event: Event) -> List[Tuple[Any, ...]]:
+        """
+        Check if event should trigger optimization analysis.
         
-        # Check for performance degradation
+        Answered from the in-memory rolling statistics; returns the
+        opportunities to record.
+        """
+        opportunities = []
+        self.metrics["optimization_checks"] += 1
+        
+        # Check for performance degradation against earlier events only
         if event.duration_seconds > 0:
-            await self._check_performance_degradation(event)
+            opportunity = self._check_performance_degradation(event)
+            if opportunity:
+                opportunities.append(opportunity)
+        
+        self.stats.observe_event(event)
+        
+        # Check for repeated failures, including this one
+        if event.outcome == EventOutcome.FAILURE:
+            opportunity = self._check_failure_pattern(event)
+            if opportunity:
+                opportunities.append(opportunity)
+        
+        return opportunities
     
-    async def _check_failure_pattern(self, event: Event):
+    def _check_failure_pattern(self, event: Event) -> Optional[Tuple[Any, ...]]:
         """Check for repeated failure patterns"""
-        # Get recent failures for the same entity
-        query = """
-        SELECT COUNT(*) as failure_count
-        FROM events
-        WHERE primary_entity_type = ? 
-        AND primary_entity_id = ?
-        AND outcome = 'failure'
-        AND timestamp > ?
-        """
-        
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        params = (
-            event.primary_entity_type.value,
+        failure_count = self.stats.failure_count(
+            event.primary_entity_type,
             event.primary_entity_id,
-            one_hour_ago
+            window_seconds=3600
         )
         
-        results = await database.execute_query(query, params)
-        
-        if results and results[0]['failure_count'] >= 3:
-            # Log optimization opportunity
-            await self._log_optimization_opportunity(
+        if failure_count >= 3:
+            return (
                 event.primary_entity_type,
                 event.primary_entity_id,
                 "repeated_failures",
-                f"Entity has failed {results[0]['failure_count']} times in the last hour",
+                f"Entity has failed {failure_count} times in the last hour",
                 event.id
             )
+        return None
     
-    async def _check_performance_degradation(self, event: Event):
+    def _check_performance_degradation(self, event: Event) -> Optional[Tuple[Any, ...]]:
         """Check for performance degradation"""
-        # Get average duration for similar events
-        query = """
-        SELECT AVG(duration_seconds) as avg_duration
-        FROM events
-        WHERE event_type = ?
-        AND primary_entity_type = ?
-        AND primary_entity_id = ?
-        AND outcome = 'success'
-        AND timestamp > ?
-        AND timestamp < ?
-        """
-        
-        one_week_ago = datetime.utcnow() - timedelta(days=7)
-        params = (
-            event.event_type.value,
-            event.primary_entity_type.value,
+        # Average duration of successful similar events over the last week
+        summary = self.stats.duration_stats(
+            event.primary_entity_type,
             event.primary_entity_id,
-            one_week_ago,
-            datetime.fromtimestamp(event.timestamp)
+            event.event_type,
+            window_seconds=7 * 24 * 3600
         )
         
-        results = await database.execute_query(query, params)
-        
-        if results and results[0]['avg_duration']:
-            avg_duration = results[0]['avg_duration']
+        if summary.count and summary.mean:
+            avg_duration = summary.mean
             if event.duration_seconds > avg_duration * 1.5:  # 50% slower
-                await self._log_optimization_opportunity(
+                return (
                     event.primary_entity_type,
                     event.primary_entity_id,
                     "performance_degradation",
                     f"Operation took {event.duration_seconds:.1f}s vs average {avg_duration:.1f}s",
                     event.id
                 )
+        return None
     
     async def _log_optimization_opportunity(
         self,
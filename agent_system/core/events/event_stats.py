@@ -0,0 +1,361 @@
+"""
+Event Statistics - Incremental rolling-window aggregates over the event stream
+
+Failure-pattern and performance-degradation checks used to run COUNT/AVG
+queries over the events table for every flushed event. This engine keeps
+the same aggregates in memory instead:
+
+- failure counts per entity in time-bucketed ring buffers
+- running mean/variance of successful durations per
+  (entity_type, entity_id, event_type), stored as one Welford accumulator
+  per time bucket and merged over the window
+- log-scale duration histograms per entity for p50/p95/p99 estimates
+
+Every update and check touches a fixed number of buckets, so cost does not
+grow with event history. The engine is rebuilt from the events table at
+startup.
+"""
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from .event_types import EventType, EventOutcome, EntityType
+from .models import Event
+
+
+class BucketRing:
+    """Fixed number of time buckets reused in a ring"""
+
+    def __init__(self, bucket_seconds: float, bucket_count: int, empty):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self._empty = empty
+        self.epochs = [-1] * bucket_count
+        self.values = [empty() for _ in range(bucket_count)]
+
+    def _slot(self, timestamp: float) -> Tuple[int, int]:
+        epoch = int(timestamp // self.bucket_seconds)
+        return epoch, epoch % self.bucket_count
+
+    def get_bucket(self, timestamp: float):
+        """Get the slot for a timestamp, resetting it if it holds an older bucket"""
+        epoch, slot = self._slot(timestamp)
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.values[slot] = self._empty()
+        return slot
+
+    def window(self, now: float, window_seconds: float) -> List[Any]:
+        """Bucket values inside (now - window_seconds, now]"""
+        current_epoch = int(now // self.bucket_seconds)
+        oldest_epoch = int((now - window_seconds) // self.bucket_seconds)
+        return [
+            value for epoch, value in zip(self.epochs, self.values)
+            if oldest_epoch < epoch <= current_epoch
+        ]
+
+    def covers(self, timestamp: float, now: float) -> bool:
+        """Check if a timestamp still falls inside the ring"""
+        span = self.bucket_seconds * self.bucket_count
+        return now - span < timestamp <= now + self.bucket_seconds
+
+
+class RollingCounter:
+    """Event count over a sliding time window"""
+
+    def __init__(self, bucket_seconds: float, bucket_count: int):
+        self.ring = BucketRing(bucket_seconds, bucket_count, int)
+
+    def add(self, timestamp: float, amount: int = 1, now: Optional[float] = None):
+        if not self.ring.covers(timestamp, now or time.time()):
+            return
+        slot = self.ring.get_bucket(timestamp)
+        self.ring.values[slot] += amount
+
+    def total(self, window_seconds: float, now: Optional[float] = None) -> int:
+        return sum(self.ring.window(now or time.time(), window_seconds))
+
+
+class RunningStats:
+    """Welford accumulator for count, mean and variance"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine two accumulators (Chan et al. parallel update)"""
+        if other.count == 0:
+            return RunningStats(self.count, self.mean, self.m2)
+        if self.count == 0:
+            return RunningStats(other.count, other.mean, other.m2)
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.count / count
+        m2 = self.m2 + other.m2 + delta * delta * self.count * other.count / count
+        return RunningStats(count, mean, m2)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RollingStats:
+    """Welford statistics over a sliding time window"""
+
+    def __init__(self, bucket_seconds: float, bucket_count: int):
+        self.ring = BucketRing(bucket_seconds, bucket_count, RunningStats)
+
+    def add(self, timestamp: float, value: float, now: Optional[float] = None):
+        if not self.ring.covers(timestamp, now or time.time()):
+            return
+        slot = self.ring.get_bucket(timestamp)
+        self.ring.values[slot].add(value)
+
+    def summary(self, window_seconds: float, now: Optional[float] = None) -> RunningStats:
+        combined = RunningStats()
+        for bucket in self.ring.window(now or time.time(), window_seconds):
+            combined = combined.merge(bucket)
+        return combined
+
+
+class DurationHistogram:
+    """Sparse log-scale histogram for duration quantile estimates"""
+
+    # Bucket boundaries grow by 10% from 1ms, so estimates are within ~5%
+    MIN_SECONDS = 0.001
+    GROWTH = 1.1
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        return int(math.log(seconds / self.MIN_SECONDS, self.GROWTH)) + 1
+
+    def _value(self, bucket: int) -> float:
+        if bucket == 0:
+            return self.MIN_SECONDS
+        # Geometric midpoint of the bucket
+        return self.MIN_SECONDS * self.GROWTH ** (bucket - 0.5)
+
+    def add(self, seconds: float):
+        bucket = self._bucket(seconds)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.total == 0:
+            return None
+        rank = q * (self.total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return self._value(bucket)
+        return self._value(max(self.counts))
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        return {
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+
+class EventStatsEngine:
+    """Streaming per-entity event statistics"""
+
+    FAILURE_WINDOW_SECONDS = 3600
+    DURATION_WINDOW_SECONDS = 7 * 24 * 3600
+
+    def __init__(self, max_series: int = 50000):
+        self.max_series = max_series
+
+        # (entity_type, entity_id) -> failure counter (1 hour in 1 minute buckets)
+        self._failures: "OrderedDict[Tuple[str, int], RollingCounter]" = OrderedDict()
+        # (entity_type, entity_id, event_type) -> successful durations (7 days in 6 hour buckets)
+        self._durations: "OrderedDict[Tuple[str, int, str], RollingStats]" = OrderedDict()
+        # (entity_type, entity_id) -> duration histogram
+        self._histograms: "OrderedDict[Tuple[str, int], DurationHistogram]" = OrderedDict()
+
+        self.events_observed = 0
+        self.rebuilt_at: Optional[float] = None
+
+    def _get(self, table: OrderedDict, key: Tuple, factory):
+        value = table.get(key)
+        if value is None:
+            value = factory()
+            table[key] = value
+            if len(table) > self.max_series:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return value
+
+    def observe(
+        self,
+        entity_type: str,
+        entity_id: int,
+        event_type: str,
+        outcome: Optional[str],
+        duration_seconds: float,
+        timestamp: float,
+        now: Optional[float] = None
+    ):
+        """Add one event to the aggregates"""
+        now = now or time.time()
+        entity_key = (entity_type, entity_id)
+        self.events_observed += 1
+
+        if outcome == EventOutcome.FAILURE.value:
+            counter = self._get(self._failures, entity_key, lambda: RollingCounter(60, 60))
+            counter.add(timestamp, now=now)
+
+        if outcome == EventOutcome.SUCCESS.value:
+            stats = self._get(
+                self._durations,
+                (entity_type, entity_id, event_type),
+                lambda: RollingStats(6 * 3600, 28)
+            )
+            stats.add(timestamp, duration_seconds or 0.0, now=now)
+
+        if duration_seconds and duration_seconds > 0:
+            self._get(self._histograms, entity_key, DurationHistogram).add(duration_seconds)
+
+    def observe_event(self, event: Event):
+        """Add a flushed Event to the aggregates"""
+        self.observe(
+            event.primary_entity_type.value,
+            event.primary_entity_id,
+            event.event_type.value,
+            event.outcome.value if event.outcome else None,
+            event.duration_seconds,
+            event.timestamp
+        )
+
+    def failure_count(
+        self,
+        entity_type: EntityType,
+        entity_id: int,
+        window_seconds: float = FAILURE_WINDOW_SECONDS
+    ) -> int:
+        """Failures for an entity inside the window"""
+        counter = self._failures.get((entity_type.value, entity_id))
+        return counter.total(window_seconds) if counter else 0
+
+    def duration_stats(
+        self,
+        entity_type: EntityType,
+        entity_id: int,
+        event_type: EventType,
+        window_seconds: float = DURATION_WINDOW_SECONDS
+    ) -> RunningStats:
+        """Count/mean/variance of successful durations inside the window"""
+        stats = self._durations.get((entity_type.value, entity_id, event_type.value))
+        return stats.summary(window_seconds) if stats else RunningStats()
+
+    def duration_percentiles(
+        self,
+        entity_type: EntityType,
+        entity_id: int
+    ) -> Dict[str, Optional[float]]:
+        """p50/p95/p99 duration estimates for an entity"""
+        histogram = self._histograms.get((entity_type.value, entity_id))
+        return histogram.percentiles() if histogram else {"p50": None, "p95": None, "p99": None}
+
+    def get_entity_stats(self, entity_type: EntityType, entity_id: int) -> Dict[str, Any]:
+        """Summary of the rolling aggregates for an entity"""
+        by_event_type = {}
+        for (etype, eid, event_type), stats in self._durations.items():
+            if etype == entity_type.value and eid == entity_id:
+                summary = stats.summary(self.DURATION_WINDOW_SECONDS)
+                by_event_type[event_type] = {
+                    "count": summary.count,
+                    "mean_seconds": summary.mean,
+                    "stddev_seconds": summary.stddev
+                }
+        return {
+            "failures_last_hour": self.failure_count(entity_type, entity_id),
+            "durations": self.duration_percentiles(entity_type, entity_id),
+            "success_durations_7d": by_event_type
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine size counters"""
+        return {
+            "events_observed": self.events_observed,
+            "failure_series": len(self._failures),
+            "duration_series": len(self._durations),
+            "histograms": len(self._histograms),
+            "rebuilt_at": self.rebuilt_at
+        }
+
+    def clear(self):
+        self._failures.clear()
+        self._durations.clear()
+        self._histograms.clear()
+        self.events_observed = 0
+
+    async def rebuild(self, database, chunk_size: int = 5000):
+        """Rebuild the aggregates from the events table"""
+        self.clear()
+        since = datetime.now() - timedelta(seconds=self.DURATION_WINDOW_SECONDS)
+
+        async with database.get_read_connection() as conn:
+            cursor = await conn.execute("""
+                SELECT primary_entity_type, primary_entity_id, event_type,
+                       outcome, duration_seconds, timestamp
+                FROM events
+                WHERE timestamp > ?
+                ORDER BY timestamp
+            """, (since,))
+
+            now = time.time()
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    timestamp = self._parse_timestamp(row['timestamp'])
+                    if timestamp is None:
+                        continue
+                    self.observe(
+                        row['primary_entity_type'],
+                        row['primary_entity_id'],
+                        row['event_type'],
+                        row['outcome'],
+                        row['duration_seconds'] or 0.0,
+                        timestamp,
+                        now=now
+                    )
+            await cursor.close()
+
+        self.rebuilt_at = time.time()
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> Optional[float]:
+        # Events store datetime.fromtimestamp() values, i.e. local time
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.fromisoformat(str(value)).timestamp()
+        except ValueError:
+            return None
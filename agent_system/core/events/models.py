@@ -12,6 +12,11 @@ from .event_types import EventType, EventOutcome, EntityType, CounterType, Revie
 class ResourceUsage(BaseModel):
     """Resource usage metrics for an event"""
     llm_tokens: Optional[int] = None
+    llm_input_tokens: Optional[int] = None
+    llm_output_tokens: Optional[int] = None
+    llm_latency_ms: Optional[float] = None
+    llm_cost: Optional[float] = None  # Relative cost units (ModelSelector.estimate_cost)
+    llm_model: Optional[str] = None
     execution_time_ms: Optional[int] = None
     memory_mb: Optional[float] = None
     cpu_percentage: Optional[float] = None
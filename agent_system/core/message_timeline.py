@@ -0,0 +1,149 @@
+"""
+Task-tree message timelines.
+
+Serves the message history of a task tree (/tasks/tree/{tree_id}/messages)
+in the WebSocket message format the UI also receives live:
+
+1. All of the tree's messages come from one query joining messages to
+   tasks and agents, ordered by timestamp in SQL (by id when paged with
+   `limit`, so no message falls behind the cursor).
+2. A `since` cursor (the last message id the client has) limits the query
+   to new messages, so polling a busy tree only reads what changed.
+3. Messages are never edited once written, so each row's converted form
+   is memoized by message id and agent name; repeated polls of the same
+   history decode no JSON.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .database_manager import database
+
+
+logger = logging.getLogger(__name__)
+
+
+def _metadata(value: Any) -> Dict[str, Any]:
+    """Decode a message's metadata column, tolerating bad or decoded values."""
+    if isinstance(value, dict):
+        return value
+    if not value:
+        return {}
+    try:
+        decoded = json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+    return decoded if isinstance(decoded, dict) else {}
+
+
+def to_websocket_format(row: Dict[str, Any], tree_id: int) -> Dict[str, Any]:
+    """Convert a message row (with agent_name) to the WebSocket message format."""
+    msg_type = (row.get("message_type") or "").lower()
+    msg_content = row.get("content") or ""
+
+    if msg_type == "system_event" and msg_content.startswith("Starting task execution:"):
+        ws_msg_type = "agent_started"
+        content = {
+            "instruction": msg_content.replace("Starting task execution: ", ""),
+            "status": "initializing"
+        }
+    elif msg_type == "error" and msg_content.startswith("Task failed:"):
+        ws_msg_type = "agent_error"
+        content = {"error": msg_content.replace("Task failed: ", "")}
+    elif msg_type == "tool_call":
+        ws_msg_type = "agent_tool_call"
+        metadata = _metadata(row.get("metadata"))
+        content = {
+            "tool_name": metadata.get("tool_name", ""),
+            "tool_input": metadata.get("parameters", {})
+        }
+    elif msg_type == "tool_response":
+        ws_msg_type = "agent_tool_result"
+        metadata = _metadata(row.get("metadata"))
+        content = {
+            "tool_name": metadata.get("tool_name", ""),
+            "tool_output": msg_content.replace("Tool result: ", ""),
+            "success": metadata.get("success", True)
+        }
+    elif msg_type == "agent_response":
+        ws_msg_type = "agent_thinking"
+        content = {"thought": msg_content}
+    else:
+        ws_msg_type = msg_type
+        content = _metadata(row.get("metadata")) or {"message": msg_content}
+
+    return {
+        "id": row.get("id"),
+        "type": ws_msg_type,
+        "task_id": row.get("task_id"),
+        "tree_id": tree_id,
+        "agent_name": row.get("agent_name") or "Unknown",
+        "content": content,
+        "timestamp": row.get("timestamp")
+    }
+
+
+class MessageTimeline:
+    """Loads tree message timelines with one query and memoized conversion."""
+
+    def __init__(self, max_memoized: int = 20000):
+        self.max_memoized = max_memoized
+        # (message id, agent name) -> converted message
+        self._converted: "OrderedDict[Tuple[int, Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self.stats = {
+            "requests": 0,
+            "incremental_requests": 0,
+            "messages_returned": 0,
+            "conversions": 0,
+            "memo_hits": 0,
+            "total_seconds": 0.0
+        }
+
+    async def get(self, tree_id: int, since: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Messages of a tree in timestamp order.
+
+        Pass the returned cursor back as since to get only newer messages;
+        the cursor stays at since when there is nothing new.
+        """
+        started = time.perf_counter()
+        rows = await database.messages.get_tree_timeline(tree_id, after_id=since, limit=limit)
+        messages = [self._convert(row, tree_id) for row in rows]
+
+        self.stats["requests"] += 1
+        self.stats["incremental_requests"] += int(since is not None)
+        self.stats["messages_returned"] += len(messages)
+        self.stats["total_seconds"] += time.perf_counter() - started
+
+        cursor = max((row["id"] for row in rows), default=since)
+        return {"tree_id": tree_id, "messages": messages, "cursor": cursor}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "avg_seconds": self.stats["total_seconds"] / requests if requests else 0.0,
+            "memoized": len(self._converted)
+        }
+
+    def _convert(self, row: Dict[str, Any], tree_id: int) -> Dict[str, Any]:
+        key = (row["id"], row.get("agent_name"))
+        converted = self._converted.get(key)
+        if converted is not None:
+            self._converted.move_to_end(key)
+            self.stats["memo_hits"] += 1
+            return converted
+
+        converted = to_websocket_format(row, tree_id)
+        self.stats["conversions"] += 1
+        self._converted[key] = converted
+        while len(self._converted) > self.max_memoized:
+            self._converted.popitem(last=False)
+        return converted
+
+
+# Global message timeline instance
+message_timeline = MessageTimeline()
@@ -0,0 +1,303 @@
+"""
+Deterministic mock LLM provider.
+
+Stands in for a real model so the runtime can be driven end to end
+without API keys: benchmarks, load tests and local debugging.
+
+Responses come from a MockScript:
+
+- rules: regex patterns matched against the prompt text; the first match
+  answers, and its named groups are available to the templates.
+- responses: scripted replies returned in order (cycling) when no rule
+  matches.
+- default: the reply used when neither applies.
+
+A reply is a content template plus tool calls. Tool calls are written
+into the content as <tool_call> blocks, the same text format the Google
+provider parses, so they exercise the streaming tool-call detection in
+AIModelManager. Templates are formatted with str.format and may use the
+rule's named groups plus {model}, {call} (call number) and
+{prompt_tokens}.
+
+Latency is drawn from a LatencyProfile with a generator seeded from the
+script seed and the request content, so the same request always takes
+the same time. Failures (error_rate) are drawn per attempt of a request,
+so a retried request fails independently, the way transient errors do,
+while a rerun of the same script fails the same attempts. Register the provider with register_mock_provider().
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional, Pattern, Union
+
+from .ai_models import AIModelProvider, AIModelManager
+from .models import AIModelConfig as ModelConfig, MCPToolCall
+from .prompt_builder import estimate_tokens
+
+
+TOOL_CALL_OPEN = "<tool_call>"
+TOOL_CALL_CLOSE = "</tool_call>"
+
+
+@dataclass
+class LatencyProfile:
+    """Simulated response time distribution (milliseconds)."""
+    distribution: str = "fixed"  # fixed, uniform, normal, lognormal, exponential
+    mean_ms: float = 0.0
+    stddev_ms: float = 0.0       # Half-width for uniform
+    min_ms: float = 0.0
+    max_ms: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds."""
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            value = rng.uniform(self.mean_ms - self.stddev_ms, self.mean_ms + self.stddev_ms)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean_ms, self.stddev_ms)
+        elif self.distribution == "lognormal":
+            # Parameterised so the samples have the requested mean and stddev
+            variance = math.log(1 + (self.stddev_ms / self.mean_ms) ** 2)
+            value = rng.lognormvariate(math.log(self.mean_ms) - variance / 2, math.sqrt(variance))
+        elif self.distribution == "exponential":
+            value = rng.expovariate(1.0 / self.mean_ms)
+        else:
+            value = self.mean_ms
+        value = max(value, self.min_ms)
+        if self.max_ms is not None:
+            value = min(value, self.max_ms)
+        return value / 1000.0
+
+
+@dataclass
+class MockResponse:
+    """One scripted reply: content template plus tool calls."""
+    content: str = ""
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)  # {"name": ..., "parameters": {...}}
+
+
+@dataclass
+class MockRule:
+    """Reply with response when pattern matches the prompt text."""
+    pattern: Union[str, Pattern]
+    response: MockResponse
+
+    def __post_init__(self):
+        if isinstance(self.pattern, str):
+            self.pattern = re.compile(self.pattern, re.DOTALL)
+
+
+@dataclass
+class MockScript:
+    """What the mock provider answers and how long it takes."""
+    rules: List[MockRule] = field(default_factory=list)
+    responses: List[MockResponse] = field(default_factory=list)
+    default: MockResponse = field(default_factory=lambda: MockResponse(
+        content="Done with the request. The task is complete.",
+        tool_calls=[{"name": "end_task", "parameters": {"result": {"status": "done", "call": "{call}"}}}]
+    ))
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    error_rate: float = 0.0      # Fraction of calls that raise a transient error
+    stream_chunk_chars: int = 64
+    seed: int = 0
+
+
+def tool_call_block(name: str, parameters: Dict[str, Any], call_id: Optional[str] = None) -> str:
+    """Render a tool call the way text-based providers emit it."""
+    payload = {"name": name, "parameters": parameters}
+    if call_id:
+        payload["id"] = call_id
+    return f"{TOOL_CALL_OPEN}{json.dumps(payload)}{TOOL_CALL_CLOSE}"
+
+
+def default_benchmark_script(
+    latency: Optional[LatencyProfile] = None,
+    seed: int = 0
+) -> MockScript:
+    """
+    Script for runtime benchmarks.
+
+    Every task ends on its first reply, which reports the task complete so
+    the engine finishes it directly (end_task would start the evaluation
+    and summary subtasks of EndTaskProcess).
+    """
+    return MockScript(
+        default=MockResponse(content="Done with the request. The task is complete."),
+        latency=latency or LatencyProfile(),
+        seed=seed
+    )
+
+
+class MockProvider(AIModelProvider):
+    """Scripted provider with configurable latency; no network access."""
+
+    def __init__(self, config: ModelConfig, script: Optional[MockScript] = None):
+        super().__init__(config)
+        self.script = script or MockScript()
+        self.calls = 0
+        # Attempts per prompt, so each retry of a prompt draws its failure afresh
+        self._attempts: Dict[str, int] = {}
+
+    async def initialize(self):
+        self.client = self
+
+    async def generate_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> Dict[str, Any]:
+        """Return the scripted reply after the simulated latency"""
+        prompt = self._prompt_text(messages)
+        rng = self._rng(prompt)
+        self.calls += 1
+        call = self.calls
+
+        await asyncio.sleep(self.script.latency.sample(rng))
+        self._maybe_fail(prompt)
+        return self._render(prompt, call)
+
+    async def stream_response(self,
+                              messages: List[Dict[str, str]],
+                              tools: List[Dict[str, Any]] = None,
+                              **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream the scripted reply in chunks, spreading the latency over them"""
+        prompt = self._prompt_text(messages)
+        rng = self._rng(prompt)
+        self.calls += 1
+        call = self.calls
+
+        latency = self.script.latency.sample(rng)
+        self._maybe_fail(prompt)
+        response = self._render(prompt, call)
+
+        content = response["content"]
+        size = max(self.script.stream_chunk_chars, 1)
+        chunks = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            if chunk:
+                yield {"type": "text", "text": chunk}
+        yield {"type": "done", "response": response}
+
+    def parse_tool_calls(self, response: str) -> List[MCPToolCall]:
+        """Parse <tool_call> blocks, including nested JSON parameters"""
+        tool_calls = []
+        decoder = json.JSONDecoder()
+        position = 0
+        while True:
+            start = response.find(TOOL_CALL_OPEN, position)
+            if start == -1:
+                break
+            start += len(TOOL_CALL_OPEN)
+            end = response.find(TOOL_CALL_CLOSE, start)
+            if end == -1:
+                break
+            position = end + len(TOOL_CALL_CLOSE)
+            try:
+                tool_data, _ = decoder.raw_decode(response[start:end].strip())
+            except json.JSONDecodeError:
+                continue
+            tool_calls.append(MCPToolCall(
+                tool_name=tool_data.get("name", ""),
+                parameters=tool_data.get("parameters", {}),
+                call_id=tool_data.get("id", f"call_{len(tool_calls)}")
+            ))
+        return tool_calls
+
+    # Script evaluation
+
+    def _render(self, prompt: str, call: int) -> Dict[str, Any]:
+        reply, values = self._select(prompt, call)
+        values = {"model": self.config.model, "call": call, "prompt_tokens": estimate_tokens(prompt), **values}
+
+        tool_calls = [
+            MCPToolCall(
+                tool_name=spec["name"],
+                parameters=self._fill(spec.get("parameters", {}), values),
+                call_id=f"mock_{call}_{index}"
+            )
+            for index, spec in enumerate(reply.tool_calls)
+        ]
+        content = self._fill(reply.content, values)
+        if tool_calls:
+            content += "\n" + "\n".join(
+                tool_call_block(tc.tool_name, tc.parameters, tc.call_id) for tc in tool_calls
+            )
+
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(content)
+        return {
+            "content": content,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            },
+            "model": self.config.model,
+            "stop_reason": "tool_use" if tool_calls else "end_turn",
+            "tool_calls": tool_calls
+        }
+
+    def _select(self, prompt: str, call: int):
+        for rule in self.script.rules:
+            match = rule.pattern.search(prompt)
+            if match:
+                return rule.response, {k: v or "" for k, v in match.groupdict().items()}
+        if self.script.responses:
+            return self.script.responses[(call - 1) % len(self.script.responses)], {}
+        return self.script.default, {}
+
+    @classmethod
+    def _fill(cls, template: Any, values: Dict[str, Any]) -> Any:
+        """Format every string in a (nested) template"""
+        if isinstance(template, str):
+            try:
+                return template.format(**values)
+            except (KeyError, IndexError, ValueError):
+                return template
+        if isinstance(template, dict):
+            return {key: cls._fill(value, values) for key, value in template.items()}
+        if isinstance(template, list):
+            return [cls._fill(value, values) for value in template]
+        return template
+
+    def _rng(self, prompt: str, attempt: int = 0) -> random.Random:
+        digest = hashlib.sha256(f"{self.script.seed}:{self.config.model}:{prompt}:{attempt}".encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _maybe_fail(self, prompt: str):
+        if not self.script.error_rate:
+            return
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        attempt = self._attempts.get(key, 0) + 1
+        self._attempts[key] = attempt
+        if self._rng(prompt, attempt).random() < self.script.error_rate:
+            # Worded so the gateway treats it as transient and retries
+            raise Exception("Mock API error: 503 temporarily unavailable")
+
+    @staticmethod
+    def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+        return "\n".join(str(msg.get("content", "")) for msg in messages)
+
+
+def register_mock_provider(
+    manager: AIModelManager,
+    script: Optional[MockScript] = None,
+    name: str = "mock"
+) -> ModelConfig:
+    """
+    Register MockProvider under name and return a config that selects it.
+
+    Instances the manager already created for name are dropped so the
+    new script takes effect.
+    """
+    manager.register_provider(name, functools.partial(MockProvider, script=script))
+    for key in [key for key in manager._instances if key.split(":", 1)[0] == name]:
+        del manager._instances[key]
+    return ModelConfig(provider=name, model=f"{name}-model", temperature=0.0)
@@ -0,0 +1,274 @@
+"""
+Adaptive model routing.
+
+Chooses the Gemini tier (flash-lite, flash, pro) for each agent call
+instead of using one fixed model per agent. The agent's preferred model
+(AGENT_MODEL_PREFERENCES, or its own ai_model_config) is the starting
+point, adjusted one tier at a time by:
+
+- instruction length: short instructions go down, long ones go up
+- task depth: deep subtasks are narrow and go down
+- success history: agents below settings.model_routing_min_success_rate
+  go up. Outcomes observed here take precedence once there are enough of
+  them; until then the latest success_rate metric in entity_effectiveness
+  is used.
+- latency SLO: while the mean latency observed for the chosen model
+  (from the usage ledger) exceeds the SLO, step down
+
+Routing never goes more than one tier below the preference. A call that
+fails on a cheaper model is escalated one tier (escalate()), up to
+settings.model_routing_max_escalations times. Explicit model choices in
+task metadata ("model"), non-Gemini agent configs and a non-Gemini default
+provider are respected as is.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from config.database import db_manager
+from config.model_config import AGENT_MODEL_PREFERENCES, GEMINI_MODEL_TIERS, ModelSelector
+from .models import AIModelConfig as ModelConfig
+from .ai_models import ai_model_manager
+from .prompt_builder import estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+ROUTED_PROVIDER = "google"
+
+
+@dataclass
+class RoutingDecision:
+    """The model chosen for a call and why."""
+    model_config: ModelConfig
+    tier: int = -1               # Index into GEMINI_MODEL_TIERS, -1 when pinned
+    floor: int = 0               # Cheapest tier routing considered
+    pinned: bool = False         # Explicit choice; never re-routed or escalated
+    escalations: int = 0
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def model_key(self) -> str:
+        return f"{self.model_config.provider}:{self.model_config.model}"
+
+
+class ModelRouter:
+    """Picks a model tier per call and escalates after failures."""
+
+    def __init__(self, database=None, usage_ledger=None, refresh_seconds: float = 300.0, min_samples: int = 5):
+        self.database = database
+        self.usage_ledger = usage_ledger
+        self.refresh_seconds = refresh_seconds
+        self.min_samples = min_samples
+
+        # agent name -> success_rate metric from entity_effectiveness
+        self._effectiveness: Dict[str, float] = {}
+        self._refreshed_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # (agent name, model) -> [successes, attempts]
+        self._outcomes: Dict[Tuple[str, str], List[int]] = {}
+
+        self.stats = {
+            "routed": 0,
+            "pinned": 0,
+            "escalations": 0,
+            "slo_downgrades": 0,
+            "by_model": {}
+        }
+
+    async def route(
+        self,
+        agent_name: str,
+        instruction: str,
+        depth: Optional[int] = None,
+        agent_config: Optional[ModelConfig] = None,
+        task_metadata: Optional[Dict[str, Any]] = None,
+        preview: bool = False
+    ) -> RoutingDecision:
+        """Choose the model for an agent call (preview decisions are not counted)."""
+        metadata = task_metadata or {}
+        self._refresh_in_background()
+
+        pinned = self._pinned_config(agent_config, metadata)
+        if pinned is not None:
+            self.stats["pinned"] += int(not preview)
+            return RoutingDecision(model_config=pinned, pinned=True, reasons=["pinned"])
+
+        preferred = self._preferred_model(agent_name, agent_config, metadata)
+        preference = ModelSelector.get_tier(preferred)
+        tier = preference
+        reasons = [f"preference:{preferred}"]
+
+        tokens = estimate_tokens(instruction or "")
+        if tokens <= settings.model_routing_short_instruction_tokens:
+            tier -= 1
+            reasons.append("short_instruction")
+        elif tokens > settings.model_routing_long_instruction_tokens:
+            tier += 1
+            reasons.append("long_instruction")
+
+        if depth is not None and depth >= settings.model_routing_deep_task_depth:
+            tier -= 1
+            reasons.append(f"depth:{depth}")
+
+        success_rate = self.success_rate(agent_name)
+        if success_rate is not None and success_rate < settings.model_routing_min_success_rate:
+            tier += 1
+            reasons.append(f"success_rate:{success_rate:.2f}")
+
+        floor = max(preference - 1, 0)
+        tier = min(max(tier, floor), len(GEMINI_MODEL_TIERS) - 1)
+
+        slo_ms = metadata.get("latency_slo_ms") or settings.model_latency_slo_ms
+        if slo_ms:
+            while tier > floor:
+                latency = self.expected_latency_ms(GEMINI_MODEL_TIERS[tier])
+                if latency is None or latency <= slo_ms:
+                    break
+                tier -= 1
+                self.stats["slo_downgrades"] += int(not preview)
+                reasons.append(f"latency_slo:{latency:.0f}ms")
+
+        self.stats["routed"] += int(not preview)
+        return RoutingDecision(
+            model_config=self._config_for(GEMINI_MODEL_TIERS[tier], agent_config),
+            tier=tier,
+            floor=floor,
+            reasons=reasons
+        )
+
+    def escalate(self, decision: RoutingDecision) -> Optional[RoutingDecision]:
+        """The next tier up after a failed call, or None if there is none."""
+        if decision.pinned or decision.escalations >= settings.model_routing_max_escalations:
+            return None
+        model = ModelSelector.next_tier(decision.model_config.model)
+        if not model:
+            return None
+        self.stats["escalations"] += 1
+        return replace(
+            decision,
+            model_config=decision.model_config.model_copy(update={"model": model}),
+            tier=decision.tier + 1,
+            escalations=decision.escalations + 1,
+            reasons=decision.reasons + [f"escalated:{decision.model_config.model}"]
+        )
+
+    def record_outcome(self, agent_name: str, model: str, success: bool):
+        """Count a call's outcome towards the agent's success rate."""
+        counts = self._outcomes.setdefault((agent_name, model), [0, 0])
+        counts[0] += int(success)
+        counts[1] += 1
+        by_model = self.stats["by_model"].setdefault(model, {"calls": 0, "failures": 0})
+        by_model["calls"] += 1
+        by_model["failures"] += int(not success)
+
+    def success_rate(self, agent_name: str) -> Optional[float]:
+        """Observed success rate across models, else the stored metric."""
+        successes = attempts = 0
+        for (name, _), (ok, total) in self._outcomes.items():
+            if name == agent_name:
+                successes += ok
+                attempts += total
+        if attempts >= self.min_samples:
+            return successes / attempts
+        return self._effectiveness.get(agent_name)
+
+    def expected_latency_ms(self, model: str) -> Optional[float]:
+        """Mean latency observed for a routed model, if there is enough data."""
+        if self.usage_ledger is None:
+            return None
+        totals = self.usage_ledger.by_model.get(f"{ROUTED_PROVIDER}:{model}")
+        if not totals:
+            return None
+        calls = totals["calls"] - totals["cached_calls"]
+        if calls < self.min_samples:
+            return None
+        return totals["latency_ms"] / calls
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": settings.model_routing_enabled,
+            "agents_with_effectiveness": len(self._effectiveness)
+        }
+
+    # Internals
+
+    def _pinned_config(self, agent_config: Optional[ModelConfig], metadata: Dict[str, Any]) -> Optional[ModelConfig]:
+        if metadata.get("model"):
+            return ModelConfig(
+                provider=metadata.get("model_provider", settings.default_model_provider),
+                model=metadata["model"],
+                temperature=settings.default_temperature,
+                max_tokens=settings.default_max_tokens
+            )
+        if agent_config and (agent_config.provider != ROUTED_PROVIDER or ModelSelector.get_tier(agent_config.model) < 0):
+            return agent_config
+        if agent_config is None and settings.default_model_provider != ROUTED_PROVIDER:
+            # A non-Gemini default (e.g. the benchmark's mock provider) is used as is
+            return ai_model_manager.resolve_model_config(None)
+        if not settings.model_routing_enabled:
+            return agent_config or self._config_for(self._preferred_model("", None, metadata), None)
+        return None
+
+    @staticmethod
+    def _preferred_model(agent_name: str, agent_config: Optional[ModelConfig], metadata: Dict[str, Any]) -> str:
+        for model in (
+            metadata.get("model_preference"),
+            agent_config.model if agent_config else None,
+            AGENT_MODEL_PREFERENCES.get(agent_name),
+            settings.default_model_name
+        ):
+            if model and ModelSelector.get_tier(model) >= 0:
+                return model
+        return GEMINI_MODEL_TIERS[1]
+
+    @staticmethod
+    def _config_for(model: str, agent_config: Optional[ModelConfig]) -> ModelConfig:
+        if agent_config:
+            return agent_config.model_copy(update={"provider": ROUTED_PROVIDER, "model": model})
+        return ModelConfig(
+            provider=ROUTED_PROVIDER,
+            model=model,
+            temperature=settings.default_temperature,
+            max_tokens=settings.default_max_tokens
+        )
+
+    def _refresh_in_background(self):
+        if self.database is None or time.time() - self._refreshed_at < self.refresh_seconds:
+            return
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refreshed_at = time.time()
+        self._refresh_task = asyncio.ensure_future(self._refresh_effectiveness())
+
+    async def _refresh_effectiveness(self):
+        """Load the latest success_rate metric per agent."""
+        try:
+            rows = await self.database.execute_query(
+                """
+                SELECT a.name AS agent_name, ee.metric_value AS success_rate
+                FROM entity_effectiveness ee
+                JOIN agents a ON a.id = ee.entity_id
+                WHERE ee.entity_type = 'agent' AND ee.metric_name = 'success_rate'
+                  AND ee.measured_at = (
+                      SELECT MAX(latest.measured_at) FROM entity_effectiveness latest
+                      WHERE latest.entity_type = 'agent' AND latest.entity_id = ee.entity_id
+                        AND latest.metric_name = 'success_rate'
+                  )
+                """
+            )
+            self._effectiveness = {row["agent_name"]: row["success_rate"] for row in rows}
+        except Exception as e:
+            # Databases without the entity framework tables just route without history
+            logger.debug(f"Agent effectiveness unavailable for routing: {e}")
+
+
+# Global model router instance
+model_router = ModelRouter(database=db_manager, usage_ledger=ai_model_manager.usage_ledger)
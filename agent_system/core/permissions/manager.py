@@ -126,7 +126,7 @@ class DatabasePermissionManager:
                     assigned_at = CURRENT_TIMESTAMP
                 WHERE task_id = ? AND tool_name = ?
             """
-            await self.db.execute_query(update_query, [
+            await self.db.execute_command(update_query, [
                 expires_at, tool_assignment.assignment_reason, tool_permissions_json,
                 task_id, tool_assignment.tool_name
             ])
@@ -137,7 +137,7 @@ class DatabasePermissionManager:
                 (task_id, tool_name, tool_permissions, assigned_by_agent_id, expires_at, assignment_reason)
                 VALUES (?, ?, ?, ?, ?, ?)
             """
-            await self.db.execute_query(insert_query, [
+            await self.db.execute_command(insert_query, [
                 task_id, tool_assignment.tool_name, tool_permissions_json,
                 assigned_by, expires_at, tool_assignment.assignment_reason
             ])
@@ -183,7 +183,7 @@ class DatabasePermissionManager:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        await self.db.execute_query(query, [
+        await self.db.execute_command(query, [
             task_id, agent_type, tool_name, operation, 
             1 if success else 0, execution_time_ms, 
             parameters_hash, result_summary, error_message
@@ -197,7 +197,7 @@ class DatabasePermissionManager:
             WHERE task_id = ? AND tool_name = ?
         """
         
-        await self.db.execute_query(query, [task_id, tool_name])
+        await self.db.execute_command(query, [task_id, tool_name])
         
         # Clear cache
         self._clear_cache_for_task(task_id)
@@ -213,7 +213,7 @@ class DatabasePermissionManager:
             WHERE expires_at IS NOT NULL AND expires_at <= datetime('now')
             AND is_active = 1
         """
-        result = await self.db.execute_query(query)
+        result = await self.db.execute_command(query)
         
         # Clear entire cache after cleanup
         self._permission_cache.clear()
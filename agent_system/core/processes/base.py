@@ -3,7 +3,6 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
-import asyncio
 import logging
 from dataclasses import dataclass
 
@@ -11,6 +10,7 @@ from ..entities.entity_manager import EntityManager
 from ..entities.task_entity import TaskEntity, TaskState
 from ..events.event_manager import EventManager
 from ..events.event_types import EventType, EntityType
+from ..runtime.task_notifications import task_notifier, TaskCompletion
 
 
 logger = logging.getLogger(__name__)
@@ -178,52 +178,52 @@ class SystemFunctions:
         task_ids: List[int],
         timeout: Optional[int] = None
     ) -> List[ProcessResult]:
-        """Wait for completion of specified tasks."""
-        results = []
+        """Wait for completion of specified tasks.
         
-        # Set up timeout if specified
-        start_time = datetime.now()
+        Waiters are woken by the task completion notifier as soon as a task
+        reaches a terminal state; results are returned in task_ids order.
+        """
+        completions = await task_notifier.wait_for(
+            task_ids,
+            timeout=timeout,
+            lookup=self.get_task_completion
+        )
         
-        while task_ids:
-            remaining_tasks = []
-            
-            for task_id in task_ids:
-                task = await self.get_task(task_id)
-                if task and task.task_state in [TaskState.COMPLETED, TaskState.FAILED]:
-                    # Task is done
-                    if task.task_state == TaskState.COMPLETED:
-                        results.append(ProcessResult(
-                            status="success",
-                            data=task.result or {}
-                        ))
-                    else:
-                        results.append(ProcessResult(
-                            status="failure",
-                            data={},
-                            error=task.error
-                        ))
-                else:
-                    remaining_tasks.append(task_id)
-            
-            task_ids = remaining_tasks
-            
-            if task_ids:
-                # Check timeout
-                if timeout and (datetime.now() - start_time).seconds > timeout:
-                    # Timeout reached
-                    for task_id in task_ids:
-                        results.append(ProcessResult(
-                            status="failure",
-                            data={},
-                            error="Timeout waiting for task completion"
-                        ))
-                    break
-                
-                # Wait before checking again
-                await asyncio.sleep(0.5)
+        results = []
+        for task_id in task_ids:
+            completion = completions.get(task_id)
+            if completion is None:
+                results.append(ProcessResult(
+                    status="failure",
+                    data={},
+                    error="Timeout waiting for task completion"
+                ))
+            elif completion.succeeded:
+                results.append(ProcessResult(
+                    status="success",
+                    data=completion.result or {}
+                ))
+            else:
+                results.append(ProcessResult(
+                    status="failure",
+                    data={},
+                    error=completion.error
+                ))
         
         return results
     
+    async def get_task_completion(self, task_id: int) -> Optional[TaskCompletion]:
+        """Get the terminal state of a task, or None if it is still running."""
+        task = await self.get_task(task_id)
+        if task and task.task_state in [TaskState.COMPLETED, TaskState.FAILED]:
+            return TaskCompletion(
+                task_id=task_id,
+                state=task.task_state.value,
+                result=task.result,
+                error=task.error
+            )
+        return None
+    
     async def get_task_result(self, task_id: int) -> Optional[ProcessResult]:
         """Get result of a completed task."""
         task = await self.get_task(task_id)
@@ -6,7 +6,6 @@ and framework establishment. This process ensures the system is properly initial
 before autonomous operation.
 """
 
-import asyncio
 import logging
 import json
 from typing import Dict, Any, List, Optional
@@ -17,6 +16,7 @@ from ..system_interface import SystemInterface
 from ..database_models import Task, TaskStatus
 from ..knowledge.bootstrap import bootstrap_knowledge_system
 from ..initialization_tasks import get_initialization_tasks, get_tasks_by_phase, get_phase_descriptions
+from ..runtime.task_notifications import task_notifier, TaskCompletion
 
 logger = logging.getLogger(__name__)
 
@@ -239,32 +239,30 @@ class SystemInitializationProcess(BaseProcess):
     
     async def _wait_for_subtask(self, subtask_id: int, timeout: int = 3600) -> Dict[str, Any]:
         """Wait for a subtask to complete with timeout."""
-        start_time = asyncio.get_event_loop().time()
+        async def lookup(task_id: int) -> Optional[TaskCompletion]:
+            subtask = await self.sys.get_task(task_id)
+            if subtask and subtask.status in ["completed", "failed"]:
+                return TaskCompletion(task_id, subtask.status, result=subtask.result)
+            return None
         
-        while True:
-            # Check task status
-            subtask = await self.sys.get_task(subtask_id)
-            
-            if subtask.status in ["completed", "failed"]:
-                return {
-                    "status": subtask.status,
-                    "result": subtask.result
-                }
-            
-            # Check timeout
-            if asyncio.get_event_loop().time() - start_time > timeout:
-                await self.sys.log(
-                    subtask_id,
-                    "error",
-                    f"Subtask {subtask_id} timed out"
-                )
-                return {
-                    "status": "failed",
-                    "error": "timeout"
-                }
-            
-            # Wait before checking again
-            await asyncio.sleep(5)
+        completions = await task_notifier.wait_for([subtask_id], timeout=timeout, lookup=lookup)
+        completion = completions[subtask_id]
+        
+        if completion is None:
+            await self.sys.log(
+                subtask_id,
+                "error",
+                f"Subtask {subtask_id} timed out"
+            )
+            return {
+                "status": "failed",
+                "error": "timeout"
+            }
+        
+        return {
+            "status": completion.state,
+            "result": completion.result
+        }
     
     async def _validate_system_readiness(self, task_id: int) -> Dict[str, Any]:
         """Validate that the system is ready for autonomous operation."""
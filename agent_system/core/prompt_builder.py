@@ -0,0 +1,256 @@
+"""
+Token-budgeted prompt assembly.
+
+Prompts are split into a stable prefix and a volatile suffix:
+
+- prefix: agent header and instruction, context documents, tool list.
+  It is identical for every call an agent makes with the same
+  definitions, so providers can cache it (sent as a system message
+  flagged "cacheable"; see AnthropicProvider for the cache marker).
+- suffix: current task, conversation history, recursion warning.
+
+Rendered segments are memoized by content hash, so repeated calls only
+render what changed. Token counts are estimated (about four characters
+per token) and the assembled prompt is kept within a budget derived from
+the model's context window. When it does not fit, the oldest history
+goes first and then context documents are truncated or dropped; the
+agent header, tools and task are always kept.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config.model_config import ModelSelector
+from config.settings import settings
+
+
+CHARS_PER_TOKEN = 4
+
+# Documents are only truncated when at least this many tokens remain for them
+MIN_DOCUMENT_TOKENS = 256
+
+TRUNCATION_MARKER = "\n[... truncated to fit the context budget]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budget decisions."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class PromptSegment:
+    """A rendered piece of a prompt."""
+    text: str
+    tokens: int
+
+
+@dataclass
+class BuiltPrompt:
+    """An assembled prompt with its stable prefix and volatile suffix."""
+    prefix: str
+    suffix: str
+    prefix_tokens: int
+    suffix_tokens: int
+    budget: int
+    prefix_hash: str
+    omitted: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    @property
+    def tokens(self) -> int:
+        return self.prefix_tokens + self.suffix_tokens
+
+    def to_messages(self) -> List[Dict[str, Any]]:
+        """Provider messages; the prefix is flagged for provider-side caching."""
+        messages: List[Dict[str, Any]] = []
+        if self.prefix:
+            messages.append({"role": "system", "content": self.prefix, "cacheable": True})
+        messages.append({"role": "user", "content": self.suffix})
+        return messages
+
+
+class PromptBuilder:
+    """Assembles agent prompts from memoized segments within a token budget."""
+
+    def __init__(self, max_segments: int = 1024, max_history_messages: int = 10):
+        self.max_segments = max_segments
+        self.max_history_messages = max_history_messages
+        self._segments: "OrderedDict[str, PromptSegment]" = OrderedDict()
+        self._recent_prefixes: "OrderedDict[str, None]" = OrderedDict()
+        self.stats = {
+            "builds": 0,
+            "segment_hits": 0,
+            "segment_misses": 0,
+            "prefix_reuses": 0,
+            "over_budget": 0,
+            "truncated_documents": 0,
+            "dropped_documents": 0,
+            "dropped_messages": 0
+        }
+
+    def budget_for(self, model: str, max_output_tokens: Optional[int] = None, cap: int = 0) -> int:
+        """Prompt budget: the model's context window minus the reserved output."""
+        budget = ModelSelector.get_context_window(model) - (max_output_tokens or 0)
+        if cap > 0:
+            budget = min(budget, cap)
+        return max(budget, 0)
+
+    def build(self, context: Any, budget: int) -> BuiltPrompt:
+        """Assemble the prompt for an AgentExecutionContext."""
+        self.stats["builds"] += 1
+        omitted: List[str] = []
+
+        agent = context.agent
+        header = self._segment(
+            ("header", agent.name, agent.instruction),
+            lambda: f"You are {agent.name}.\n\n{agent.instruction}\n\n"
+        )
+        tools = self._render_tools(context.available_tools)
+        task = self._segment(
+            ("task", context.task.instruction),
+            lambda: f"Current Task: {context.task.instruction}\n\n"
+        )
+
+        warning = ""
+        recursion_depth = context.parent_context.get('recursion_depth', 0) if context.parent_context else 0
+        if recursion_depth > 5:
+            warning = f"\nWARNING: You are at recursion depth {recursion_depth}. Consider completing soon to avoid infinite loops.\n"
+
+        remaining = budget - header.tokens - tools.tokens - task.tokens - estimate_tokens(warning)
+
+        # Conversation history, newest first until the budget runs out
+        history_lines: List[str] = []
+        message_history = context.execution_metadata.get('message_history', [])
+        recent = message_history[-self.max_history_messages:] if self.max_history_messages else []
+        for position, msg_dict in enumerate(reversed(recent)):
+            line = self._history_line(msg_dict)
+            if not line:
+                continue
+            tokens = estimate_tokens(line)
+            if not history_lines:
+                tokens += estimate_tokens("Conversation History:\n\n")
+            if tokens > remaining:
+                # This message and everything older is left out
+                older = len(recent) - position
+                self.stats["dropped_messages"] += older
+                omitted.append(f"messages:{older}")
+                break
+            history_lines.append(line)
+            remaining -= tokens
+        history = ""
+        if history_lines:
+            history = "Conversation History:\n" + "".join(reversed(history_lines)) + "\n"
+
+        # Context documents in their listed order, truncated or dropped if needed
+        documents: List[str] = []
+        if context.context_documents:
+            remaining -= estimate_tokens("Available Context:\n\n")
+        for doc in context.context_documents:
+            segment = self._segment(
+                ("document", doc.id, doc.name, doc.title, doc.content),
+                lambda doc=doc: f"\n{doc.title}:\n{doc.content}\n"
+            )
+            if segment.tokens <= remaining:
+                documents.append(segment.text)
+                remaining -= segment.tokens
+            elif remaining >= MIN_DOCUMENT_TOKENS:
+                keep = (remaining * CHARS_PER_TOKEN) - len(doc.title) - len(TRUNCATION_MARKER) - 4
+                text = f"\n{doc.title}:\n{doc.content[:max(keep, 0)]}{TRUNCATION_MARKER}"
+                documents.append(text)
+                remaining -= estimate_tokens(text)
+                self.stats["truncated_documents"] += 1
+                omitted.append(f"document:{doc.name}:truncated")
+            else:
+                self.stats["dropped_documents"] += 1
+                omitted.append(f"document:{doc.name}")
+
+        prefix = header.text
+        if documents:
+            prefix += "Available Context:\n" + "".join(documents) + "\n"
+        prefix += tools.text
+        suffix = task.text + history + warning
+
+        if remaining < 0:
+            self.stats["over_budget"] += 1
+
+        prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        self._note_prefix(prefix_hash)
+
+        return BuiltPrompt(
+            prefix=prefix,
+            suffix=suffix,
+            prefix_tokens=estimate_tokens(prefix),
+            suffix_tokens=estimate_tokens(suffix),
+            budget=budget,
+            prefix_hash=prefix_hash,
+            omitted=omitted
+        )
+
+    # Segments
+
+    def _render_tools(self, tools: List[Any]) -> PromptSegment:
+        if not tools:
+            return PromptSegment("", 0)
+        listing = [(tool.name, tool.description) for tool in tools]
+
+        def render():
+            lines = "".join(f"- {name}: {description}\n" for name, description in listing)
+            return f"Available Tools:\n{lines}\n"
+
+        return self._segment(("tools", listing), render)
+
+    @staticmethod
+    def _history_line(msg_dict: Dict[str, Any]) -> str:
+        msg_type = msg_dict.get('message_type')
+        if msg_type == "agent_response":
+            return f"Assistant: {msg_dict.get('content', '')}\n"
+        if msg_type == "tool_call":
+            return f"Tool Call: {(msg_dict.get('metadata') or {}).get('tool_name', 'unknown')}\n"
+        if msg_type == "tool_response":
+            return f"Tool Result: {msg_dict.get('content', '')}\n"
+        return ""
+
+    def _segment(self, parts: Any, render: Callable[[], str]) -> PromptSegment:
+        """Render a segment once per distinct content."""
+        canonical = json.dumps(parts, sort_keys=True, default=str)
+        key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        segment = self._segments.get(key)
+        if segment is not None:
+            self._segments.move_to_end(key)
+            self.stats["segment_hits"] += 1
+            return segment
+
+        self.stats["segment_misses"] += 1
+        text = render()
+        segment = PromptSegment(text, estimate_tokens(text))
+        self._segments[key] = segment
+        while len(self._segments) > self.max_segments:
+            self._segments.popitem(last=False)
+        return segment
+
+    def _note_prefix(self, prefix_hash: str):
+        if prefix_hash in self._recent_prefixes:
+            self._recent_prefixes.move_to_end(prefix_hash)
+            self.stats["prefix_reuses"] += 1
+            return
+        self._recent_prefixes[prefix_hash] = None
+        while len(self._recent_prefixes) > self.max_segments:
+            self._recent_prefixes.popitem(last=False)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        lookups = self.stats["segment_hits"] + self.stats["segment_misses"]
+        return {
+            **self.stats,
+            "segment_hit_rate": self.stats["segment_hits"] / lookups if lookups else 0.0,
+            "segments": len(self._segments)
+        }
+
+
+# Global prompt builder instance
+prompt_builder = PromptBuilder(max_history_messages=settings.prompt_history_messages)
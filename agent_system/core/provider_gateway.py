@@ -0,0 +1,345 @@
+"""
+Gateway between AIModelManager and the provider SDKs.
+
+Every provider call goes through three layers:
+
+1. Single-flight: identical requests already in flight share one call
+   instead of each hitting the API.
+2. Rate limiting: token buckets for requests and tokens per minute,
+   looked up as "provider:model", then "model", then "provider" (the
+   same order as the agent concurrency budgets). Callers wait for
+   capacity instead of provoking 429s; the wait is recorded.
+3. Retry: rate-limit, overload, timeout and 5xx errors are retried with
+   jittered exponential backoff, honouring Retry-After when the error
+   carries one. Other errors propagate immediately.
+
+The gateway only sees callables, so it can be exercised against any
+stand-in provider.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from .events.event_stats import DurationHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Status codes count only where the message reports one ("Error code: 529",
+# "status 503", or leading as in "503 UNAVAILABLE"), not any number in the text
+RETRYABLE_MESSAGE = re.compile(
+    r"(?:^|\b(?:status(?: code)?|error code|http))[ :=]*(?:408|409|429|500|502|503|504|529)\b|"
+    r"rate.?limit|overloaded|resource.?exhausted|"
+    r"quota|timed? ?out|temporarily unavailable|connection (reset|error)",
+    re.IGNORECASE
+)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; callers wait in FIFO order for capacity."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Take amount units, sleeping until the bucket holds enough."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+    def adjust(self, amount: float):
+        """Correct an earlier estimate (negative returns capacity)."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+@dataclass
+class RateLimit:
+    """Request and token buckets for one provider/model key."""
+    requests: Optional[TokenBucket] = None
+    tokens: Optional[TokenBucket] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimit":
+        rpm = config.get("rpm") or config.get("requests_per_minute")
+        tpm = config.get("tpm") or config.get("tokens_per_minute")
+        return cls(
+            requests=TokenBucket(rpm) if rpm else None,
+            tokens=TokenBucket(tpm) if tpm else None
+        )
+
+
+@dataclass
+class GatewayMetrics:
+    """Counters and wait times for one provider/model key."""
+    calls: int = 0
+    coalesced: int = 0
+    retries: int = 0
+    failures: int = 0
+    throttled: int = 0
+    queue_wait: DurationHistogram = field(default_factory=DurationHistogram)
+    latency: DurationHistogram = field(default_factory=DurationHistogram)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "queue_wait": self.queue_wait.percentiles(),
+            "latency": self.latency.percentiles()
+        }
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient provider errors worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    return bool(RETRYABLE_MESSAGE.search(str(error)))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-suggested delay, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class _SharedCall:
+    """A coalesced provider call and how many callers await it."""
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ProviderGateway:
+    """Rate limiting, retries and request coalescing for provider calls."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limits: Dict[str, RateLimit] = {}
+        self.metrics: Dict[str, GatewayMetrics] = {}
+        self._inflight: Dict[str, _SharedCall] = {}
+        self.configure(limits or {})
+
+    def configure(self, limits: Dict[str, Dict[str, Any]]):
+        """Replace the rate limits (buckets start full)."""
+        self.limits = {key: RateLimit.from_config(config) for key, config in limits.items()}
+
+    def limit_for(self, model_key: str) -> Optional[RateLimit]:
+        provider, _, model = model_key.partition(":")
+        for candidate in (model_key, model, provider):
+            if candidate and candidate in self.limits:
+                return self.limits[candidate]
+        return None
+
+    async def call(
+        self,
+        model_key: str,
+        func: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        coalesce_key: Optional[str] = None,
+        actual_tokens: Optional[Callable[[Any], int]] = None
+    ) -> Any:
+        """
+        Run func under the limits for model_key, retrying transient errors.
+
+        Concurrent calls with the same coalesce_key share one call and its
+        outcome (the same result object); the call is cancelled only once
+        every caller sharing it is. actual_tokens, given the result,
+        corrects the token bucket for the difference from estimated_tokens.
+        """
+        metrics = self._metrics_for(model_key)
+        if coalesce_key is not None:
+            shared = self._inflight.get(coalesce_key)
+            if shared is None:
+                # The call runs as its own task so no single caller's cancellation ends it
+                shared = _SharedCall(asyncio.ensure_future(
+                    self._call(model_key, func, estimated_tokens, actual_tokens, metrics)
+                ))
+                self._inflight[coalesce_key] = shared
+                shared.task.add_done_callback(lambda task: self._finish_shared(coalesce_key, shared))
+            else:
+                metrics.coalesced += 1
+            shared.waiters += 1
+            try:
+                return await asyncio.shield(shared.task)
+            except asyncio.CancelledError:
+                # Stop the provider call only when every caller has gone
+                if shared.task.cancelled():
+                    raise
+                shared.waiters -= 1
+                if shared.waiters == 0:
+                    shared.task.cancel()
+                raise
+
+        return await self._call(model_key, func, estimated_tokens, actual_tokens, metrics)
+
+    async def stream(
+        self,
+        model_key: str,
+        open_stream: Callable[[], AsyncIterator[Any]],
+        estimated_tokens: int = 0,
+        actual_tokens: Optional[Callable[[Any], Optional[int]]] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate a streaming call under the limits for model_key.
+        
+        Transient errors are retried only until the first item has been
+        yielded; after that the caller has seen partial output and the
+        error propagates. actual_tokens is applied to every item and
+        settles the token bucket on the first non-None result.
+        """
+        metrics = self._metrics_for(model_key)
+        attempt = 0
+        while True:
+            await self._acquire(model_key, estimated_tokens, metrics)
+            metrics.calls += 1
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for item in open_stream():
+                    yielded = True
+                    if actual_tokens is not None and estimated_tokens:
+                        used = actual_tokens(item)
+                        if used is not None:
+                            self._settle_tokens(model_key, estimated_tokens, used)
+                    yield item
+            except Exception as e:
+                attempt += 1
+                if yielded or attempt > self.max_retries or not is_retryable(e):
+                    metrics.failures += 1
+                    raise
+                metrics.retries += 1
+                delay = self.backoff(attempt, e)
+                logger.warning(
+                    f"Provider stream from {model_key} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            metrics.latency.add(time.monotonic() - started)
+            return
+
+    def _finish_shared(self, coalesce_key: str, shared: "_SharedCall"):
+        if self._inflight.get(coalesce_key) is shared:
+            del self._inflight[coalesce_key]
+        # Mark the exception retrieved when every caller had gone
+        if not shared.task.cancelled():
+            shared.task.exception()
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Delay before retry number attempt (1-based), with full jitter."""
+        suggested = retry_after(error) if error is not None else None
+        if suggested is not None:
+            return min(suggested, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def _call(
+        self,
+        model_key: str,
+        func: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        actual_tokens: Optional[Callable[[Any], int]],
+        metrics: GatewayMetrics
+    ) -> Any:
+        attempt = 0
+        while True:
+            await self._acquire(model_key, estimated_tokens, metrics)
+            metrics.calls += 1
+            started = time.monotonic()
+            try:
+                result = await func()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    metrics.failures += 1
+                    raise
+                metrics.retries += 1
+                delay = self.backoff(attempt, e)
+                logger.warning(
+                    f"Provider call to {model_key} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            metrics.latency.add(time.monotonic() - started)
+            if actual_tokens is not None and estimated_tokens:
+                self._settle_tokens(model_key, estimated_tokens, actual_tokens(result))
+            return result
+
+    async def _acquire(self, model_key: str, estimated_tokens: int, metrics: GatewayMetrics) -> float:
+        limit = self.limit_for(model_key)
+        started = time.monotonic()
+        if limit is not None:
+            if limit.requests is not None:
+                await limit.requests.acquire(1)
+            if limit.tokens is not None and estimated_tokens:
+                await limit.tokens.acquire(estimated_tokens)
+        waited = time.monotonic() - started
+        metrics.queue_wait.add(waited)
+        if waited > 0.001:
+            metrics.throttled += 1
+        return waited
+
+    def _settle_tokens(self, model_key: str, estimated: int, actual: Optional[int]):
+        limit = self.limit_for(model_key)
+        if limit is None or limit.tokens is None or not actual:
+            return
+        limit.tokens.adjust(actual - estimated)
+
+    def _metrics_for(self, model_key: str) -> GatewayMetrics:
+        metrics = self.metrics.get(model_key)
+        if metrics is None:
+            metrics = self.metrics[model_key] = GatewayMetrics()
+        return metrics
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "limits": {
+                key: {
+                    "rpm": limit.requests.rate * 60 if limit.requests else None,
+                    "tpm": limit.tokens.rate * 60 if limit.tokens else None
+                }
+                for key, limit in self.limits.items()
+            },
+            "models": {key: metrics.summary() for key, metrics in self.metrics.items()}
+        }
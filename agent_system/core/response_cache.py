@@ -0,0 +1,265 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 of everything that determines the output
+of a call: provider, model, temperature, max_tokens, the messages and the
+tool schemas. Lookups go through an in-memory LRU first and then the
+llm_response_cache table (migration 017), whose hits are promoted back
+into memory. Only near-deterministic calls are eligible (temperature at or
+below a threshold), and every entry expires after its TTL.
+
+Like core.entity_cache this module has no imports from the rest of core;
+the persistent tier talks to any object with execute_query/execute_command
+(config.database.db_manager in practice).
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_TABLE = "llm_response_cache"
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    temperature: Optional[float],
+    max_tokens: Optional[int],
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> str:
+    """Hash the parts of a request that determine the response."""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "messages": messages,
+        "tools": tools or [],
+        "extra": extra or {}
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache."""
+
+    def __init__(
+        self,
+        database=None,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400.0,
+        max_temperature: float = 0.2,
+        enabled: bool = True
+    ):
+        self.database = database
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+
+        # key -> (response, expires_at)
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._table_available = False
+        self._table_checked_at = 0.0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "ineligible": 0,
+            "expired": 0,
+            "errors": 0,
+            "tokens_saved": 0
+        }
+
+    def is_eligible(self, temperature: Optional[float], stream: bool = False) -> bool:
+        """Only cache calls that should give the same answer twice."""
+        eligible = self.enabled and not stream and (temperature or 0.0) <= self.max_temperature
+        if not eligible:
+            self.stats["ineligible"] += 1
+        return eligible
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response in memory, then on disk."""
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._record_hit("memory_hits", response)
+                return response
+            del self._memory[key]
+            self.stats["expired"] += 1
+
+        response = await self._disk_get(key, now)
+        if response is not None:
+            self._record_hit("disk_hits", response)
+            return response
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        provider: str = "",
+        model: str = "",
+        ttl_seconds: Optional[float] = None
+    ):
+        """Store a response in both tiers."""
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._remember(key, response, expires_at)
+        self.stats["stores"] += 1
+        await self._disk_put(key, response, provider, model, expires_at)
+
+    async def invalidate(self, key: Optional[str] = None):
+        """Drop one entry, or everything when key is None."""
+        if key is None:
+            self._memory.clear()
+        else:
+            self._memory.pop(key, None)
+
+        if await self._has_table():
+            try:
+                if key is None:
+                    await self.database.execute_command(f"DELETE FROM {CACHE_TABLE}")
+                else:
+                    await self.database.execute_command(
+                        f"DELETE FROM {CACHE_TABLE} WHERE cache_key = ?", (key,)
+                    )
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Response cache invalidation failed: {e}")
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier."""
+        now = time.time()
+        for key in [k for k, (_, expires_at) in self._memory.items() if expires_at <= now]:
+            del self._memory[key]
+
+        if not await self._has_table():
+            return 0
+        try:
+            rows = await self.database.execute_query(
+                f"SELECT COUNT(*) AS count FROM {CACHE_TABLE} WHERE expires_at <= ?", (now,)
+            )
+            await self.database.execute_command(
+                f"DELETE FROM {CACHE_TABLE} WHERE expires_at <= ?", (now,)
+            )
+            return rows[0]["count"] if rows else 0
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache purge failed: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persistent": self._table_available,
+            "enabled": self.enabled
+        }
+
+    # Internals
+
+    def _record_hit(self, counter: str, response: Dict[str, Any]):
+        self.stats[counter] += 1
+        usage = response.get("usage") or {}
+        self.stats["tokens_saved"] += usage.get("total_tokens") or 0
+
+    def _remember(self, key: str, response: Dict[str, Any], expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _has_table(self) -> bool:
+        # A missing table is re-checked once a minute so applying the
+        # migration later enables the persistent tier
+        if self._table_available or self.database is None:
+            return self._table_available
+        if time.time() - self._table_checked_at < 60:
+            return False
+        self._table_checked_at = time.time()
+        try:
+            rows = await self.database.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CACHE_TABLE,)
+            )
+            self._table_available = bool(rows)
+        except Exception:
+            self._table_available = False
+        return self._table_available
+
+    async def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if not await self._has_table():
+            return None
+        try:
+            rows = await self.database.execute_query(
+                f"SELECT response, expires_at FROM {CACHE_TABLE} WHERE cache_key = ?", (key,)
+            )
+            if not rows:
+                return None
+            if rows[0]["expires_at"] <= now:
+                self.stats["expired"] += 1
+                await self.database.execute_command(
+                    f"DELETE FROM {CACHE_TABLE} WHERE cache_key = ?", (key,)
+                )
+                return None
+
+            response = json.loads(rows[0]["response"])
+            self._remember(key, response, rows[0]["expires_at"])
+            await self.database.execute_command(
+                f"UPDATE {CACHE_TABLE} SET hit_count = hit_count + 1, last_hit_at = ? WHERE cache_key = ?",
+                (now, key)
+            )
+            return response
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    async def _disk_put(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        provider: str,
+        model: str,
+        expires_at: float
+    ):
+        if not await self._has_table():
+            return
+        try:
+            usage = response.get("usage") or {}
+            await self.database.execute_command(
+                f"""
+                INSERT OR REPLACE INTO {CACHE_TABLE}
+                    (cache_key, provider, model, response, total_tokens, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key, provider, model,
+                    json.dumps(response, default=str),
+                    usage.get("total_tokens") or 0,
+                    time.time(), expires_at
+                )
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache write failed: {e}")
@@ -0,0 +1,176 @@
+"""Agent slot admission control."""
+
+import itertools
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class SlotBudget:
+    """Resizable counting semaphore with a FIFO of waiting tasks."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        self.waiting: Deque[Tuple[int, int, Optional[str]]] = deque()  # (seq, task_id, model_key)
+
+    def available(self) -> bool:
+        return self.in_use < self.limit
+
+    def acquire(self):
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+
+    def release(self):
+        self.in_use = max(0, self.in_use - 1)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "peak": self.peak,
+            "waiting": len(self.waiting)
+        }
+
+
+class AgentSlotPool:
+    """
+    Concurrency budgets for agent calls.
+
+    Every call takes a slot from the global budget (max_concurrent_agents)
+    and, if one is configured, from the budget for its model. Model budgets
+    are looked up as "provider:model", then "model", then "provider", so
+    cheap and expensive models can run with separate limits.
+
+    A task that cannot be admitted waits in its budget's FIFO (it stays in
+    READY_FOR_AGENT) and is handed back by next_admissible() as soon as a
+    slot it can use is released.
+    """
+
+    def __init__(self, max_concurrent: int, limits: Optional[Dict[str, int]] = None):
+        self.global_budget = SlotBudget(max_concurrent)
+        self.budgets: Dict[str, SlotBudget] = {}
+        self._holders: Dict[int, Optional[str]] = {}
+        self._parked: Dict[int, str] = {}  # task_id -> budget name holding it
+        self._seq = itertools.count()
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "released": 0
+        }
+        self.configure(max_concurrent, limits or {})
+
+    def configure(self, max_concurrent: int, limits: Dict[str, int]):
+        """Apply new limits; calls already running keep their slots."""
+        self.global_budget.limit = max_concurrent
+        for key, limit in limits.items():
+            budget = self.budgets.get(key)
+            if budget is None:
+                self.budgets[key] = SlotBudget(limit)
+            else:
+                budget.limit = limit
+        for key in list(self.budgets):
+            budget = self.budgets[key]
+            if key not in limits and not budget.in_use and not budget.waiting:
+                del self.budgets[key]
+
+    def budget_for(self, model_key: Optional[str]) -> Optional[str]:
+        """Name of the model budget that applies to a "provider:model" key."""
+        if not model_key:
+            return None
+        provider, _, model = model_key.partition(":")
+        for candidate in (model_key, model, provider):
+            if candidate and candidate in self.budgets:
+                return candidate
+        return None
+
+    def has_capacity(self) -> bool:
+        return self.global_budget.available()
+
+    def try_acquire(self, task_id: int, model_key: Optional[str] = None) -> bool:
+        """Take a slot for a task without waiting."""
+        if task_id in self._holders:
+            return True
+        if not self.global_budget.available():
+            return False
+
+        name = self.budget_for(model_key)
+        budget = self.budgets.get(name) if name else None
+        if budget and not budget.available():
+            return False
+
+        self.global_budget.acquire()
+        if budget:
+            budget.acquire()
+        self._holders[task_id] = name
+        self.stats["admitted"] += 1
+        return True
+
+    def release(self, task_id: int) -> bool:
+        """Return a task's slot (safe to call more than once)."""
+        if task_id not in self._holders:
+            return False
+        name = self._holders.pop(task_id)
+        self.global_budget.release()
+        if name and name in self.budgets:
+            self.budgets[name].release()
+        self.stats["released"] += 1
+        return True
+
+    def park(self, task_id: int, model_key: Optional[str] = None):
+        """Queue a task that could not be admitted."""
+        if task_id in self._parked:
+            return
+        name = self.budget_for(model_key)
+        budget = self.budgets[name] if name else self.global_budget
+        budget.waiting.append((next(self._seq), task_id, model_key))
+        self._parked[task_id] = name or ""
+        self.stats["queued"] += 1
+
+    def unpark(self, task_id: int) -> bool:
+        """Forget a waiting task (it left READY_FOR_AGENT)."""
+        return self._parked.pop(task_id, None) is not None
+
+    def is_parked(self, task_id: int) -> bool:
+        return task_id in self._parked
+
+    def _first_waiting(self, budget: SlotBudget) -> Optional[Tuple[int, int, Optional[str]]]:
+        # Skip tasks that were unparked after they were queued
+        while budget.waiting and budget.waiting[0][1] not in self._parked:
+            budget.waiting.popleft()
+        return budget.waiting[0] if budget.waiting else None
+
+    def next_admissible(self) -> Optional[Tuple[int, Optional[str]]]:
+        """Oldest waiting task that a free slot could admit now."""
+        if not self.global_budget.available():
+            return None
+
+        candidates = [self.global_budget] + [
+            budget for budget in self.budgets.values() if budget.available()
+        ]
+        best: Optional[SlotBudget] = None
+        best_entry = None
+        for budget in candidates:
+            entry = self._first_waiting(budget)
+            if entry and (best_entry is None or entry[0] < best_entry[0]):
+                best, best_entry = budget, entry
+
+        if best is None:
+            return None
+
+        best.waiting.popleft()
+        _, task_id, model_key = best_entry
+        del self._parked[task_id]
+        return task_id, model_key
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "global": self.global_budget.summary(),
+            "budgets": {name: budget.summary() for name, budget in self.budgets.items()},
+            "waiting": len(self._parked)
+        }
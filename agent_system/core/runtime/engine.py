@@ -3,16 +3,24 @@
 import asyncio
 from typing import Dict, List, Optional, Any, Set
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 from .state_machine import TaskState, TaskStateMachine
 from .dependency_graph import DependencyGraph
 from .event_handler import RuntimeEventHandler
+from .scheduler import ReadyQueueScheduler
+from .event_workers import EventWorkerPool
+from .admission import AgentSlotPool
+from .task_notifications import task_notifier
 from ..events.event_manager import EventManager
 from ..events.event_types import EventType, EntityType
 from ..entities.entity_manager import EntityManager
 from ..entities.task_entity import TaskEntity
+from ..model_router import model_router
+from ..context_loader import context_loader
+from ..database_manager import database
+from config.settings import settings as system_settings
 
 
 logger = logging.getLogger(__name__)
@@ -25,7 +33,12 @@ class RuntimeSettings:
     max_concurrent_agents: int = 5         # System-wide
     manual_stepping_enabled: bool = False  # Global manual mode
     auto_trigger_enabled: bool = True      # Auto-progression
-    event_processing_interval: float = 0.1 # Event loop interval
+    scheduler_aging_seconds: float = 30.0  # Wait per priority level gained
+    event_workers: int = 4                 # Concurrent event handlers
+    max_pending_events: int = 10000        # Backpressure threshold
+    
+    # Concurrent agent calls per "provider:model", model or provider
+    model_concurrency_limits: Dict[str, int] = field(default_factory=dict)
     
     # Task-specific limits
     max_task_depth: int = 10              # Maximum task tree depth
@@ -59,9 +72,19 @@ class RuntimeEngine:
         self.state_machine = TaskStateMachine(event_manager)
         self.dependency_graph = DependencyGraph(event_manager)
         self.event_handler = RuntimeEventHandler(self)
+        self.scheduler = ReadyQueueScheduler(self.settings.scheduler_aging_seconds)
+        self.agent_slots = AgentSlotPool(
+            self.settings.max_concurrent_agents,
+            self.settings.model_concurrency_limits
+        )
         
         # Runtime state
-        self.event_queue: asyncio.Queue[RuntimeEvent] = asyncio.Queue()
+        # Handler failures are logged by the worker
+        self.event_workers = EventWorkerPool(
+            self.event_handler.handle_event,
+            workers=self.settings.event_workers,
+            max_pending=self.settings.max_pending_events
+        )
         self.active_agents: Dict[int, asyncio.Task] = {}
         self.task_states: Dict[int, TaskState] = {}
         self.task_settings: Dict[int, Dict[str, Any]] = {}
@@ -70,7 +93,9 @@ class RuntimeEngine:
         # Control flags
         self.running = False
         self._stop_event = asyncio.Event()
-        self._main_loop_task: Optional[asyncio.Task] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._dispatch_wakeup = asyncio.Event()
+        self._dispatching: Set[int] = set()
     
     async def start(self):
         """Start the runtime engine."""
@@ -82,8 +107,10 @@ class RuntimeEngine:
         self.running = True
         self._stop_event.clear()
         
-        # Start the main event loop
-        self._main_loop_task = asyncio.create_task(self._event_loop())
+        # Start the event workers and the dispatcher
+        self.event_workers.start()
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+        self._wake_dispatcher()
         
         # Log startup event
         await self.event_manager.log_event(
@@ -101,15 +128,17 @@ class RuntimeEngine:
         logger.info("Stopping runtime engine...")
         self.running = False
         self._stop_event.set()
+        self._wake_dispatcher()
         
         # Cancel all active agent tasks
         for task_id, agent_task in self.active_agents.items():
             if not agent_task.done():
                 agent_task.cancel()
         
-        # Wait for main loop to finish
-        if self._main_loop_task:
-            await self._main_loop_task
+        # Wait for in-flight events and the dispatcher to finish
+        await self.event_workers.stop()
+        if self._dispatch_task:
+            await self._dispatch_task
         
         # Log shutdown event
         await self.event_manager.log_event(
@@ -118,60 +147,49 @@ class RuntimeEngine:
             0
         )
     
-    async def _event_loop(self):
-        """Main event processing loop."""
-        logger.info("Runtime event loop started")
+    def _wake_dispatcher(self):
+        """Signal that a task became ready or an agent slot was freed."""
+        self._dispatch_wakeup.set()
+    
+    async def _dispatch_loop(self):
+        """Start agents for ready tasks while slots are free.
+        
+        Sleeps until woken by a READY_FOR_AGENT transition, a finished agent
+        call or shutdown, so an idle runtime does no work.
+        """
+        logger.info("Runtime dispatcher started")
         
         while self.running:
-            try:
-                # Process events with timeout
-                event = await asyncio.wait_for(
-                    self.event_queue.get(),
-                    timeout=self.settings.event_processing_interval
-                )
-                
-                # Handle the event
-                await self._handle_event(event)
-                
-            except asyncio.TimeoutError:
-                # Check for tasks that need progression
-                await self._check_task_progression()
+            await self._dispatch_wakeup.wait()
+            self._dispatch_wakeup.clear()
+            
+            while (
+                self.running
+                and self.settings.auto_trigger_enabled
+                and self.agent_slots.has_capacity()
+            ):
+                # Tasks waiting on a model budget go first once it has room
+                admissible = self.agent_slots.next_admissible()
+                task_id = admissible[0] if admissible else self.scheduler.pop()
+                if task_id is None:
+                    break
+                if self.task_states.get(task_id) != TaskState.READY_FOR_AGENT:
+                    continue
                 
-            except Exception as e:
-                logger.error(f"Error in event loop: {e}", exc_info=True)
-                await self.event_manager.log_event(
-                    EventType.SYSTEM_ERROR,
-                    EntityType.SYSTEM,
-                    0,
-                    event_data={"error": str(e)}
-                )
-        
-        logger.info("Runtime event loop stopped")
-    
-    async def _handle_event(self, event: RuntimeEvent):
-        """Handle a runtime event."""
-        try:
-            await self.event_handler.handle_event(event)
-        except Exception as e:
-            logger.error(f"Error handling event {event.event_type}: {e}", exc_info=True)
-            await self.event_manager.log_event(
-                EventType.SYSTEM_ERROR,
-                EntityType.TASK,
-                event.task_id,
-                event_data={
-                    "event_type": event.event_type,
-                    "error": str(e),
-                    "context": "event_processing_failed"
-                }
-            )
-    
-    async def _check_task_progression(self):
-        """Check for tasks that can progress."""
-        # Find tasks in READY_FOR_AGENT state
-        for task_id, state in self.task_states.items():
-            if state == TaskState.READY_FOR_AGENT:
-                if task_id not in self.active_agents:
+                try:
                     await self.trigger_agent_call(task_id)
+                except Exception as e:
+                    logger.error(f"Failed to dispatch task {task_id}: {e}", exc_info=True)
+        
+        logger.info("Runtime dispatcher stopped")
+    
+    async def _schedule_ready_task(self, task_id: int, task_entity: Optional[TaskEntity]):
+        """Add a READY_FOR_AGENT task to the ready-queue."""
+        if task_entity:
+            self.scheduler.enqueue(task_id, task_entity.tree_id, task_entity.priority)
+        else:
+            self.scheduler.enqueue(task_id)
+        self._wake_dispatcher()
     
     # Task management methods
     
@@ -229,12 +247,21 @@ class RuntimeEngine:
         
         if success:
             self.task_states[task_id] = new_state
+            if new_state != TaskState.READY_FOR_AGENT:
+                self.scheduler.discard(task_id)
+                self.agent_slots.unpark(task_id)
             
-            # Update entity
+            # Update entity (update_entity notifies completion waiters)
             task_entity = await self.entity_manager.get_entity(EntityType.TASK, task_id)
             if task_entity:
                 await task_entity.update_task_state(new_state)
                 await self.entity_manager.update_entity(task_entity)
+            else:
+                task_notifier.notify(task_id, new_state)
+            
+            # Ready tasks are started by the dispatcher
+            if new_state == TaskState.READY_FOR_AGENT and self.task_states.get(task_id) == new_state:
+                await self._schedule_ready_task(task_id, task_entity)
             
             # Queue state change event
             await self.queue_event(RuntimeEvent(
@@ -252,28 +279,38 @@ class RuntimeEngine:
     
     async def trigger_agent_call(self, task_id: int):
         """Trigger an LLM call for a task."""
-        # Check if already running
-        if task_id in self.active_agents:
+        # Check if already running or being started
+        if task_id in self.active_agents or task_id in self._dispatching:
             logger.warning(f"Agent already active for task {task_id}")
             return
         
-        # Check runtime limits
-        if not await self._can_make_agent_call(task_id):
-            await self.update_task_state(task_id, TaskState.MANUAL_HOLD)
-            return
-        
-        # Check manual stepping
-        if await self._is_manual_stepping_enabled(task_id):
-            await self.update_task_state(task_id, TaskState.MANUAL_HOLD)
-            await self._notify_manual_hold(task_id)
-            return
-        
-        # Update state and trigger call
-        await self.update_task_state(task_id, TaskState.AGENT_RESPONDING)
-        
-        # Create agent execution task
-        agent_task = asyncio.create_task(self._execute_agent_call(task_id))
-        self.active_agents[task_id] = agent_task
+        self._dispatching.add(task_id)
+        try:
+            # Check manual stepping
+            if await self._is_manual_stepping_enabled(task_id):
+                await self.update_task_state(task_id, TaskState.MANUAL_HOLD)
+                await self._notify_manual_hold(task_id)
+                return
+            
+            # Take an agent slot, or wait in READY_FOR_AGENT until one frees up
+            model_key = await self._resolve_model_key(task_id)
+            if not self.agent_slots.try_acquire(task_id, model_key):
+                self.scheduler.discard(task_id)
+                self.agent_slots.park(task_id, model_key)
+                return
+            
+            try:
+                # Update state and trigger call
+                await self.update_task_state(task_id, TaskState.AGENT_RESPONDING)
+                
+                # Create agent execution task
+                agent_task = asyncio.create_task(self._execute_agent_call(task_id))
+                self.active_agents[task_id] = agent_task
+            except BaseException:
+                self.agent_slots.release(task_id)
+                raise
+        finally:
+            self._dispatching.discard(task_id)
     
     async def _execute_agent_call(self, task_id: int):
         """Execute the actual agent call."""
@@ -315,8 +352,10 @@ class RuntimeEngine:
             logger.error(f"Agent execution failed for task {task_id}: {e}")
             await self.update_task_state(task_id, TaskState.FAILED)
         finally:
-            # Remove from active agents
+            # Release the agent slot and let the dispatcher reuse it
             self.active_agents.pop(task_id, None)
+            self.agent_slots.release(task_id)
+            self._wake_dispatcher()
     
     async def add_task_dependency(self, task_id: int, depends_on: int) -> bool:
         """Add a dependency between tasks."""
@@ -393,24 +432,40 @@ class RuntimeEngine:
     # Event queue management
     
     async def queue_event(self, event: RuntimeEvent):
-        """Queue an event for processing."""
-        await self.event_queue.put(event)
+        """Queue an event for processing.
+        
+        Events for the same task are handled in order; this waits while the
+        worker pool is over max_pending_events.
+        """
+        if isinstance(event, dict):
+            event = RuntimeEvent(
+                event_type=event["event_type"],
+                task_id=event["task_id"],
+                data=event.get("data", {}),
+                timestamp=event.get("timestamp") or datetime.now().timestamp()
+            )
+        await self.event_workers.submit(event)
     
     # Runtime control methods
     
-    async def _can_make_agent_call(self, task_id: int) -> bool:
-        """Check if an agent call is allowed."""
-        # Check concurrent agents limit
-        if len(self.active_agents) >= self.settings.max_concurrent_agents:
-            return False
-        
-        # Check task-specific limits
-        task_settings = self.task_settings.get(task_id, {})
-        if "max_agent_calls" in task_settings:
-            # Would need to track calls per task
-            pass
-        
-        return True
+    async def _resolve_model_key(self, task_id: int) -> str:
+        """Get the "provider:model" an agent call for this task will use."""
+        task = await database.tasks.get_by_id(str(task_id))
+        agent, metadata = await context_loader.load_agent(task) if task else (None, {})
+        if not agent:
+            return f"{system_settings.default_model_provider}:{system_settings.default_model_name}"
+        
+        # Same routing as the agent call so the slot budget matches
+        depth = await database.tasks.get_depth(task_id) if task.get("parent_task_id") else 0
+        decision = await model_router.route(
+            agent.name,
+            task.get("instruction") or "",
+            depth=depth,
+            agent_config=agent.ai_model_config,
+            task_metadata=metadata,
+            preview=True
+        )
+        return decision.model_key
     
     async def _is_manual_stepping_enabled(self, task_id: int) -> bool:
         """Check if manual stepping is enabled for this task."""
@@ -452,6 +507,19 @@ class RuntimeEngine:
         elif scope == "task" and target_id:
             self.task_settings.setdefault(target_id, {})["manual_stepping"] = True
     
+    def notify_settings_changed(self):
+        """Re-check the ready-queue after concurrency or trigger settings change."""
+        self.scheduler.aging_seconds = self.settings.scheduler_aging_seconds
+        self.agent_slots.configure(
+            self.settings.max_concurrent_agents,
+            self.settings.model_concurrency_limits
+        )
+        self._wake_dispatcher()
+    
+    async def apply_settings(self):
+        """Apply edited settings (awaitable like RemoteRuntimeEngine.apply_settings)."""
+        self.notify_settings_changed()
+    
     async def step_task(self, task_id: int):
         """Manually step a task forward."""
         current_state = self.task_states.get(task_id)
@@ -487,6 +555,10 @@ class RuntimeEngine:
             "active_agents": len(self.active_agents),
             "total_tasks": len(self.task_states),
             "state_distribution": state_counts,
-            "event_queue_size": self.event_queue.qsize(),
+            "event_queue_size": self.event_workers.depth,
+            "event_workers": self.event_workers.get_statistics(),
+            "scheduler": self.scheduler.get_statistics(),
+            "agent_slots": self.agent_slots.get_statistics(),
+            "completion_notifications": task_notifier.get_statistics(),
             "settings": self.settings.__dict__
         }
\ No newline at end of file
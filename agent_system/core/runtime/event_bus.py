@@ -0,0 +1,292 @@
+"""
+Local IPC event bus between the runtime process and API workers.
+
+In the multi-worker deployment one runtime process owns the scheduler and
+the runtime engine, and any number of API worker processes serve HTTP and
+WebSocket clients. They talk over a Unix domain socket hosted by the
+runtime process (EventBusServer); each worker connects as an
+EventBusClient and reconnects on its own if the runtime restarts.
+
+Frames are newline-delimited JSON:
+
+- {"op": "event", "channel": ..., "data": {...}} is published to every
+  other process. Events from a worker are handled by the runtime process
+  and relayed to the other workers.
+- {"op": "call", "id": ..., "method": ..., "params": {...}} asks the
+  runtime process to run a registered handler. It answers with
+  {"op": "reply", "id": ..., "result": ...} or {"op": "reply", "id": ...,
+  "error": "..."}.
+
+Writes never wait on a peer. A worker that lets more than
+max_buffer_bytes pile up unread is dropped, and it reconnects.
+
+Like task_notifications this module has no imports from the rest of core.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+EventHandler = Callable[[Dict[str, Any]], Any]
+CallHandler = Callable[..., Awaitable[Any]]
+
+# Largest frame either side accepts (tool results can be large)
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+def _encode(frame: Dict[str, Any]) -> bytes:
+    return json.dumps(frame, default=str).encode() + b"\n"
+
+
+class _EventChannels:
+    """Channel handler registry shared by both ends of the bus."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[EventHandler]] = {}
+        self.stats = {
+            "events_sent": 0,
+            "events_received": 0,
+            "handler_errors": 0
+        }
+
+    def on(self, channel: str, handler: EventHandler):
+        """Call handler(data) for every event received on channel (coroutines are scheduled)."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _dispatch(self, channel: str, data: Dict[str, Any]):
+        self.stats["events_received"] += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                outcome = handler(data)
+                if asyncio.iscoroutine(outcome):
+                    asyncio.ensure_future(outcome)
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Event bus handler for {channel} failed: {e}")
+
+
+class EventBusServer(_EventChannels):
+    """The runtime process's end: relays events and serves calls."""
+
+    def __init__(self, path: str, max_buffer_bytes: int = 8 * 1024 * 1024):
+        super().__init__()
+        self.path = path
+        self.max_buffer_bytes = max_buffer_bytes
+        self._methods: Dict[str, CallHandler] = {}
+        self._peers: Dict[int, asyncio.StreamWriter] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats.update({"calls": 0, "call_errors": 0, "peers_dropped": 0})
+
+    def register(self, method: str, handler: CallHandler):
+        """Serve method: handler(**params) -> JSON-serializable result."""
+        self._methods[method] = handler
+
+    async def start(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=MAX_FRAME_BYTES)
+        # Only processes of the same user may call the runtime
+        os.chmod(self.path, 0o600)
+        logger.info(f"Event bus listening on {self.path}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+        for writer in list(self._peers.values()):
+            writer.close()
+        self._peers.clear()
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def publish(self, channel: str, data: Dict[str, Any]):
+        """Send an event to every worker."""
+        self._send_all(_encode({"op": "event", "channel": channel, "data": data}))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "role": "server", "peers": len(self._peers)}
+
+    # Internals
+
+    def _send_all(self, frame: bytes, exclude: Optional[int] = None):
+        for peer_id, writer in list(self._peers.items()):
+            if peer_id != exclude:
+                self._send(peer_id, writer, frame)
+
+    def _send(self, peer_id: int, writer: asyncio.StreamWriter, frame: bytes):
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+            logger.warning("Dropping event bus peer that stopped reading")
+            self.stats["peers_dropped"] += 1
+            self._peers.pop(peer_id, None)
+            writer.close()
+            return
+        writer.write(frame)
+        self.stats["events_sent"] += 1
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer_id = id(writer)
+        self._peers[peer_id] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                if frame.get("op") == "event":
+                    self._dispatch(frame["channel"], frame.get("data") or {})
+                    self._send_all(line, exclude=peer_id)
+                elif frame.get("op") == "call":
+                    asyncio.ensure_future(self._call(peer_id, writer, frame))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Event bus peer disconnected: {e}")
+        finally:
+            self._peers.pop(peer_id, None)
+            writer.close()
+
+    async def _call(self, peer_id: int, writer: asyncio.StreamWriter, frame: Dict[str, Any]):
+        self.stats["calls"] += 1
+        reply: Dict[str, Any] = {"op": "reply", "id": frame.get("id")}
+        handler = self._methods.get(frame.get("method"))
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown event bus method: {frame.get('method')}")
+            reply["result"] = await handler(**(frame.get("params") or {}))
+        except Exception as e:
+            self.stats["call_errors"] += 1
+            reply["error"] = str(e)
+        self._send(peer_id, writer, _encode(reply))
+
+
+class EventBusClient(_EventChannels):
+    """An API worker's end: publishes events and calls the runtime process."""
+
+    def __init__(self, path: str, call_timeout_seconds: float = 30.0, reconnect_max_seconds: float = 5.0):
+        super().__init__()
+        self.path = path
+        self.call_timeout_seconds = call_timeout_seconds
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._runner: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._on_connect: List[Callable[[], Any]] = []
+        self.stats.update({"calls": 0, "call_errors": 0, "connects": 0, "events_dropped": 0})
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def on_connect(self, callback: Callable[[], Any]):
+        """Call callback (coroutines are scheduled) after every (re)connect."""
+        self._on_connect.append(callback)
+
+    async def start(self, wait_seconds: float = 10.0):
+        """Connect in the background, waiting up to wait_seconds for the first connection."""
+        self._runner = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=wait_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Runtime process not reachable at {self.path}; will keep retrying")
+
+    async def stop(self):
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def publish(self, channel: str, data: Dict[str, Any]):
+        """Send an event to the runtime process and the other workers (dropped while disconnected)."""
+        if not self.connected or self._writer is None:
+            self.stats["events_dropped"] += 1
+            return
+        self._writer.write(_encode({"op": "event", "channel": channel, "data": data}))
+        self.stats["events_sent"] += 1
+
+    async def call(self, method: str, **params) -> Any:
+        """Run a method in the runtime process and return its result."""
+        if not self.connected or self._writer is None:
+            raise RuntimeError(f"Runtime process not reachable at {self.path}")
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        self.stats["calls"] += 1
+        try:
+            self._writer.write(_encode({"op": "call", "id": call_id, "method": method, "params": params}))
+            return await asyncio.wait_for(future, timeout=self.call_timeout_seconds)
+        except Exception:
+            self.stats["call_errors"] += 1
+            raise
+        finally:
+            self._pending.pop(call_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "role": "client", "connected": self.connected, "pending_calls": len(self._pending)}
+
+    # Internals
+
+    async def _run(self):
+        delay = 0.25
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_FRAME_BYTES)
+            except (ConnectionError, FileNotFoundError, OSError):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_seconds)
+                continue
+
+            delay = 0.25
+            self.stats["connects"] += 1
+            self._connected.set()
+            for callback in self._on_connect:
+                outcome = callback()
+                if asyncio.iscoroutine(outcome):
+                    asyncio.ensure_future(outcome)
+            try:
+                await self._read(reader)
+            finally:
+                self._connected.clear()
+                self._writer.close()
+                self._writer = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("Runtime process disconnected"))
+            logger.warning("Lost connection to the runtime process; reconnecting")
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                frame = json.loads(line)
+                if frame.get("op") == "event":
+                    self._dispatch(frame["channel"], frame.get("data") or {})
+                elif frame.get("op") == "reply":
+                    future = self._pending.get(frame.get("id"))
+                    if future and not future.done():
+                        if "error" in frame:
+                            future.set_exception(RuntimeError(frame["error"]))
+                        else:
+                            future.set_result(frame.get("result"))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Event bus connection closed: {e}")
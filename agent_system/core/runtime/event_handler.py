@@ -38,11 +38,7 @@ class RuntimeEventHandler:
         handler = self.handlers.get(event.event_type)
         
         if handler:
-            try:
-                await handler(event)
-            except Exception as e:
-                logger.error(f"Error in event handler for {event.event_type}: {e}", exc_info=True)
-                raise
+            await handler(event)
         else:
             logger.warning(f"No handler for event type: {event.event_type}")
     
@@ -85,9 +81,9 @@ class RuntimeEventHandler:
         
         # Handle state-specific actions
         if new_state == TaskState.READY_FOR_AGENT:
-            # Check if we should trigger agent call
-            if self.runtime.settings.auto_trigger_enabled:
-                await self.runtime.trigger_agent_call(task_id)
+            # Already on the ready-queue; the dispatcher starts the agent
+            # call once a slot is free and auto-trigger is enabled
+            pass
         
         elif new_state == TaskState.COMPLETED:
             # Check for parent task to notify
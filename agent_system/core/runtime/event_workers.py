@@ -0,0 +1,191 @@
+"""Worker pool for runtime events with per-task ordering."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List
+
+from ..events.event_stats import DurationHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+# Set while a worker runs a handler. Events queued by handlers skip the
+# backpressure wait, otherwise a full queue would block the workers that
+# are supposed to drain it.
+_in_worker: contextvars.ContextVar[bool] = contextvars.ContextVar("runtime_event_worker", default=False)
+
+
+@dataclass
+class HandlerMetrics:
+    """Latency and outcome counters for one event type."""
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    latency: DurationHistogram = field(default_factory=DurationHistogram)
+    queue_wait: DurationHistogram = field(default_factory=DurationHistogram)
+
+    def record(self, seconds: float, waited: float, failed: bool):
+        self.count += 1
+        self.errors += int(failed)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latency.add(seconds)
+        self.queue_wait.add(waited)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "max_seconds": self.max_seconds,
+            "latency": self.latency.percentiles(),
+            "queue_wait": self.queue_wait.percentiles()
+        }
+
+
+class EventWorkerPool:
+    """
+    Runs runtime events on a fixed number of workers.
+
+    Events are kept in one FIFO per task and only one worker handles a given
+    task at a time, so events for the same task_id are processed in the
+    order they were queued while different tasks run concurrently. Tasks
+    with pending events take turns, so a busy task cannot hold a worker
+    while others wait.
+
+    submit() waits once max_pending events are buffered (except when called
+    from inside a handler).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int = 4,
+        max_pending: int = 10000
+    ):
+        self.handler = handler
+        self.worker_count = max(1, workers)
+        self.max_pending = max_pending
+
+        self._pending: Dict[int, Deque[tuple]] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._busy: set = set()
+        self._size = 0
+        self._space = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
+
+        self.metrics: Dict[str, HandlerMetrics] = {}
+        self.stats = {
+            "submitted": 0,
+            "processed": 0,
+            "backpressure_waits": 0,
+            "max_depth": 0
+        }
+
+    @property
+    def depth(self) -> int:
+        """Events queued or being handled."""
+        return self._size
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        """Let workers finish their current event, then stop them."""
+        for _ in self._workers:
+            self._ready.put_nowait(None)
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, event: Any):
+        """Queue an event, waiting while the pool is over max_pending."""
+        if self._size >= self.max_pending and self._workers and not _in_worker.get():
+            self.stats["backpressure_waits"] += 1
+            async with self._space:
+                await self._space.wait_for(lambda: self._size < self.max_pending)
+
+        task_id = event.task_id
+        queue = self._pending.get(task_id)
+        if queue is None:
+            queue = self._pending[task_id] = deque()
+            if task_id not in self._busy:
+                self._ready.put_nowait(task_id)
+        queue.append((event, time.monotonic()))
+
+        self._size += 1
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._size)
+
+    async def _worker(self, index: int):
+        while True:
+            task_id = await self._ready.get()
+            if task_id is None:
+                return
+
+            queue = self._pending.get(task_id)
+            if not queue:
+                self._pending.pop(task_id, None)
+                continue
+
+            event, queued_at = queue.popleft()
+            # Left in _pending while busy so new events for the task append
+            # to the same FIFO instead of being scheduled on another worker
+            self._busy.add(task_id)
+            started = time.monotonic()
+            failed = False
+            token = _in_worker.set(True)
+            try:
+                await self.handler(event)
+            except Exception as e:
+                failed = True
+                logger.error(f"Event worker {index} failed on {event.event_type}: {e}", exc_info=True)
+            finally:
+                _in_worker.reset(token)
+                finished = time.monotonic()
+                self._metrics_for(event.event_type).record(
+                    finished - started, started - queued_at, failed
+                )
+                self.stats["processed"] += 1
+                self._busy.discard(task_id)
+
+                # Re-queue the task behind the others if it has more events
+                if self._pending.get(task_id):
+                    self._ready.put_nowait(task_id)
+                else:
+                    self._pending.pop(task_id, None)
+
+                self._size -= 1
+                async with self._space:
+                    self._space.notify_all()
+
+    def _metrics_for(self, event_type: str) -> HandlerMetrics:
+        metrics = self.metrics.get(event_type)
+        if metrics is None:
+            metrics = self.metrics[event_type] = HandlerMetrics()
+        return metrics
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "workers": self.worker_count,
+            "depth": self._size,
+            "max_pending": self.max_pending,
+            "tasks_pending": len(self._pending),
+            "tasks_in_progress": len(self._busy),
+            "handlers": {
+                event_type: metrics.summary()
+                for event_type, metrics in self.metrics.items()
+            }
+        }
@@ -0,0 +1,222 @@
+"""
+Runtime access across processes.
+
+With settings.process_role = "runtime" one process owns the runtime engine
+and serves it over the event bus (serve_runtime). API workers started with
+process_role = "api" use RemoteRuntimeIntegration in place of
+RuntimeIntegration: task submissions, state changes and settings updates
+are calls to the runtime process, so there is a single scheduler however
+many workers serve HTTP.
+
+These event channels keep the workers' local state current:
+
+- "ws": every WebSocket message, wherever it was broadcast, is delivered
+  to the clients of every worker
+- "task_completion": completions from the runtime process resolve
+  task_notifier waiters in the workers
+- "invalidate": entity cache invalidations from any process are applied
+  in all the others
+- "runtime_settings": the runtime settings after each change, so every
+  worker's settings snapshot stays current
+
+State that only the runtime process keeps current - the statistics of the
+components that do the work (model gateway, router, context loader, ...)
+and whether system initialization is running - is read from it on demand.
+"""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from .event_bus import EventBusClient, EventBusServer
+from .runtime_integration import RuntimeIntegration
+from .state_machine import TaskState
+from .task_notifications import task_notifier
+from ..entity_cache import add_invalidation_listener, invalidate_entity, invalidate_entity_type
+
+
+logger = logging.getLogger(__name__)
+
+
+# RuntimeSettings fields workers may change, plus the API's step mode list
+UPDATABLE_SETTINGS = (
+    "max_concurrent_agents",
+    "manual_stepping_enabled",
+    "auto_trigger_enabled",
+    "scheduler_aging_seconds",
+    "model_concurrency_limits",
+    "step_mode_threads"
+)
+
+
+def share_cache_invalidations(bus):
+    """Publish local entity cache invalidations and apply remote ones."""
+    add_invalidation_listener(
+        lambda entity_type, entity_id: bus.publish(
+            "invalidate", {"entity_type": entity_type, "entity_id": entity_id}
+        )
+    )
+
+    def apply(data: Dict[str, Any]):
+        if data.get("entity_id") is None:
+            invalidate_entity_type(data["entity_type"], propagate=False)
+        else:
+            invalidate_entity(data["entity_type"], data["entity_id"], propagate=False)
+
+    bus.on("invalidate", apply)
+
+
+def serve_runtime(bus: EventBusServer, integration: RuntimeIntegration, system_state: Any,
+                  component_statistics: Callable[[], Dict[str, Any]]):
+    """Expose a local runtime integration to API workers.
+
+    system_state carries the shared "initializing" flag; component_statistics()
+    returns this process's component statistics for /system/stats.
+    """
+    engine = integration.runtime_engine
+
+    def settings_snapshot() -> Dict[str, Any]:
+        return {
+            **engine.settings.__dict__,
+            "step_mode_threads": getattr(engine.settings, "step_mode_threads", [])
+        }
+
+    async def create_task(instruction: str, parent_task_id: Optional[int] = None, **kwargs) -> int:
+        return await integration.create_task(instruction, parent_task_id=parent_task_id, **kwargs)
+
+    async def update_task_state(task_id: int, state: str, metadata: Optional[Dict] = None) -> bool:
+        return await engine.update_task_state(int(task_id), TaskState(state), metadata)
+
+    async def get_settings() -> Dict[str, Any]:
+        return settings_snapshot()
+
+    async def update_settings(**changes) -> Dict[str, Any]:
+        for name in UPDATABLE_SETTINGS:
+            if name in changes:
+                setattr(engine.settings, name, changes[name])
+        engine.notify_settings_changed()
+        snapshot = settings_snapshot()
+        bus.publish("runtime_settings", snapshot)
+        return snapshot
+
+    async def is_task_running(task_id: int) -> bool:
+        return await integration.is_task_running(task_id)
+
+    async def get_process_count() -> int:
+        return await integration.get_process_count()
+
+    async def get_runtime_statistics() -> Dict[str, Any]:
+        statistics = await integration.get_runtime_statistics()
+        return {**statistics, "components": component_statistics()}
+
+    async def is_initializing() -> bool:
+        return bool(getattr(system_state, "initializing", False))
+
+    async def set_initializing(value: bool) -> bool:
+        system_state.initializing = bool(value)
+        return system_state.initializing
+
+    for handler in (create_task, update_task_state, get_settings, update_settings,
+                    is_task_running, get_process_count, get_runtime_statistics,
+                    is_initializing, set_initializing):
+        bus.register(handler.__name__, handler)
+
+    task_notifier.subscribe(
+        lambda completion: bus.publish("task_completion", completion.__dict__)
+    )
+    share_cache_invalidations(bus)
+
+
+class RemoteRuntimeEngine:
+    """The parts of RuntimeEngine the API uses, forwarded to the runtime process."""
+
+    def __init__(self, bus: EventBusClient):
+        self.bus = bus
+        # Snapshot of the runtime's settings; edit it, then apply_settings()
+        self.settings = SimpleNamespace(max_concurrent_agents=5, manual_stepping_enabled=False, step_mode_threads=[])
+        bus.on("runtime_settings", self._store_snapshot)
+        bus.on_connect(self.refresh_settings)
+
+    async def refresh_settings(self):
+        try:
+            self._store_snapshot(await self.bus.call("get_settings"))
+        except Exception as e:
+            logger.warning(f"Could not load runtime settings: {e}")
+
+    async def create_task(self, instruction: str, parent_task_id: Optional[int] = None, **kwargs) -> int:
+        return await self.bus.call("create_task", instruction=instruction, parent_task_id=parent_task_id, **kwargs)
+
+    async def update_task_state(self, task_id: int, new_state: TaskState, metadata: Optional[Dict] = None) -> bool:
+        return await self.bus.call(
+            "update_task_state",
+            task_id=int(task_id),
+            state=getattr(new_state, "value", new_state),
+            metadata=metadata
+        )
+
+    def notify_settings_changed(self):
+        """Send the edited settings snapshot to the runtime process in the background."""
+        asyncio.ensure_future(self._update_settings())
+
+    async def apply_settings(self):
+        """Send the edited settings snapshot to the runtime process; returns once it applies them."""
+        changes = {name: getattr(self.settings, name) for name in UPDATABLE_SETTINGS if hasattr(self.settings, name)}
+        self._store_snapshot(await self.bus.call("update_settings", **changes))
+
+    async def _update_settings(self):
+        try:
+            await self.apply_settings()
+        except Exception as e:
+            logger.error(f"Failed to update runtime settings: {e}")
+
+    def _store_snapshot(self, snapshot: Dict[str, Any]):
+        for name, value in (snapshot or {}).items():
+            setattr(self.settings, name, value)
+
+
+class RemoteRuntimeIntegration:
+    """Stands in for RuntimeIntegration in API workers."""
+
+    def __init__(self, bus: EventBusClient):
+        self.bus = bus
+        self.mode = "remote"
+        self.runtime_engine = RemoteRuntimeEngine(bus)
+        self.process_registry = None
+
+    async def create_task(self, instruction: str, parent_task_id: Optional[int] = None, **kwargs) -> int:
+        return await self.runtime_engine.create_task(instruction, parent_task_id=parent_task_id, **kwargs)
+
+    async def is_task_running(self, task_id: int) -> bool:
+        return await self.bus.call("is_task_running", task_id=int(task_id))
+
+    async def get_process_count(self) -> int:
+        return await self.bus.call("get_process_count")
+
+    async def get_runtime_statistics(self) -> Dict[str, Any]:
+        statistics = await self.bus.call("get_runtime_statistics")
+        return {**statistics, "event_bus": self.bus.get_stats()}
+
+    async def is_initializing(self) -> bool:
+        return await self.bus.call("is_initializing")
+
+    async def set_initializing(self, value: bool) -> bool:
+        return await self.bus.call("set_initializing", value=bool(value))
+
+    async def shutdown(self):
+        await self.bus.stop()
+
+
+def connect_api_worker(bus: EventBusClient, deliver_websocket: Callable[..., Any]) -> RemoteRuntimeIntegration:
+    """Wire an API worker to the bus; deliver_websocket(text, tree_id=, task_id=, message_type=) reaches local clients."""
+    bus.on("ws", lambda data: deliver_websocket(
+        data["text"],
+        tree_id=data.get("tree_id"),
+        task_id=data.get("task_id"),
+        message_type=data.get("message_type")
+    ))
+    bus.on("task_completion", lambda data: task_notifier.notify(
+        data["task_id"], data["state"], data.get("result"), data.get("error")
+    ))
+    share_cache_invalidations(bus)
+    return RemoteRuntimeIntegration(bus)
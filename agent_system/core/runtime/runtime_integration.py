@@ -10,6 +10,7 @@ from ..processes.registry import ProcessRegistry, initialize_process_registry
 from ..events.event_manager import EventManager
 from ..entities.entity_manager import EntityManager
 from ..events.event_types import EntityType
+from config.settings import settings as system_settings
 
 
 logger = logging.getLogger(__name__)
@@ -50,7 +51,8 @@ class RuntimeIntegration:
         settings = RuntimeSettings(
             max_concurrent_agents=5,
             manual_stepping_enabled=False,
-            auto_trigger_enabled=True
+            auto_trigger_enabled=True,
+            model_concurrency_limits=dict(system_settings.agent_concurrency_limits)
         )
         
         self.runtime_engine = RuntimeEngine(
@@ -113,7 +115,7 @@ class RuntimeIntegration:
             server_name, operation = tool_name.split(".", 1)
             
             # Get tool system manager if available
-            from ...tools.mcp_servers.startup import get_tool_system_manager
+            from tools.mcp_servers.startup import get_tool_system_manager
             tool_system = get_tool_system_manager()
             
             if tool_system:
@@ -210,6 +212,32 @@ class RuntimeIntegration:
                 "result": f"Tool {tool_name} executed (legacy)"
             }
     
+    def is_parallel_safe_tool(self, tool_name: str) -> bool:
+        """
+        Check if a tool call can run concurrently with others.
+        
+        Only MCP operations their server registered as parallel-safe
+        qualify; process tools change task state and always run in order.
+        """
+        if "." not in tool_name:
+            return False
+        
+        from tools.mcp_servers.startup import get_tool_system_manager
+        tool_system = get_tool_system_manager()
+        if not tool_system:
+            return False
+        
+        server_name, operation = tool_name.split(".", 1)
+        return tool_system.is_parallel_safe(server_name, operation)
+    
+    async def is_task_running(self, task_id: int) -> bool:
+        """Check if an agent is currently executing the task."""
+        return self.runtime_engine is not None and int(task_id) in self.runtime_engine.active_agents
+
+    async def get_process_count(self) -> int:
+        """Number of registered processes."""
+        return len(self.process_registry.processes) if self.process_registry else 0
+
     async def get_runtime_statistics(self) -> Dict[str, Any]:
         """Get statistics about runtime usage."""
         runtime_stats = {}
@@ -259,6 +287,10 @@ class RuntimeIntegration:
                 for dep_id in task.dependencies:
                     await self.runtime_engine.dependency_graph.add_dependency(task_id, dep_id)
             
+            # Only the ready-queue feeds the dispatcher, so a ready task must be queued
+            if task.task_state == TaskState.READY_FOR_AGENT:
+                await self.runtime_engine._schedule_ready_task(task_id, task)
+            
             logger.info(f"Migrated task {task_id} to runtime engine")
             return True
             
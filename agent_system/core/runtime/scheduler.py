@@ -0,0 +1,156 @@
+"""Ready-queue scheduler for agent dispatch."""
+
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# Lower rank runs first
+PRIORITY_RANKS = {
+    "critical": 0,
+    "high": 1,
+    "normal": 2,
+    "low": 3
+}
+
+
+@dataclass(order=True)
+class ReadyEntry:
+    """A task waiting for an agent slot."""
+    deadline: float
+    seq: int
+    task_id: int = field(compare=False)
+    tree_id: int = field(compare=False)
+    rank: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    removed: bool = field(default=False, compare=False)
+
+
+class ReadyQueueScheduler:
+    """
+    Priority ready-queue with per-tree fairness and aging.
+
+    Tasks are added when they enter READY_FOR_AGENT and removed when they
+    leave it, so picking the next task never scans historical tasks.
+
+    - Each tree has its own heap ordered by a virtual deadline
+      (enqueue time + rank * aging_seconds), so a task gains one priority
+      level for every aging_seconds it waits.
+    - Across trees, the head with the best effective rank wins; ties go
+      round-robin, so a tree with many ready tasks cannot starve a tree
+      with a single one.
+    """
+
+    def __init__(self, aging_seconds: float = 30.0):
+        self.aging_seconds = aging_seconds
+        self._entries: Dict[int, ReadyEntry] = {}
+        self._trees: Dict[int, List[ReadyEntry]] = {}
+        self._rotation: Deque[int] = deque()
+        self._seq = itertools.count()
+
+        # Statistics
+        self.dispatched = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._entries
+
+    def enqueue(self, task_id: int, tree_id: Optional[int] = None, priority: str = "normal"):
+        """Mark a task as ready (no-op if it is already queued)."""
+        if task_id in self._entries:
+            return
+
+        now = time.monotonic()
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS["normal"])
+        tree_id = tree_id if tree_id is not None else task_id
+        entry = ReadyEntry(
+            deadline=now + rank * self.aging_seconds,
+            seq=next(self._seq),
+            task_id=task_id,
+            tree_id=tree_id,
+            rank=rank,
+            enqueued_at=now
+        )
+        self._entries[task_id] = entry
+
+        heap = self._trees.get(tree_id)
+        if heap is None:
+            heap = self._trees[tree_id] = []
+            self._rotation.append(tree_id)
+        heapq.heappush(heap, entry)
+
+    def discard(self, task_id: int) -> bool:
+        """Remove a task that is no longer ready (lazy heap deletion)."""
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+        entry.removed = True
+        return True
+
+    def _head(self, tree_id: int) -> Optional[ReadyEntry]:
+        """Live head of a tree's heap, dropping removed entries and empty trees."""
+        heap = self._trees.get(tree_id)
+        while heap and heap[0].removed:
+            heapq.heappop(heap)
+        if not heap:
+            self._trees.pop(tree_id, None)
+            return None
+        return heap[0]
+
+    def _effective_rank(self, entry: ReadyEntry, now: float) -> float:
+        if self.aging_seconds <= 0:
+            return entry.rank
+        return max(0, entry.rank - int((now - entry.enqueued_at) // self.aging_seconds))
+
+    def pop(self) -> Optional[int]:
+        """Take the next task to dispatch, or None if nothing is ready."""
+        now = time.monotonic()
+        best: Optional[Tuple[float, int]] = None  # (effective rank, rotation index)
+        best_entry: Optional[ReadyEntry] = None
+
+        live_rotation: Deque[int] = deque()
+        for tree_id in self._rotation:
+            head = self._head(tree_id)
+            if head is None:
+                continue
+            live_rotation.append(tree_id)
+            key = (self._effective_rank(head, now), len(live_rotation) - 1)
+            if best is None or key < best:
+                best = key
+                best_entry = head
+        self._rotation = live_rotation
+
+        if best_entry is None:
+            return None
+
+        heapq.heappop(self._trees[best_entry.tree_id])
+        del self._entries[best_entry.task_id]
+
+        # The served tree goes to the back of the rotation
+        self._rotation.remove(best_entry.tree_id)
+        if self._head(best_entry.tree_id) is not None:
+            self._rotation.append(best_entry.tree_id)
+
+        waited = now - best_entry.enqueued_at
+        self.dispatched += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        return best_entry.task_id
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Get queue depth and wait-time statistics."""
+        return {
+            "ready_tasks": len(self._entries),
+            "ready_trees": len(self._trees),
+            "dispatched": self.dispatched,
+            "avg_wait_seconds": self.total_wait_seconds / self.dispatched if self.dispatched else 0.0,
+            "max_wait_seconds": self.max_wait_seconds
+        }
@@ -0,0 +1,172 @@
+"""Task completion notifications.
+
+Waiters register a future per task and are resolved the moment a task
+reaches COMPLETED or FAILED, instead of polling the database. Notifications
+come from the runtime engine's state transitions and from every code path
+that persists a terminal task state (EntityManager.update_entity,
+TaskRepository.update).
+
+This module has no imports from the rest of core so the repositories and
+the entity manager can use it without import cycles.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+# The legacy TaskStatus enum spells success "complete"
+TERMINAL_STATES = {"completed", "complete", "failed"}
+
+
+@dataclass
+class TaskCompletion:
+    """Terminal state of a task as delivered to waiters."""
+    task_id: int
+    state: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.state == "completed"
+
+
+CompletionLookup = Callable[[int], Awaitable[Optional[TaskCompletion]]]
+CompletionListener = Callable[[TaskCompletion], Any]
+
+
+def is_terminal(state: Any) -> bool:
+    """Check if a TaskState (or its string value) is terminal."""
+    return getattr(state, "value", state) in TERMINAL_STATES
+
+
+class TaskCompletionNotifier:
+    """Per-task completion futures plus a simple listener bus."""
+
+    def __init__(self):
+        self._waiters: Dict[int, Set[asyncio.Future]] = {}
+        self._listeners: List[CompletionListener] = []
+        self.stats = {
+            "notifications": 0,
+            "waiters_resolved": 0,
+            "timeouts": 0
+        }
+
+    def watch(self, task_id: int) -> asyncio.Future:
+        """Register a future resolved when the task finishes."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(int(task_id), set()).add(future)
+        return future
+
+    def unwatch(self, task_id: int, future: asyncio.Future):
+        """Remove a future registered with watch()."""
+        task_id = int(task_id)
+        waiters = self._waiters.get(task_id)
+        if waiters:
+            waiters.discard(future)
+            if not waiters:
+                del self._waiters[task_id]
+
+    def subscribe(self, listener: CompletionListener):
+        """Call listener for every completion (coroutines are scheduled)."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: CompletionListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def notify(
+        self,
+        task_id: int,
+        state: Any,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> int:
+        """Deliver a state change; non-terminal states are ignored.
+
+        Returns the number of waiters resolved.
+        """
+        if not is_terminal(state):
+            return 0
+
+        task_id = int(task_id)
+        state = getattr(state, "value", state)
+        completion = TaskCompletion(
+            task_id=task_id,
+            state="failed" if state == "failed" else "completed",
+            result=result,
+            error=error
+        )
+        self.stats["notifications"] += 1
+
+        resolved = 0
+        for future in self._waiters.pop(task_id, set()):
+            if not future.done():
+                future.set_result(completion)
+                resolved += 1
+        self.stats["waiters_resolved"] += resolved
+
+        for listener in list(self._listeners):
+            try:
+                outcome = listener(completion)
+                if asyncio.iscoroutine(outcome):
+                    asyncio.ensure_future(outcome)
+            except Exception as e:
+                logger.error(f"Task completion listener failed: {e}")
+
+        return resolved
+
+    async def wait_for(
+        self,
+        task_ids: Iterable[int],
+        timeout: Optional[float] = None,
+        lookup: Optional[CompletionLookup] = None
+    ) -> Dict[int, Optional[TaskCompletion]]:
+        """Wait until every task finishes or the timeout expires.
+
+        Futures are registered before lookup() checks the current state of
+        each task, so a completion between the check and the wait cannot be
+        missed. Tasks still running at the timeout map to None.
+        """
+        futures = {task_id: self.watch(task_id) for task_id in dict.fromkeys(task_ids)}
+
+        try:
+            if lookup:
+                for task_id, future in futures.items():
+                    if future.done():
+                        continue
+                    completion = await lookup(task_id)
+                    if completion and not future.done():
+                        future.set_result(completion)
+
+            pending = [future for future in futures.values() if not future.done()]
+            if pending:
+                _, still_pending = await asyncio.wait(pending, timeout=timeout)
+                self.stats["timeouts"] += len(still_pending)
+
+            return {
+                task_id: future.result() if future.done() else None
+                for task_id, future in futures.items()
+            }
+        finally:
+            for task_id, future in futures.items():
+                self.unwatch(task_id, future)
+                if not future.done():
+                    future.cancel()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tasks_watched": len(self._waiters),
+            "waiters": sum(len(waiters) for waiters in self._waiters.values()),
+            "listeners": len(self._listeners)
+        }
+
+
+# Global notifier instance
+task_notifier = TaskCompletionNotifier()
@@ -0,0 +1,100 @@
+"""
+Concurrent execution of the tool calls in one agent response.
+
+Consecutive calls to parallel-safe (read-only) tools run together, bounded
+by max_parallel. Any other call is a barrier: everything before it has
+finished before it starts, and nothing after it starts until it is done,
+so calls with side effects keep the order the agent asked for. Results are
+returned in the order of the input calls.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+class ToolCallExecutor:
+    """Runs a list of tool calls, overlapping the ones that are safe to overlap."""
+
+    def __init__(self, max_parallel: int = 4):
+        self.max_parallel = max(1, max_parallel)
+        self.stats = {
+            "calls": 0,
+            "parallel_calls": 0,
+            "parallel_batches": 0,
+            "max_batch": 0,
+            "seconds_saved": 0.0
+        }
+
+    async def run(
+        self,
+        calls: Sequence[Any],
+        execute: Callable[[Any], Awaitable[Any]],
+        is_parallel_safe: Callable[[Any], bool],
+        before_barrier: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> List[Any]:
+        """
+        Execute calls and return their results in input order.
+
+        execute must handle its own errors; an exception escaping it is
+        propagated after the rest of its batch has finished.
+        before_barrier is awaited before each sequential call, e.g. to
+        flush buffered logs that the call may depend on.
+        """
+        results: List[Any] = [None] * len(calls)
+        batch: List[int] = []
+
+        for index, call in enumerate(calls):
+            self.stats["calls"] += 1
+            if is_parallel_safe(call):
+                batch.append(index)
+                continue
+
+            await self._run_batch(calls, batch, execute, results)
+            batch = []
+            if before_barrier:
+                await before_barrier()
+            results[index] = await execute(call)
+
+        await self._run_batch(calls, batch, execute, results)
+        return results
+
+    async def _run_batch(
+        self,
+        calls: Sequence[Any],
+        batch: List[int],
+        execute: Callable[[Any], Awaitable[Any]],
+        results: List[Any]
+    ):
+        if not batch:
+            return
+        if len(batch) == 1:
+            results[batch[0]] = await execute(calls[batch[0]])
+            return
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        durations: Dict[int, float] = {}
+
+        async def run_one(index: int):
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    results[index] = await execute(calls[index])
+                finally:
+                    durations[index] = time.monotonic() - started
+
+        started = time.monotonic()
+        outcomes = await asyncio.gather(*(run_one(index) for index in batch), return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+        self.stats["parallel_calls"] += len(batch)
+        self.stats["parallel_batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        self.stats["seconds_saved"] += max(0.0, sum(durations.values()) - elapsed)
+
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {**self.stats, "max_parallel": self.max_parallel}
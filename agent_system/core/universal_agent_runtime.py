@@ -11,16 +11,23 @@ from datetime import datetime
 from .models import (
     Task, Agent, Message, ContextDocument, Tool, 
     TaskStatus, MessageType, AgentExecutionContext, 
-    AgentExecutionResult, MCPToolCall, MCPToolResult
+    AgentExecutionResult, MCPToolCall, MCPToolResult,
+    AIModelConfig as ModelConfig
 )
 from .database_manager import database
 from .ai_models import ai_model_manager
-from .websocket_messages import WebSocketMessage, MessageBuilder
+from .websocket_messages import WebSocketMessage, MessageBuilder, broadcast
 from .websocket_messages import MessageType as WSMessageType
 from .runtime.runtime_integration import get_runtime_integration
 from .runtime.state_machine import TaskState
+from .tool_executor import ToolCallExecutor
+from .context_loader import context_loader
+from .prompt_builder import prompt_builder, BuiltPrompt
+from .model_router import model_router, RoutingDecision
+from .usage_accounting import UsageContext, UsageRecord
 from .events.event_manager import EventManager
 from .events.event_types import EventType, EntityType, EventOutcome
+from .events.models import ResourceUsage
 from tools.base_tool import tool_registry
 from config.settings import settings
 from config.model_config import AGENT_MODEL_PREFERENCES, ModelSelector
@@ -36,6 +43,9 @@ class UniversalAgentRuntime:
     - Event-driven execution model
     """
     
+    # Streamed text is forwarded to clients at most this often (seconds)
+    STREAM_FLUSH_INTERVAL = 0.05
+    
     def __init__(self, task_id: int, event_manager: EventManager):
         self.task_id = task_id
         self.event_manager = event_manager
@@ -43,194 +53,20 @@ class UniversalAgentRuntime:
         self.start_time: Optional[float] = None
         self.tool_calls_made = 0
         self.messages_logged = 0
+        self.tool_executor = ToolCallExecutor(settings.max_parallel_tool_calls)
         self.tree_id: Optional[int] = None
         self.runtime = get_runtime_integration()
+        self.usage_record: Optional[UsageRecord] = None
     
     async def initialize(self) -> bool:
         """Initialize the agent with task context"""
         try:
-            # Load task from database
-            task = await database.tasks.get_by_id(str(self.task_id))
-            if not task:
-                raise ValueError(f"Task {self.task_id} not found")
-            
-            self.tree_id = task.get("tree_id", self.task_id)
-            
-            # Load agent configuration
-            agent_id = task.get("agent_id")
-            agent = None
-            
-            if agent_id:
-                agent = await database.agents.get_by_id(str(agent_id))
-            
-            if not agent:
-                # Try to get agent by name if ID lookup fails
-                # First check task metadata
-                metadata = task.get("metadata", "{}")
-                if isinstance(metadata, str):
-                    import json
-                    metadata = json.loads(metadata)
-                    
-                agent_name = metadata.get('assigned_agent')
-                
-                # If no assigned agent, default to agent_selector
-                if not agent_name:
-                    agent_name = "agent_selector"
-                
-                if agent_name:
-                    agent = await database.agents.get_by_name(agent_name)
-                
-                if not agent:
-                    raise ValueError(f"Agent for task {self.task_id} not found")
-            
-            # Load context documents
-            context_documents = []
-            context_documents_list = agent.get("context_documents", [])
-            if isinstance(context_documents_list, str):
-                import json
-                context_documents_list = json.loads(context_documents_list)
-            
-            if context_documents_list:
-                context_documents = await database.context_documents.get_by_names(
-                    context_documents_list
-                )
-            
-            # Add any additional context from task
-            if metadata and metadata.get('additional_context'):
-                additional_context = await database.context_documents.get_by_names(
-                    metadata['additional_context']
-                )
-                context_documents.extend(additional_context)
-            
-            # Load available tools
-            available_tools = []
-            available_tools_list = agent.get("available_tools", [])
-            if isinstance(available_tools_list, str):
-                import json
-                available_tools_list = json.loads(available_tools_list)
-                
-            if available_tools_list:
-                available_tools = await database.tools.get_by_names(
-                    available_tools_list
-                )
-            
-            # Add any additional tools from task
-            if metadata and metadata.get('additional_tools'):
-                additional_tools = await database.tools.get_by_names(
-                    metadata['additional_tools']
-                )
-                available_tools.extend(additional_tools)
-            
-            # Add MCP tools based on permissions
             from tools.mcp_servers.startup import get_tool_system_manager
-            tool_system = get_tool_system_manager()
-            if tool_system:
-                # Get agent type from task metadata or agent name
-                agent_type = metadata.get("agent_type", agent.get("name", "neutral_task_agent"))
-                mcp_tools = await tool_system.get_agent_tools(agent_type, self.task_id)
-                
-                # Create tool objects for MCP tools
-                for tool_name in mcp_tools:
-                    from .models import Tool
-                    # Create pseudo-tool objects for MCP servers
-                    mcp_tool = Tool(
-                        id=0,
-                        name=tool_name,
-                        description=f"MCP Server: {tool_name} - Access to {tool_name} operations",
-                        implementation="mcp",
-                        function_name=tool_name,
-                        parameters={},
-                        returns={}
-                    )
-                    available_tools.append(mcp_tool)
-            
-            # Load message history
-            message_history = await database.messages.get_by_task_id(str(self.task_id))
-            
-            # Convert dicts to model objects
-            from .models import Task, Agent, ContextDocument, Tool, Message
-            
-            # Convert task dict to Task model
-            task_obj = Task(
-                id=task.get("id"),
-                parent_task_id=task.get("parent_task_id"),
-                tree_id=task.get("tree_id"),
-                agent_id=task.get("agent_id"),
-                instruction=task.get("instruction", ""),
-                status=task.get("status", "created"),
-                result=json.loads(task.get("result", "{}")) if isinstance(task.get("result"), str) else task.get("result"),
-                metadata=metadata,
-                created_at=task.get("created_at"),
-                updated_at=task.get("updated_at")
-            )
+            context, task = await context_loader.load(self.task_id, get_tool_system_manager())
             
-            # Convert agent dict to Agent model
-            agent_obj = Agent(
-                id=agent.get("id"),
-                name=agent.get("name", ""),
-                instruction=agent.get("instruction", ""),
-                context_documents=context_documents_list,
-                available_tools=available_tools_list,
-                permissions=json.loads(agent.get("permissions", "[]")) if isinstance(agent.get("permissions"), str) else agent.get("permissions", []),
-                constraints=json.loads(agent.get("constraints", "[]")) if isinstance(agent.get("constraints"), str) else agent.get("constraints", []),
-                metadata=json.loads(agent.get("metadata", "{}")) if isinstance(agent.get("metadata"), str) else agent.get("metadata", {}),
-                created_at=agent.get("created_at"),
-                updated_at=agent.get("updated_at")
-            )
-            
-            # Convert context documents to model objects
-            context_doc_objs = []
-            for doc in context_documents:
-                context_doc_objs.append(ContextDocument(
-                    id=doc.get("id"),
-                    name=doc.get("name", ""),
-                    title=doc.get("title", ""),
-                    category=doc.get("category", "system"),
-                    content=doc.get("content", ""),
-                    format=doc.get("format", "markdown"),
-                    version=doc.get("version", "1.0.0"),
-                    created_at=doc.get("created_at"),
-                    updated_at=doc.get("updated_at")
-                ))
-            
-            # Convert tools to model objects
-            tool_objs = []
-            for tool in available_tools:
-                if hasattr(tool, 'model_dump'):  # Already a model object (MCP tools)
-                    tool_objs.append(tool)
-                else:
-                    tool_objs.append(Tool(
-                        id=tool.get("id"),
-                        name=tool.get("name", ""),
-                        description=tool.get("description", ""),
-                        function_name=tool.get("function_name", tool.get("name", "")),
-                        parameters=json.loads(tool.get("parameters", "{}")) if isinstance(tool.get("parameters"), str) else tool.get("parameters", {}),
-                        returns=json.loads(tool.get("returns", "{}")) if isinstance(tool.get("returns"), str) else tool.get("returns", {}),
-                        created_at=tool.get("created_at"),
-                        updated_at=tool.get("updated_at")
-                    ))
-            
-            # Convert messages to model objects
-            message_objs = []
-            for msg in message_history:
-                message_objs.append(Message(
-                    id=msg.get("id"),
-                    task_id=msg.get("task_id"),
-                    message_type=msg.get("message_type", "agent_response"),
-                    content=msg.get("content", ""),
-                    metadata=json.loads(msg.get("metadata", "{}")) if isinstance(msg.get("metadata"), str) else msg.get("metadata", {}),
-                    timestamp=msg.get("timestamp")
-                ))
-            
-            # Create execution context
-            self.execution_context = AgentExecutionContext(
-                task=task_obj,
-                agent=agent_obj,
-                context_documents=context_doc_objs,
-                available_tools=tool_objs,
-                parent_context={"recursion_depth": self._calculate_recursion_depth(task)},
-                execution_metadata={"message_history": [msg.model_dump() for msg in message_objs]}
-            )
+            self.tree_id = task.get("tree_id", self.task_id)
+            context.parent_context = {"recursion_depth": await self._calculate_recursion_depth(task)}
+            self.execution_context = context
             
             return True
             
@@ -258,14 +94,12 @@ class UniversalAgentRuntime:
                 }
             )
             
-            # Prepare AI prompt
-            prompt = self._build_prompt()
+            # Pick the model tier for this call and build the prompt for its budget
+            routing = await self._route_model()
+            prompt = self._build_prompt(routing.model_config)
             
-            # Get AI response
-            response = await ai_model_manager.get_response(
-                prompt,
-                model_config=self.execution_context.agent.ai_model_config
-            )
+            # Get AI response, streaming deltas to connected clients
+            response = await self._respond_with_escalation(prompt, routing)
             
             # Process tool calls
             tool_results = []
@@ -303,7 +137,8 @@ class UniversalAgentRuntime:
                     "result": result.result,
                     "execution_time": execution_time
                 },
-                outcome=EventOutcome.SUCCESS
+                outcome=EventOutcome.SUCCESS,
+                resource_usage=self._resource_usage(execution_time)
             )
             
             return result
@@ -325,7 +160,8 @@ class UniversalAgentRuntime:
                     "error": str(e),
                     "execution_time": execution_time
                 },
-                outcome=EventOutcome.FAILURE
+                outcome=EventOutcome.FAILURE,
+                resource_usage=self._resource_usage(execution_time)
             )
             
             return AgentExecutionResult(
@@ -338,133 +174,174 @@ class UniversalAgentRuntime:
             )
     
     async def _process_tool_calls(self, tool_calls: List[MCPToolCall]) -> List[MCPToolResult]:
-        """Process tool calls through the runtime integration"""
-        results = []
+        """
+        Process tool calls through the runtime integration.
         
-        for tool_call in tool_calls:
-            self.tool_calls_made += 1
-            
-            # Log tool call
-            await self._log_message(
-                MessageType.TOOL_CALL,
-                f"Calling tool: {tool_call.tool_name}",
+        Read-only tools run concurrently; everything else runs in order
+        (see ToolCallExecutor). Log rows are buffered per call and written
+        in call order in one transaction, before any sequential call and
+        once at the end.
+        """
+        call_logs: Dict[int, List[Dict[str, Any]]] = {}
+        order = {id(tool_call): index for index, tool_call in enumerate(tool_calls)}
+        flushed = 0
+        
+        async def flush_logs():
+            nonlocal flushed
+            rows = []
+            while flushed < len(tool_calls) and flushed in call_logs:
+                rows.extend(call_logs.pop(flushed))
+                flushed += 1
+            await self._log_messages(rows)
+        
+        async def execute(tool_call: MCPToolCall) -> MCPToolResult:
+            rows = call_logs.setdefault(order[id(tool_call)], [])
+            return await self._execute_tool_call(tool_call, rows)
+        
+        try:
+            return await self.tool_executor.run(
+                tool_calls,
+                execute,
+                lambda tool_call: self._is_parallel_safe(tool_call.tool_name),
+                before_barrier=flush_logs
+            )
+        finally:
+            await flush_logs()
+    
+    def _is_parallel_safe(self, tool_name: str) -> bool:
+        # A tool that cannot be classified runs in order; its call reports any error
+        try:
+            if self.runtime:
+                return self.runtime.is_parallel_safe_tool(tool_name)
+            return tool_registry.is_parallel_safe(tool_name)
+        except Exception:
+            return False
+    
+    async def _execute_tool_call(
+        self,
+        tool_call: MCPToolCall,
+        log_rows: List[Dict[str, Any]]
+    ) -> MCPToolResult:
+        """Run one tool call, appending its log rows to log_rows"""
+        self.tool_calls_made += 1
+        
+        # Log tool call
+        log_rows.append(self._message_row(
+            MessageType.TOOL_CALL,
+            f"Calling tool: {tool_call.tool_name}",
+            {
+                "tool_name": tool_call.tool_name,
+                "parameters": tool_call.parameters,
+                "call_id": tool_call.call_id
+            }
+        ))
+        
+        # Process through runtime integration
+        try:
+            if self.runtime:
+                # Use runtime to handle tool call (may trigger process)
+                result = await self.runtime.handle_tool_call(
+                    self.task_id,
+                    tool_call.tool_name,
+                    tool_call.parameters
+                )
+                
+                tool_result = MCPToolResult(
+                    success=result.get("status") in ["process_executed", "tool_executed"],
+                    result=result,
+                    metadata={"runtime_result": True}
+                )
+            else:
+                # Fallback to direct tool execution
+                tool_result = await tool_registry.execute_tool(tool_call)
+            
+            # Log tool result
+            log_rows.append(self._message_row(
+                MessageType.TOOL_RESPONSE,
+                f"Tool result: {tool_result.result if tool_result.success else tool_result.error_message}",
                 {
                     "tool_name": tool_call.tool_name,
-                    "parameters": tool_call.parameters,
+                    "success": tool_result.success,
+                    "metadata": tool_result.metadata,
                     "call_id": tool_call.call_id
                 }
-            )
+            ))
+            return tool_result
             
-            # Process through runtime integration
+        except Exception as e:
+            log_rows.append(self._message_row(
+                MessageType.ERROR,
+                f"Tool execution error: {str(e)}",
+                {"tool_name": tool_call.tool_name, "exception": str(e)}
+            ))
+            return MCPToolResult(
+                success=False,
+                error_message=f"Tool execution failed: {str(e)}",
+                metadata={"exception": str(e), "tool_name": tool_call.tool_name}
+            )
+    
+    async def _route_model(self) -> RoutingDecision:
+        """Choose the model tier for this task's call"""
+        context = self.execution_context
+        return await model_router.route(
+            context.agent.name,
+            context.task.instruction,
+            depth=(context.parent_context or {}).get("recursion_depth"),
+            agent_config=context.agent.ai_model_config,
+            task_metadata=context.task.metadata
+        )
+    
+    async def _respond_with_escalation(self, prompt: BuiltPrompt, routing: RoutingDecision):
+        """Get the AI response, moving up a model tier when a cheaper attempt fails"""
+        agent_name = self.execution_context.agent.name
+        while True:
+            error = None
             try:
-                if self.runtime:
-                    # Use runtime to handle tool call (may trigger process)
-                    result = await self.runtime.handle_tool_call(
-                        self.task_id,
-                        tool_call.tool_name,
-                        tool_call.parameters
-                    )
-                    
-                    tool_result = MCPToolResult(
-                        success=result.get("status") in ["process_executed", "tool_executed"],
-                        result=result,
-                        metadata={"runtime_result": True}
-                    )
-                else:
-                    # Fallback to direct tool execution
-                    tool_result = await tool_registry.execute_tool(tool_call)
-                
-                results.append(tool_result)
-                
-                # Log tool result
-                await self._log_message(
-                    MessageType.TOOL_RESPONSE,
-                    f"Tool result: {tool_result.result if tool_result.success else tool_result.error_message}",
-                    {
-                        "tool_name": tool_call.tool_name,
-                        "success": tool_result.success,
-                        "metadata": tool_result.metadata,
-                        "call_id": tool_call.call_id
-                    }
-                )
-                
+                response = await self._stream_ai_response(prompt, routing.model_config)
             except Exception as e:
-                error_result = MCPToolResult(
-                    success=False,
-                    error_message=f"Tool execution failed: {str(e)}",
-                    metadata={"exception": str(e), "tool_name": tool_call.tool_name}
-                )
-                results.append(error_result)
-                
-                await self._log_message(
-                    MessageType.ERROR,
-                    f"Tool execution error: {str(e)}",
-                    {"tool_name": tool_call.tool_name, "exception": str(e)}
-                )
-        
-        return results
+                response, error = None, e
+            success = error is None and response is not None and bool(response.content or response.tool_calls)
+            model_router.record_outcome(agent_name, routing.model_config.model, success)
+            if success:
+                return response
+            
+            escalated = model_router.escalate(routing)
+            if escalated is None:
+                if error is not None:
+                    raise error
+                return response
+            routing = escalated
     
-    def _build_prompt(self) -> str:
-        """Build the prompt for the AI model"""
-        context = self.execution_context
-        
-        # Base prompt
-        prompt = f"""You are {context.agent.name}.
-
-{context.agent.instruction}
-
-Current Task: {context.task.instruction}
-
-"""
-        
-        # Add context documents
-        if context.context_documents:
-            prompt += "Available Context:\n"
-            for doc in context.context_documents:
-                prompt += f"\n{doc.title}:\n{doc.content}\n"
-            prompt += "\n"
-        
-        # Add available tools
-        if context.available_tools:
-            prompt += "Available Tools:\n"
-            for tool in context.available_tools:
-                prompt += f"- {tool.name}: {tool.description}\n"
-            prompt += "\n"
-        
-        # Add conversation history
-        message_history = context.execution_metadata.get('message_history', [])
-        if message_history:
-            prompt += "Conversation History:\n"
-            for msg_dict in message_history[-10:]:  # Last 10 messages
-                msg_type = msg_dict.get('message_type')
-                if msg_type == MessageType.AGENT_RESPONSE:
-                    prompt += f"Assistant: {msg_dict.get('content', '')}\n"
-                elif msg_type == MessageType.TOOL_CALL:
-                    prompt += f"Tool Call: {msg_dict.get('metadata', {}).get('tool_name', 'unknown')}\n"
-                elif msg_type == MessageType.TOOL_RESPONSE:
-                    prompt += f"Tool Result: {msg_dict.get('content', '')}\n"
-            prompt += "\n"
-        
-        # Add recursion depth warning
-        recursion_depth = context.parent_context.get('recursion_depth', 0) if context.parent_context else 0
-        if recursion_depth > 5:
-            prompt += f"\nWARNING: You are at recursion depth {recursion_depth}. Consider completing soon to avoid infinite loops.\n"
-        
-        return prompt
+    def _build_prompt(self, model_config: Optional[ModelConfig] = None) -> BuiltPrompt:
+        """Build the prompt for the AI model within the model's token budget"""
+        model_config = ai_model_manager.resolve_model_config(
+            model_config or self.execution_context.agent.ai_model_config
+        )
+        budget = prompt_builder.budget_for(
+            model_config.model,
+            model_config.max_tokens or settings.default_max_tokens,
+            cap=settings.prompt_token_budget
+        )
+        return prompt_builder.build(self.execution_context, budget)
+    
+    def _resource_usage(self, execution_time: float) -> ResourceUsage:
+        """Resource usage for the task event, including the model call's accounting"""
+        usage = ResourceUsage(execution_time_ms=int(execution_time * 1000))
+        record = self.usage_record
+        if record:
+            usage.llm_tokens = record.total_tokens
+            usage.llm_input_tokens = record.input_tokens
+            usage.llm_output_tokens = record.output_tokens
+            usage.llm_latency_ms = record.latency_ms
+            usage.llm_cost = record.estimated_cost
+            usage.llm_model = f"{record.provider}:{record.model}"
+        return usage
     
-    def _calculate_recursion_depth(self, task: Dict[str, Any]) -> int:
+    async def _calculate_recursion_depth(self, task: Dict[str, Any]) -> int:
         """Calculate the recursion depth of the current task"""
-        depth = 0
-        current_task = task
-        
-        while current_task.get("parent_task_id"):
-            depth += 1
-            if depth > 10:  # Safety limit
-                break
-            # In a real implementation, would load parent task
-            break
-        
-        return depth
+        if not task.get("parent_task_id"):
+            return 0
+        return await database.tasks.get_depth(self.task_id)
     
     def _check_task_completion(self, response: Any, tool_results: List[MCPToolResult]) -> bool:
         """Check if the task is complete based on response and tool results"""
@@ -516,17 +393,71 @@ Current Task: {context.task.instruction}
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Log a message to the database"""
-        self.messages_logged += 1
+        await self._log_messages([self._message_row(message_type, content, metadata)])
+    
+    def _message_row(
+        self,
+        message_type: MessageType,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build a message row, timestamped now rather than when it is written"""
+        return {
+            "task_id": str(self.task_id),
+            "message_type": message_type,
+            "content": content,
+            "metadata": metadata or {},
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def _log_messages(self, rows: List[Dict[str, Any]]):
+        """Write buffered message rows in one transaction"""
+        if not rows:
+            return
+        self.messages_logged += len(rows)
+        await database.messages.create_many(rows)
+    
+    async def _stream_ai_response(self, prompt: BuiltPrompt, model_config: Optional[ModelConfig] = None):
+        """Get the AI response while forwarding deltas as agent_thinking messages"""
+        agent_name = self.execution_context.agent.name
+        tree_id = self.tree_id or self.task_id
+        pending: List[str] = []
+        last_flush = time.monotonic()
+        response = None
         
-        await database.messages.create(
-            task_id=str(self.task_id),
-            message_type=message_type,
-            content=content,
-            metadata=metadata or {},
-            timestamp=datetime.now().isoformat()
-        )
+        async def flush():
+            nonlocal last_flush
+            if pending:
+                await self._broadcast_message(MessageBuilder.agent_thinking(
+                    self.task_id, tree_id, agent_name, "".join(pending), partial=True
+                ))
+                pending.clear()
+            last_flush = time.monotonic()
+        
+        usage_context = UsageContext(task_id=self.task_id, tree_id=tree_id, agent_name=agent_name)
+        async for delta in ai_model_manager.stream_response(
+            prompt.to_messages(),
+            model_config=model_config or self.execution_context.agent.ai_model_config,
+            usage_context=usage_context
+        ):
+            if delta["type"] == "text":
+                pending.append(delta["text"])
+                if time.monotonic() - last_flush >= self.STREAM_FLUSH_INTERVAL:
+                    await flush()
+            elif delta["type"] == "tool_call":
+                # Announce each tool call as soon as its block is complete
+                await flush()
+                tool_call = delta["tool_call"]
+                await self._broadcast_message(MessageBuilder.tool_call(
+                    self.task_id, tree_id, agent_name, tool_call.tool_name, tool_call.parameters
+                ))
+            elif delta["type"] == "done":
+                await flush()
+                response = delta["response"]
+                self.usage_record = response.usage_record
+        
+        return response
     
     async def _broadcast_message(self, ws_message: WebSocketMessage):
         """Broadcast a message through websocket"""
-        # This would be implemented to send through the websocket manager
-        pass
\ No newline at end of file
+        await broadcast(ws_message)
\ No newline at end of file
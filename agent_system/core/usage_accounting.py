@@ -0,0 +1,299 @@
+"""
+Token, latency and cost accounting for model calls.
+
+Every call made through AIModelManager is recorded here with the task,
+tree and agent it was made for:
+
+- In memory, running totals per model, per agent and per tree (the most
+  recent trees only) back the llm_usage section of /system/stats without
+  touching the database.
+- On disk, rows are buffered and written to the llm_usage table
+  (migration 018) in one executemany per batch. Aggregates over any
+  history are answered there by indexed GROUP BY queries.
+
+Cost is ModelSelector.estimate_cost, in relative units (flash-lite = 1
+per 1k tokens). Cache hits are recorded at zero cost so the tokens they
+saved still show up per agent and tree.
+
+Like core.response_cache this module has no imports from the rest of
+core; the persistent tier talks to any object with get_connection /
+execute_query (config.database.db_manager in practice).
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config.model_config import ModelSelector
+
+
+logger = logging.getLogger(__name__)
+
+
+USAGE_TABLE = "llm_usage"
+
+# GROUP BY targets for UsageLedger.aggregate
+GROUP_COLUMNS = {
+    "task": "task_id",
+    "tree": "tree_id",
+    "agent": "agent_name",
+    "model": "provider || ':' || model"
+}
+
+
+@dataclass
+class UsageContext:
+    """Who a model call is made for."""
+    task_id: Optional[int] = None
+    tree_id: Optional[int] = None
+    agent_name: Optional[str] = None
+
+
+@dataclass
+class UsageRecord:
+    """Accounting for one model call."""
+    provider: str
+    model: str
+    task_id: Optional[int] = None
+    tree_id: Optional[int] = None
+    agent_name: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    total_tokens: int = 0
+    latency_ms: float = 0.0
+    estimated_cost: float = 0.0
+    cached: bool = False
+    streamed: bool = False
+    created_at: float = field(default_factory=time.time)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "cached_calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "tokens_saved": 0,
+        "latency_ms": 0.0,
+        "estimated_cost": 0.0
+    }
+
+
+def _add(totals: Dict[str, Any], record: UsageRecord):
+    totals["calls"] += 1
+    if record.cached:
+        totals["cached_calls"] += 1
+        totals["tokens_saved"] += record.total_tokens
+        return
+    totals["input_tokens"] += record.input_tokens
+    totals["output_tokens"] += record.output_tokens
+    totals["total_tokens"] += record.total_tokens
+    totals["latency_ms"] += record.latency_ms
+    totals["estimated_cost"] += record.estimated_cost
+
+
+class UsageLedger:
+    """In-memory usage totals plus a batched llm_usage writer."""
+
+    def __init__(
+        self,
+        database=None,
+        batch_size: int = 50,
+        flush_interval_seconds: float = 5.0,
+        max_tracked_trees: int = 200
+    ):
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_tracked_trees = max_tracked_trees
+
+        self._buffer: List[UsageRecord] = []
+        self._flush_lock = asyncio.Lock()
+        self._last_flush = time.time()
+        self._table_available = False
+        self._table_checked_at = 0.0
+
+        self.totals = _empty_totals()
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_tree: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.stats = {
+            "records": 0,
+            "rows_written": 0,
+            "flushes": 0,
+            "errors": 0
+        }
+
+    async def record(
+        self,
+        context: Optional[UsageContext],
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        latency_seconds: float,
+        cached: bool = False,
+        streamed: bool = False
+    ) -> UsageRecord:
+        """Account for one call and return its record."""
+        context = context or UsageContext()
+        usage = usage or {}
+        input_tokens = usage.get("input_tokens") or 0
+        output_tokens = usage.get("output_tokens") or 0
+        total_tokens = usage.get("total_tokens") or (input_tokens + output_tokens)
+
+        record = UsageRecord(
+            provider=provider,
+            model=model,
+            task_id=context.task_id,
+            tree_id=context.tree_id,
+            agent_name=context.agent_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_read_tokens=usage.get("cache_read_input_tokens") or 0,
+            total_tokens=total_tokens,
+            latency_ms=latency_seconds * 1000,
+            estimated_cost=0.0 if cached else ModelSelector.estimate_cost(model, total_tokens),
+            cached=cached,
+            streamed=streamed
+        )
+        self._aggregate(record)
+
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size or time.time() - self._last_flush > self.flush_interval_seconds:
+            await self.flush()
+        return record
+
+    async def flush(self):
+        """Write buffered records in one transaction."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            records = self._buffer
+            self._buffer = []
+            self._last_flush = time.time()
+
+            if not await self._has_table():
+                return
+            try:
+                async with self.database.get_connection() as conn:
+                    await conn.executemany(
+                        f"""
+                        INSERT INTO {USAGE_TABLE} (
+                            task_id, tree_id, agent_name, provider, model,
+                            input_tokens, output_tokens, cache_read_tokens, total_tokens,
+                            latency_ms, estimated_cost, cached, streamed, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        [self._row(record) for record in records]
+                    )
+                    await conn.commit()
+                self.stats["rows_written"] += len(records)
+                self.stats["flushes"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Usage accounting write failed: {e}")
+
+    async def aggregate(
+        self,
+        group_by: str,
+        limit: int = 20,
+        since: Optional[float] = None,
+        order_by: str = "total_tokens"
+    ) -> List[Dict[str, Any]]:
+        """Top consumers grouped by task, tree, agent or model."""
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown usage grouping: {group_by}")
+        if order_by not in ("total_tokens", "estimated_cost", "latency_ms", "calls"):
+            raise ValueError(f"Unknown usage ordering: {order_by}")
+
+        await self.flush()
+        if not await self._has_table():
+            return []
+
+        column = GROUP_COLUMNS[group_by]
+        where = f"WHERE ({column}) IS NOT NULL"
+        params: tuple = ()
+        if since is not None:
+            where += " AND created_at >= ?"
+            params = (since,)
+        rows = await self.database.execute_query(
+            f"""
+            SELECT {column} AS key,
+                   COUNT(*) AS calls,
+                   SUM(cached) AS cached_calls,
+                   SUM(CASE WHEN cached THEN 0 ELSE input_tokens END) AS input_tokens,
+                   SUM(CASE WHEN cached THEN 0 ELSE output_tokens END) AS output_tokens,
+                   SUM(CASE WHEN cached THEN 0 ELSE total_tokens END) AS total_tokens,
+                   SUM(CASE WHEN cached THEN 0 ELSE latency_ms END) AS latency_ms,
+                   SUM(estimated_cost) AS estimated_cost,
+                   MAX(created_at) AS last_call_at
+            FROM {USAGE_TABLE}
+            {where}
+            GROUP BY {column}
+            ORDER BY {order_by} DESC
+            LIMIT ?
+            """,
+            params + (limit,)
+        )
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        top_trees = sorted(
+            self.by_tree.items(), key=lambda item: item[1]["total_tokens"], reverse=True
+        )[:10]
+        return {
+            **self.stats,
+            "pending": len(self._buffer),
+            "persistent": self._table_available,
+            "totals": self.totals,
+            "by_model": self.by_model,
+            "by_agent": self.by_agent,
+            "top_trees": {tree_id: totals for tree_id, totals in top_trees}
+        }
+
+    # Internals
+
+    def _aggregate(self, record: UsageRecord):
+        self.stats["records"] += 1
+        _add(self.totals, record)
+        _add(self.by_model.setdefault(f"{record.provider}:{record.model}", _empty_totals()), record)
+        if record.agent_name:
+            _add(self.by_agent.setdefault(record.agent_name, _empty_totals()), record)
+        if record.tree_id is not None:
+            tree = self.by_tree.get(record.tree_id)
+            if tree is None:
+                tree = self.by_tree[record.tree_id] = _empty_totals()
+            self.by_tree.move_to_end(record.tree_id)
+            _add(tree, record)
+            while len(self.by_tree) > self.max_tracked_trees:
+                self.by_tree.popitem(last=False)
+
+    @staticmethod
+    def _row(record: UsageRecord) -> tuple:
+        return (
+            record.task_id, record.tree_id, record.agent_name, record.provider, record.model,
+            record.input_tokens, record.output_tokens, record.cache_read_tokens, record.total_tokens,
+            record.latency_ms, record.estimated_cost, int(record.cached), int(record.streamed),
+            record.created_at
+        )
+
+    async def _has_table(self) -> bool:
+        # Re-checked once a minute so applying the migration later enables writes
+        if self._table_available or self.database is None:
+            return self._table_available
+        if time.time() - self._table_checked_at < 60:
+            return False
+        self._table_checked_at = time.time()
+        try:
+            rows = await self.database.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (USAGE_TABLE,)
+            )
+            self._table_available = bool(rows)
+        except Exception:
+            self._table_available = False
+        return self._table_available
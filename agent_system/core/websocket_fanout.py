@@ -0,0 +1,227 @@
+"""
+Non-blocking WebSocket fan-out.
+
+Publishing a message never waits on a client:
+
+- Each connection has a bounded send queue drained by its own writer
+  task, so a slow browser only delays itself.
+- When a queue is full, the slow-consumer policy decides: "drop_oldest"
+  discards the connection's oldest queued message to make room,
+  "disconnect" closes the connection. A send that takes longer than the
+  send timeout also closes the connection.
+- Clients can subscribe to tree ids, task ids and message types; a message
+  goes only to connections whose subscription matches it. An empty
+  filter matches everything, and messages without a tree/task/type (system
+  notices) pass that filter.
+- Messages are published as already-encoded text, so JSON encoding happens
+  once per message, not once per connection.
+
+Publishing takes a snapshot of the connections, so clients connecting or
+dropping mid-publish never disturb delivery to the others.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+
+# Close code for connections dropped for falling behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+@dataclass
+class Subscription:
+    """What a connection wants to receive; empty sets match everything."""
+    tree_ids: Set[int] = field(default_factory=set)
+    task_ids: Set[int] = field(default_factory=set)
+    message_types: Set[str] = field(default_factory=set)
+
+    def matches(self, tree_id: Optional[int], task_id: Optional[int], message_type: Optional[str]) -> bool:
+        if self.tree_ids and tree_id is not None and tree_id not in self.tree_ids:
+            return False
+        if self.task_ids and task_id is not None and task_id not in self.task_ids:
+            return False
+        if self.message_types and message_type is not None and message_type not in self.message_types:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tree_ids": sorted(self.tree_ids),
+            "task_ids": sorted(self.task_ids),
+            "message_types": sorted(self.message_types)
+        }
+
+
+class _Connection:
+    """One client: its send queue, writer task and subscription."""
+
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.subscription = Subscription()
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
+
+class WebSocketFanout:
+    """Delivers published messages to matching connections through per-connection queues."""
+
+    def __init__(self, queue_size: int = 256, policy: str = "drop_oldest", send_timeout_seconds: float = 10.0):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout_seconds = send_timeout_seconds
+        self._connections: Dict[int, _Connection] = {}
+        self.stats = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "published": 0,
+            "deliveries": 0,
+            "filtered": 0,
+            "dropped": 0,
+            "slow_disconnects": 0,
+            "send_failures": 0
+        }
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    def add(self, websocket):
+        """Register an accepted websocket and start its writer."""
+        connection = _Connection(websocket, self.queue_size)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self._connections[id(websocket)] = connection
+        self.stats["connections_opened"] += 1
+
+    def remove(self, websocket, close_code: Optional[int] = None):
+        """Forget a websocket, stop its writer and optionally close it (idempotent)."""
+        connection = self._connections.pop(id(websocket), None)
+        if connection is None:
+            return
+        self.stats["connections_closed"] += 1
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        if close_code is not None:
+            asyncio.ensure_future(self._close(websocket, close_code))
+
+    def subscribe(
+        self,
+        websocket,
+        tree_ids: Optional[Iterable[int]] = None,
+        task_ids: Optional[Iterable[int]] = None,
+        message_types: Optional[Iterable[str]] = None
+    ) -> Subscription:
+        """Replace a connection's subscription (no filters = everything)."""
+        connection = self._connections.get(id(websocket))
+        subscription = Subscription(
+            tree_ids={int(tree_id) for tree_id in tree_ids or ()},
+            task_ids={int(task_id) for task_id in task_ids or ()},
+            message_types={str(message_type) for message_type in message_types or ()}
+        )
+        if connection is not None:
+            connection.subscription = subscription
+        return subscription
+
+    def publish(
+        self,
+        text: str,
+        tree_id: Optional[int] = None,
+        task_id: Optional[int] = None,
+        message_type: Optional[str] = None
+    ) -> int:
+        """Queue an encoded message for every matching connection; returns how many."""
+        self.stats["published"] += 1
+        tree_id = _as_int(tree_id)
+        task_id = _as_int(task_id)
+        delivered = 0
+        for connection in list(self._connections.values()):
+            if not connection.subscription.matches(tree_id, task_id, message_type):
+                self.stats["filtered"] += 1
+                continue
+            if self._enqueue(connection, text):
+                delivered += 1
+        self.stats["deliveries"] += delivered
+        return delivered
+
+    def send_to(self, websocket, text: str) -> bool:
+        """Queue a message for one connection."""
+        connection = self._connections.get(id(websocket))
+        return connection is not None and self._enqueue(connection, text)
+
+    async def close(self):
+        """Stop all writers and close all connections."""
+        for connection in list(self._connections.values()):
+            self.remove(connection.websocket)
+            await self._close(connection.websocket, 1001)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "connections": len(self._connections),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "queued": sum(connection.queue.qsize() for connection in self._connections.values())
+        }
+
+    # Internals
+
+    def _enqueue(self, connection: _Connection, text: str) -> bool:
+        try:
+            connection.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            self.stats["slow_disconnects"] += 1
+            logger.warning("Disconnecting slow WebSocket client")
+            self.remove(connection.websocket, close_code=SLOW_CONSUMER_CLOSE_CODE)
+            return False
+
+        connection.queue.get_nowait()
+        connection.dropped += 1
+        self.stats["dropped"] += 1
+        connection.queue.put_nowait(text)
+        return True
+
+    async def _write(self, connection: _Connection):
+        websocket = connection.websocket
+        try:
+            while True:
+                text = await connection.queue.get()
+                await asyncio.wait_for(websocket.send_text(text), timeout=self.send_timeout_seconds)
+                connection.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.stats["slow_disconnects"] += 1
+            logger.warning("Disconnecting WebSocket client after a send timed out")
+            self.remove(websocket, close_code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            # The client went away; the endpoint's receive loop sees the same
+            self.stats["send_failures"] += 1
+            self.remove(websocket)
+
+    @staticmethod
+    async def _close(websocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -5,8 +5,12 @@ WebSocket message types and structures for real-time UI updates.
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Awaitable
 import json
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class MessageType(Enum):
@@ -85,13 +89,15 @@ class MessageBuilder:
         )
     
     @staticmethod
-    def agent_thinking(task_id: int, tree_id: int, agent_name: str, thought: str) -> WebSocketMessage:
+    def agent_thinking(task_id: int, tree_id: int, agent_name: str, thought: str,
+                       partial: bool = False) -> WebSocketMessage:
+        # partial=True marks a streamed delta to append to the previous ones
         return WebSocketMessage(
             type=MessageType.AGENT_THINKING,
             task_id=task_id,
             tree_id=tree_id,
             agent_name=agent_name,
-            content={"thought": thought}
+            content={"thought": thought, "partial": partial}
         )
     
     @staticmethod
@@ -149,4 +155,26 @@ class MessageBuilder:
                 "child_instruction": child_instruction,
                 "child_agent": child_agent
             }
-        )
\ No newline at end of file
+        )
+
+
+# Delivery hook for code outside the API process entry point. The API
+# registers its ConnectionManager here at startup; until then messages are
+# dropped.
+_broadcaster: Optional[Callable[[WebSocketMessage], Awaitable[None]]] = None
+
+
+def set_broadcaster(broadcaster: Optional[Callable[[WebSocketMessage], Awaitable[None]]]):
+    """Register the coroutine function that delivers messages to clients"""
+    global _broadcaster
+    _broadcaster = broadcaster
+
+
+async def broadcast(message: WebSocketMessage):
+    """Send a message to connected WebSocket clients, if any"""
+    if _broadcaster is None:
+        return
+    try:
+        await _broadcaster(message)
+    except Exception as e:
+        logger.warning(f"WebSocket broadcast failed: {e}")
@@ -0,0 +1,97 @@
+-- Full-text search index over agents, tasks, tools and context documents
+-- Replaces Python substring scans and LIKE '%term%' table scans with an
+-- FTS5 index ranked by BM25.
+
+-- One index for all searchable entity types. The rowid encodes the source
+-- row as (id * 8 + type code) so triggers can maintain it with rowid
+-- lookups: 1 = agent, 2 = task, 3 = tool, 4 = document.
+CREATE VIRTUAL TABLE IF NOT EXISTS entity_search USING fts5(
+    entity_type UNINDEXED,
+    entity_id UNINDEXED,
+    name,
+    title,
+    description,
+    instruction,
+    content,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Agents
+CREATE TRIGGER IF NOT EXISTS entity_search_agents_ai AFTER INSERT ON agents BEGIN
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, instruction)
+    VALUES (new.id * 8 + 1, 'agent', new.id, new.name, new.instruction);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_agents_au AFTER UPDATE OF name, instruction ON agents BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 1;
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, instruction)
+    VALUES (new.id * 8 + 1, 'agent', new.id, new.name, new.instruction);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_agents_ad AFTER DELETE ON agents BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 1;
+END;
+
+-- Tasks (only the instruction is indexed, so status updates never touch the index)
+CREATE TRIGGER IF NOT EXISTS entity_search_tasks_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO entity_search (rowid, entity_type, entity_id, instruction)
+    VALUES (new.id * 8 + 2, 'task', new.id, new.instruction);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_tasks_au AFTER UPDATE OF instruction ON tasks BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 2;
+    INSERT INTO entity_search (rowid, entity_type, entity_id, instruction)
+    VALUES (new.id * 8 + 2, 'task', new.id, new.instruction);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_tasks_ad AFTER DELETE ON tasks BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 2;
+END;
+
+-- Tools
+CREATE TRIGGER IF NOT EXISTS entity_search_tools_ai AFTER INSERT ON tools BEGIN
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, description)
+    VALUES (new.id * 8 + 3, 'tool', new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_tools_au AFTER UPDATE OF name, description ON tools BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 3;
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, description)
+    VALUES (new.id * 8 + 3, 'tool', new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_tools_ad AFTER DELETE ON tools BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 3;
+END;
+
+-- Context documents
+CREATE TRIGGER IF NOT EXISTS entity_search_documents_ai AFTER INSERT ON context_documents BEGIN
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, title, content)
+    VALUES (new.id * 8 + 4, 'document', new.id, new.name, new.title, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_documents_au AFTER UPDATE OF name, title, content ON context_documents BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 4;
+    INSERT INTO entity_search (rowid, entity_type, entity_id, name, title, content)
+    VALUES (new.id * 8 + 4, 'document', new.id, new.name, new.title, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entity_search_documents_ad AFTER DELETE ON context_documents BEGIN
+    DELETE FROM entity_search WHERE rowid = old.id * 8 + 4;
+END;
+
+-- Backfill existing rows
+INSERT OR REPLACE INTO entity_search (rowid, entity_type, entity_id, name, instruction)
+SELECT id * 8 + 1, 'agent', id, name, instruction FROM agents;
+
+INSERT OR REPLACE INTO entity_search (rowid, entity_type, entity_id, instruction)
+SELECT id * 8 + 2, 'task', id, instruction FROM tasks;
+
+INSERT OR REPLACE INTO entity_search (rowid, entity_type, entity_id, name, description)
+SELECT id * 8 + 3, 'tool', id, name, description FROM tools;
+
+INSERT OR REPLACE INTO entity_search (rowid, entity_type, entity_id, name, title, content)
+SELECT id * 8 + 4, 'document', id, name, title, content FROM context_documents;
+
+INSERT INTO entity_search (entity_search) VALUES ('optimize');
@@ -0,0 +1,19 @@
+-- Persistent tier of the LLM response cache
+-- Responses are keyed by a SHA-256 of (provider, model, temperature,
+-- max_tokens, messages, tool schemas), so identical requests from re-run
+-- agents, initialization phases and retried subtasks are answered locally.
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,              -- JSON response dict
+    total_tokens INTEGER DEFAULT 0,
+    hit_count INTEGER DEFAULT 0,
+    created_at REAL NOT NULL,            -- Unix time
+    expires_at REAL NOT NULL,            -- Unix time
+    last_hit_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires ON llm_response_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_model ON llm_response_cache(provider, model);
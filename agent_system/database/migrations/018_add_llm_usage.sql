@@ -0,0 +1,28 @@
+-- Token, latency and cost accounting for every model call
+-- One row per call (cache hits included, at zero cost), written in
+-- batches by core.usage_accounting.UsageLedger. The indexes back the
+-- per-tree, per-task, per-agent and per-model aggregates.
+
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER,
+    tree_id INTEGER,
+    agent_name TEXT,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cache_read_tokens INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    latency_ms REAL DEFAULT 0,
+    estimated_cost REAL DEFAULT 0,         -- Relative cost units (ModelSelector.estimate_cost)
+    cached INTEGER DEFAULT 0,              -- Answered by the response cache
+    streamed INTEGER DEFAULT 0,
+    created_at REAL NOT NULL               -- Unix time
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_tree ON llm_usage(tree_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_task ON llm_usage(task_id);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_agent ON llm_usage(agent_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_model ON llm_usage(provider, model, created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created ON llm_usage(created_at);
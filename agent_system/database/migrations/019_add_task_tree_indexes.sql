@@ -0,0 +1,7 @@
+-- Indexes behind the paginated task-tree listing (GET /tasks/all)
+-- Roots are paged by id through the partial index, and each page's
+-- per-tree aggregates (task count, running / completed flags) are read
+-- from the (tree_id, status) index without touching the table rows.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_roots ON tasks(id) WHERE parent_task_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_tasks_tree_status ON tasks(tree_id, status);
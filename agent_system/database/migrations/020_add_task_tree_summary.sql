@@ -0,0 +1,155 @@
+-- Materialized per-tree summary
+-- One row per task tree with its root, task count, per-status counts,
+-- deepest level and activity times, kept current by triggers on every
+-- task insert, status change and delete whichever code path writes the
+-- row. Tree views read it with a primary key lookup instead of loading
+-- and counting the tree's tasks.
+--
+-- Existing databases are backfilled at the end of this migration. The
+-- whole file is idempotent: scripts/rebuild_task_tree_summary.py re-runs
+-- it to rebuild both tables at any time.
+
+-- Depth of every task (0 for a root), so a new task's depth is its
+-- parent's plus one without walking the tree
+CREATE TABLE IF NOT EXISTS task_depth (
+    task_id INTEGER PRIMARY KEY,
+    tree_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS task_tree_summary (
+    tree_id INTEGER PRIMARY KEY,
+    root_task_id INTEGER,                  -- NULL until the root row exists
+    root_instruction TEXT,
+    root_status TEXT,
+    task_count INTEGER NOT NULL DEFAULT 0,
+    status_counts TEXT NOT NULL DEFAULT '{}',  -- JSON object: status -> task count
+    max_depth INTEGER NOT NULL DEFAULT 0,  -- Deepest task inserted
+    created_at REAL,                       -- Unix time of the first task
+    last_activity_at REAL                  -- Last insert or status change
+);
+
+-- Inserts: record depth, then create or bump the tree's row
+CREATE TRIGGER IF NOT EXISTS task_tree_summary_ai AFTER INSERT ON tasks BEGIN
+    INSERT OR REPLACE INTO task_depth (task_id, tree_id, depth)
+    VALUES (
+        new.id,
+        COALESCE(new.tree_id, new.id),
+        COALESCE((SELECT depth + 1 FROM task_depth WHERE task_id = new.parent_task_id), 0)
+    );
+
+    INSERT INTO task_tree_summary (
+        tree_id, root_task_id, root_instruction, root_status,
+        task_count, status_counts, max_depth, created_at, last_activity_at
+    ) VALUES (
+        COALESCE(new.tree_id, new.id),
+        CASE WHEN new.parent_task_id IS NULL THEN new.id END,
+        CASE WHEN new.parent_task_id IS NULL THEN new.instruction END,
+        CASE WHEN new.parent_task_id IS NULL THEN new.status END,
+        1,
+        json_object(COALESCE(new.status, 'created'), 1),
+        (SELECT depth FROM task_depth WHERE task_id = new.id),
+        (julianday('now') - 2440587.5) * 86400.0,
+        (julianday('now') - 2440587.5) * 86400.0
+    )
+    ON CONFLICT(tree_id) DO UPDATE SET
+        root_task_id = COALESCE(excluded.root_task_id, root_task_id),
+        root_instruction = COALESCE(excluded.root_instruction, root_instruction),
+        root_status = COALESCE(excluded.root_status, root_status),
+        task_count = task_count + 1,
+        status_counts = json_set(
+            status_counts,
+            '$."' || COALESCE(new.status, 'created') || '"',
+            COALESCE(json_extract(status_counts, '$."' || COALESCE(new.status, 'created') || '"'), 0) + 1
+        ),
+        max_depth = MAX(max_depth, excluded.max_depth),
+        last_activity_at = excluded.last_activity_at;
+END;
+
+-- Status transitions: move one task between status counts
+CREATE TRIGGER IF NOT EXISTS task_tree_summary_au_status AFTER UPDATE OF status ON tasks
+WHEN old.status IS NOT new.status BEGIN
+    UPDATE task_tree_summary SET
+        status_counts = json_set(
+            status_counts,
+            '$."' || COALESCE(old.status, 'created') || '"',
+            COALESCE(json_extract(status_counts, '$."' || COALESCE(old.status, 'created') || '"'), 0) - 1,
+            '$."' || COALESCE(new.status, 'created') || '"',
+            COALESCE(json_extract(status_counts, '$."' || COALESCE(new.status, 'created') || '"'), 0) + 1
+        ),
+        root_status = CASE WHEN new.parent_task_id IS NULL THEN new.status ELSE root_status END,
+        last_activity_at = (julianday('now') - 2440587.5) * 86400.0
+    WHERE tree_id = COALESCE(new.tree_id, new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_tree_summary_au_instruction AFTER UPDATE OF instruction ON tasks
+WHEN new.parent_task_id IS NULL AND old.instruction IS NOT new.instruction BEGIN
+    UPDATE task_tree_summary SET root_instruction = new.instruction
+    WHERE tree_id = COALESCE(new.tree_id, new.id);
+END;
+
+-- Deletes: drop the task from its counts and the row with its last task
+CREATE TRIGGER IF NOT EXISTS task_tree_summary_ad AFTER DELETE ON tasks BEGIN
+    DELETE FROM task_depth WHERE task_id = old.id;
+
+    UPDATE task_tree_summary SET
+        task_count = task_count - 1,
+        status_counts = json_set(
+            status_counts,
+            '$."' || COALESCE(old.status, 'created') || '"',
+            COALESCE(json_extract(status_counts, '$."' || COALESCE(old.status, 'created') || '"'), 0) - 1
+        ),
+        root_task_id = CASE WHEN old.id = root_task_id THEN NULL ELSE root_task_id END,
+        last_activity_at = (julianday('now') - 2440587.5) * 86400.0
+    WHERE tree_id = COALESCE(old.tree_id, old.id);
+
+    DELETE FROM task_tree_summary WHERE tree_id = COALESCE(old.tree_id, old.id) AND task_count <= 0;
+END;
+
+-- Backfill
+DELETE FROM task_depth;
+DELETE FROM task_tree_summary;
+
+INSERT INTO task_depth (task_id, tree_id, depth)
+WITH RECURSIVE walk(id, tree_id, depth) AS (
+    SELECT id, COALESCE(tree_id, id), 0 FROM tasks WHERE parent_task_id IS NULL
+    UNION ALL
+    SELECT t.id, COALESCE(t.tree_id, t.id), walk.depth + 1
+    FROM tasks t JOIN walk ON t.parent_task_id = walk.id
+    WHERE walk.depth < 50
+)
+SELECT id, tree_id, MAX(depth) FROM walk GROUP BY id;
+
+-- Tasks whose parent no longer exists count as depth 0
+INSERT OR IGNORE INTO task_depth (task_id, tree_id, depth)
+SELECT id, COALESCE(tree_id, id), 0 FROM tasks;
+
+INSERT INTO task_tree_summary (
+    tree_id, root_task_id, root_instruction, root_status,
+    task_count, status_counts, max_depth, created_at, last_activity_at
+)
+SELECT counts.tree_id, root.id, root.instruction, root.status,
+       counts.task_count, counts.status_counts, counts.max_depth,
+       (julianday(counts.created_at) - 2440587.5) * 86400.0,
+       (julianday(counts.last_activity_at) - 2440587.5) * 86400.0
+FROM (
+    SELECT tree_id,
+           SUM(tasks_in_status) AS task_count,
+           json_group_object(status, tasks_in_status) AS status_counts,
+           MAX(max_depth) AS max_depth,
+           MIN(created_at) AS created_at,
+           MAX(last_activity_at) AS last_activity_at
+    FROM (
+        SELECT COALESCE(t.tree_id, t.id) AS tree_id,
+               COALESCE(t.status, 'created') AS status,
+               COUNT(*) AS tasks_in_status,
+               COALESCE(MAX(d.depth), 0) AS max_depth,
+               MIN(t.created_at) AS created_at,
+               MAX(COALESCE(t.updated_at, t.created_at)) AS last_activity_at
+        FROM tasks t
+        LEFT JOIN task_depth d ON d.task_id = t.id
+        GROUP BY 1, 2
+    )
+    GROUP BY tree_id
+) counts
+LEFT JOIN tasks root ON root.id = counts.tree_id AND root.parent_task_id IS NULL;
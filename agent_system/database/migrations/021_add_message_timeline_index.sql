@@ -0,0 +1,6 @@
+-- Index behind the tree message timeline (GET /tasks/tree/{tree_id}/messages)
+-- The timeline joins a tree's tasks to their messages; with (task_id, id)
+-- an incremental poll (messages after a cursor id) is a range scan per
+-- task instead of reading every message of the tree.
+
+CREATE INDEX IF NOT EXISTS idx_messages_task_cursor ON messages(task_id, id);
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Sustained concurrent-call throughput of the Google provider.
+
+Compares three ways of issuing Gemini calls with the same prompts:
+
+- async:     GoogleProvider with the SDK's native async API (current default)
+- executor:  blocking SDK calls on the provider's dedicated executor
+             (settings.google_async_client = False)
+- to_thread: blocking SDK calls via asyncio.to_thread on the default
+             executor (the previous implementation)
+
+Calls go straight to the provider, bypassing the gateway and the response
+cache, and each prompt is made unique so nothing is served from a cache.
+Requires GOOGLE_API_KEY.
+
+Usage:
+    python scripts/benchmark_google_provider.py                          # All modes, 200 calls, 64 in flight
+    python scripts/benchmark_google_provider.py --mode async --requests 500 --concurrency 128
+    python scripts/benchmark_google_provider.py --model gemini-2.5-flash --output google.json
+"""
+
+import asyncio
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from core.ai_models import GoogleProvider
+from core.models import AIModelConfig as ModelConfig
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_mode(mode: str, args) -> Dict[str, Any]:
+    """Issue args.requests calls with args.concurrency in flight"""
+    settings.google_async_client = mode == "async"
+    provider = GoogleProvider(ModelConfig(
+        provider="google",
+        model=args.model,
+        temperature=0.0,
+        max_tokens=args.max_tokens
+    ))
+    await provider.initialize()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+    peak_threads = threading.active_count()
+
+    async def call(index: int):
+        nonlocal errors, peak_threads
+        messages = [{"role": "user", "content": f"[{mode} {index} {time.time()}] {args.prompt}"}]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if mode == "to_thread":
+                    _, gemini_messages = provider._convert_messages(messages)
+                    await asyncio.to_thread(provider._send_blocking, provider.client, gemini_messages)
+                else:
+                    await provider.generate_response(messages)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"   {mode} call {index} failed: {e}")
+            peak_threads = max(peak_threads, threading.active_count())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(index) for index in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": elapsed,
+        "calls_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000
+        },
+        "peak_threads": peak_threads
+    }
+
+
+async def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Google provider concurrent-call throughput")
+    parser.add_argument("--mode", choices=["async", "executor", "to_thread", "all"], default="all")
+    parser.add_argument("--model", default=settings.gemini_models["flash-lite"])
+    parser.add_argument("--requests", type=int, default=200, help="Calls per mode")
+    parser.add_argument("--concurrency", type=int, default=64, help="Calls in flight at once")
+    parser.add_argument("--max-tokens", type=int, default=32)
+    parser.add_argument("--prompt", default="Reply with the single word: ok")
+    parser.add_argument("--output", help="Write results as JSON")
+
+    args = parser.parse_args()
+
+    if not settings.google_api_key:
+        print("❌ No Google API key found. Set GOOGLE_API_KEY environment variable.")
+        return False
+
+    modes = ["to_thread", "executor", "async"] if args.mode == "all" else [args.mode]
+    results = []
+    print(f"=== Google provider throughput: {args.model}, {args.requests} calls, {args.concurrency} in flight ===\n")
+    for mode in modes:
+        result = await run_mode(mode, args)
+        results.append(result)
+        latency = result["latency_ms"]
+        print(f"{mode:10s} {result['calls_per_second']:7.1f} calls/s  "
+              f"p50 {latency['p50']:7.1f}ms  p99 {latency['p99']:7.1f}ms  "
+              f"threads {result['peak_threads']:3d}  errors {result['errors']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    return all(result["errors"] < result["requests"] for result in results)
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
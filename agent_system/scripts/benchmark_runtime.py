@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+End-to-end runtime throughput benchmark.
+
+Drives RuntimeEngine.create_task against a scratch database, with every
+agent call answered by the deterministic mock provider (core/mock_provider.py),
+and reports:
+
+- tasks/sec
+- p50/p90/p99 task latency (create_task to terminal state)
+- DB operations per task (connection pool acquisitions)
+- memory growth (tracemalloc, plus RSS when psutil is installed)
+
+The scratch database is built the way a fresh install is: the entity
+framework migration, scripts/create_entity_tables.py, then the migrations
+written against that schema. Each task is answered in one agent call, so
+the benchmark measures flat tasks; break_down_task/end_task flows are not
+exercised.
+
+Usage:
+    python scripts/benchmark_runtime.py                           # 200 flat tasks
+    python scripts/benchmark_runtime.py --latency-ms 80 --jitter-ms 40 --distribution lognormal
+    python scripts/benchmark_runtime.py --output run.json         # Save results
+    python scripts/benchmark_runtime.py --baseline run.json       # Fail on regression
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+agent_system_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(agent_system_dir))
+
+
+# Entity framework tables (entities, events, processes, ...)
+ENTITY_FRAMEWORK_MIGRATION = agent_system_dir.parent / "migrations" / "001_add_entity_framework.sql"
+
+# database/migrations 004-015 seed and reshape the pre-entity tables; the
+# tool permissions (003) and everything after them apply to a fresh install
+LEGACY_MIGRATIONS = range(4, 16)
+
+# Agent the benchmark's tasks are assigned to; the mock provider scripts its replies
+BENCHMARK_AGENT = ("agent_selector", "Route each task to the right agent, or solve it directly.")
+
+
+async def create_scratch_database(path: Path):
+    """Create a fresh database from the schema sources and seed the benchmark agent"""
+    from scripts.create_entity_tables import create_entity_tables
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(ENTITY_FRAMEWORK_MIGRATION.read_text())
+    finally:
+        conn.close()
+
+    await create_entity_tables(path)
+
+    conn = sqlite3.connect(path)
+    try:
+        for migration in sorted((agent_system_dir / "database" / "migrations").glob("[0-9]*.sql")):
+            if int(migration.name.split("_", 1)[0]) not in LEGACY_MIGRATIONS:
+                conn.executescript(migration.read_text())
+        name, instruction = BENCHMARK_AGENT
+        conn.execute(
+            "INSERT INTO agents (name, instruction, available_tools) VALUES (?, ?, ?)",
+            (name, instruction, json.dumps(["end_task"]))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def pool_operations() -> int:
+    """Total connection acquisitions across every pool"""
+    from config.connection_pool import get_all_pool_stats
+    total = 0
+    for pool_stats in get_all_pool_stats().values():
+        for kind in ("reader", "writer"):
+            total += pool_stats.get(kind, {}).get("acquisitions", 0)
+    return total
+
+
+def resident_memory_mb() -> Optional[float]:
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class RuntimeBenchmark:
+    """Submits root tasks with bounded concurrency and records completions"""
+
+    def __init__(self, engine, concurrency: int, timeout: float):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.created_at: Dict[int, float] = {}
+        self.finished_at: Dict[int, float] = {}
+        self.failed: set = set()
+        self._root_waiters: Dict[int, asyncio.Future] = {}
+
+    def on_completion(self, completion):
+        """task_notifier listener: every terminal task is counted"""
+        now = time.perf_counter()
+        self.finished_at.setdefault(completion.task_id, now)
+        if not completion.succeeded:
+            self.failed.add(completion.task_id)
+        waiter = self._root_waiters.pop(completion.task_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(completion)
+
+    async def run(self, count: int, label: str) -> List[int]:
+        """Create count root tasks, keeping at most concurrency in flight"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        roots: List[int] = []
+
+        async def one(index: int):
+            async with semaphore:
+                waiter = loop.create_future()
+                started = time.perf_counter()
+                task_id = await self.engine.create_task(
+                    instruction=f"{label} task {index}: summarise item {index}",
+                    assigned_agent="agent_selector"
+                )
+                self.created_at[task_id] = started
+                roots.append(task_id)
+                if task_id in self.finished_at:
+                    return
+                self._root_waiters[task_id] = waiter
+                try:
+                    await asyncio.wait_for(waiter, self.timeout)
+                except asyncio.TimeoutError:
+                    self._root_waiters.pop(task_id, None)
+
+        await asyncio.gather(*(one(index) for index in range(count)))
+        return roots
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    """Set up the runtime on a scratch database and measure one run"""
+    from config.settings import settings
+    from core.database_manager import database
+    from core.event_integration import event_integration
+    from core.entities.entity_manager import EntityManager
+    from core.runtime.runtime_integration import initialize_runtime_integration
+    from core.runtime.task_notifications import task_notifier
+    from core.ai_models import ai_model_manager
+    from core.mock_provider import LatencyProfile, default_benchmark_script, register_mock_provider
+
+    script = default_benchmark_script(
+        latency=LatencyProfile(
+            distribution=args.distribution,
+            mean_ms=args.latency_ms,
+            stddev_ms=args.jitter_ms
+        ),
+        seed=args.seed
+    )
+    script.error_rate = args.error_rate
+    model_config = register_mock_provider(ai_model_manager, script)
+    ai_model_manager.set_default_model_config(model_config)
+    ai_model_manager.response_cache.enabled = args.cache
+    settings.default_model_provider = model_config.provider
+    settings.default_model_name = model_config.model
+
+    await database.initialize()
+    await event_integration.initialize()
+    entity_manager = EntityManager(
+        db_path=settings.database_url.replace("sqlite:///", ""),
+        event_manager=event_integration.event_manager
+    )
+    runtime = await initialize_runtime_integration(
+        event_manager=event_integration.event_manager,
+        entity_manager=entity_manager,
+        mode="runtime_first"
+    )
+    engine = runtime.runtime_engine
+    engine.settings.max_concurrent_agents = args.agents
+    engine.notify_settings_changed()
+
+    benchmark = RuntimeBenchmark(engine, args.concurrency, args.timeout)
+    task_notifier.subscribe(benchmark.on_completion)
+
+    try:
+        if args.warmup:
+            await benchmark.run(args.warmup, "Warmup")
+        benchmark.created_at.clear()
+        benchmark.finished_at.clear()
+        benchmark.failed.clear()
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        rss_before = resident_memory_mb()
+        operations_before = pool_operations()
+        started = time.perf_counter()
+
+        roots = await benchmark.run(args.tasks, "Benchmark")
+
+        elapsed = time.perf_counter() - started
+        operations = pool_operations() - operations_before
+        memory_after, memory_peak = tracemalloc.get_traced_memory()
+        rss_after = resident_memory_mb()
+        tracemalloc.stop()
+
+        latencies = [
+            benchmark.finished_at[task_id] - benchmark.created_at[task_id]
+            for task_id in roots if task_id in benchmark.finished_at
+        ]
+        finished = len(benchmark.finished_at)
+
+        return {
+            "config": {
+                "tasks": args.tasks,
+                "concurrency": args.concurrency,
+                "agents": args.agents,
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "distribution": args.distribution,
+                "error_rate": args.error_rate,
+                "seed": args.seed
+            },
+            "elapsed_seconds": elapsed,
+            "roots_completed": len(latencies),
+            "roots_timed_out": len(roots) - len(latencies),
+            "tasks_finished": finished,
+            "tasks_failed": len(benchmark.failed),
+            "tasks_per_second": finished / elapsed if elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50) * 1000,
+                "p90": percentile(latencies, 90) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": max(latencies) * 1000 if latencies else 0.0
+            },
+            "db_operations": operations,
+            "db_operations_per_task": operations / finished if finished else 0.0,
+            "memory": {
+                "traced_growth_mb": (memory_after - memory_before) / (1024 * 1024),
+                "traced_peak_mb": memory_peak / (1024 * 1024),
+                "rss_growth_mb": rss_after - rss_before if rss_before is not None else None
+            },
+            "runtime": engine.get_statistics()["event_workers"],
+            "llm_gateway": ai_model_manager.get_gateway_stats()
+        }
+    finally:
+        task_notifier.unsubscribe(benchmark.on_completion)
+        await runtime.shutdown()
+        await event_integration.shutdown()
+        await database.disconnect()
+
+
+def print_report(results: Dict[str, Any]):
+    config = results["config"]
+    latency = results["latency_ms"]
+    memory = results["memory"]
+    print("=== Runtime Benchmark ===")
+    print(f"Tasks: {config['tasks']}, in flight: {config['concurrency']}, agent slots: {config['agents']}")
+    print(f"Mock latency: {config['distribution']} {config['latency_ms']}ms ± {config['jitter_ms']}ms")
+    print()
+    print(f"Elapsed:          {results['elapsed_seconds']:.2f}s")
+    print(f"Tasks finished:   {results['tasks_finished']} ({results['tasks_failed']} failed)")
+    print(f"Roots timed out:  {results['roots_timed_out']}")
+    print(f"Tasks/sec:        {results['tasks_per_second']:.1f}")
+    print(f"Root latency:     p50 {latency['p50']:.1f}ms  p90 {latency['p90']:.1f}ms  "
+          f"p99 {latency['p99']:.1f}ms  max {latency['max']:.1f}ms")
+    print(f"DB ops per task:  {results['db_operations_per_task']:.1f}")
+    print(f"Memory growth:    {memory['traced_growth_mb']:.1f}MB traced "
+          f"(peak {memory['traced_peak_mb']:.1f}MB)"
+          + (f", {memory['rss_growth_mb']:.1f}MB RSS" if memory["rss_growth_mb"] is not None else ""))
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every metric that regressed by more than tolerance"""
+    regressions = []
+    checks = [
+        ("tasks/sec", results["tasks_per_second"], baseline["tasks_per_second"], False),
+        ("p99 latency", results["latency_ms"]["p99"], baseline["latency_ms"]["p99"], True),
+        ("DB ops per task", results["db_operations_per_task"], baseline["db_operations_per_task"], True),
+        ("memory growth", results["memory"]["traced_growth_mb"], baseline["memory"]["traced_growth_mb"], True)
+    ]
+    for name, current, previous, lower_is_better in checks:
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        if (change > tolerance) if lower_is_better else (change < -tolerance):
+            regressions.append(f"{name}: {previous:.2f} -> {current:.2f} ({change:+.0%})")
+    return regressions
+
+
+async def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="End-to-end runtime throughput benchmark")
+    parser.add_argument("--tasks", type=int, default=200, help="Root tasks to create")
+    parser.add_argument("--concurrency", type=int, default=50, help="Root tasks in flight at once")
+    parser.add_argument("--agents", type=int, default=20, help="Concurrent agent slots")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean mock model latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Latency stddev (half-width for uniform)")
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock calls that fail transiently")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured root tasks run first")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for each root task")
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed regression vs the baseline")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="runtime_benchmark_") as scratch:
+        # The settings object reads DATABASE_URL on import, so point it at
+        # the scratch database before anything under config/ or core/ loads
+        scratch_db = Path(scratch) / "agent_system.db"
+        await create_scratch_database(scratch_db)
+        os.environ["DATABASE_URL"] = f"sqlite:///{scratch_db}"
+
+        results = await run_benchmark(args)
+
+    print_report(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, default=str))
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return False
+        print("\n✅ No regressions against baseline")
+
+    return results["roots_timed_out"] == 0
+
+
+if __name__ == "__main__":
+    os.chdir(agent_system_dir)
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -2,15 +2,18 @@
 """
 Create the missing entity-specific tables (agents, tasks, tools, etc.)
 that the EntityManager expects to exist alongside the entities table.
+
+Each row's id is its entity_id, which the entity framework's entities
+table keeps unique per entity type only, so the ids carry no foreign key.
 """
 
 import asyncio
 import aiosqlite
 from pathlib import Path
 
-async def create_entity_tables():
+async def create_entity_tables(db_path: Path = None):
     """Create all entity-specific tables required by EntityManager."""
-    db_path = Path(__file__).parent.parent / "data" / "agent_system.db"
+    db_path = db_path or Path(__file__).parent.parent / "data" / "agent_system.db"
     
     async with aiosqlite.connect(db_path) as db:
         print("Creating entity-specific tables...")
@@ -24,8 +27,7 @@ async def create_entity_tables():
                 context_documents TEXT DEFAULT '[]',
                 available_tools TEXT DEFAULT '[]',
                 permissions TEXT DEFAULT '[]',
-                constraints TEXT DEFAULT '[]',
-                FOREIGN KEY (id) REFERENCES entities(entity_id)
+                constraints TEXT DEFAULT '[]'
             )
         """)
         print("✅ Created agents table")
@@ -41,7 +43,8 @@ async def create_entity_tables():
                 status TEXT DEFAULT 'created',
                 result TEXT DEFAULT '{}',
                 metadata TEXT DEFAULT '{}',
-                FOREIGN KEY (id) REFERENCES entities(entity_id)
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         print("✅ Created tasks table")
@@ -55,8 +58,7 @@ async def create_entity_tables():
                 category TEXT DEFAULT 'system',
                 implementation TEXT,
                 parameters TEXT DEFAULT '{}',
-                permissions TEXT DEFAULT '[]',
-                FOREIGN KEY (id) REFERENCES entities(entity_id)
+                permissions TEXT DEFAULT '[]'
             )
         """)
         print("✅ Created tools table")
@@ -70,8 +72,7 @@ async def create_entity_tables():
                 category TEXT DEFAULT 'general',
                 content TEXT,
                 format TEXT DEFAULT 'markdown',
-                version TEXT DEFAULT '1.0.0',
-                FOREIGN KEY (id) REFERENCES entities(entity_id)
+                version TEXT DEFAULT '1.0.0'
             )
         """)
         print("✅ Created context_documents table")
@@ -85,8 +86,7 @@ async def create_entity_tables():
                 parameters TEXT DEFAULT '{}',
                 steps TEXT DEFAULT '[]',
                 rollback_steps TEXT DEFAULT '[]',
-                permissions TEXT DEFAULT '[]',
-                FOREIGN KEY (id) REFERENCES entities(entity_id)
+                permissions TEXT DEFAULT '[]'
             )
         """)
         print("✅ Created processes table")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Backfill or rebuild the materialized task-tree summary.
+
+Runs migration 020 against the configured database: creates the
+task_tree_summary and task_depth tables and their triggers when they are
+missing, then recomputes every tree's row from the tasks table. Safe to
+run repeatedly, e.g. after restoring a backup or bulk-editing tasks.
+
+Usage:
+    python scripts/rebuild_task_tree_summary.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from core.database_manager import database
+
+
+async def main():
+    """Main entry point"""
+    print(f"🔄 Rebuilding task tree summaries in {settings.database_url}")
+    started = time.perf_counter()
+    try:
+        await database.initialize()
+        trees = await database.tasks.rebuild_tree_summaries()
+    except Exception as e:
+        print(f"❌ Rebuild failed: {e}")
+        return False
+    finally:
+        await database.disconnect()
+
+    print(f"✅ {trees} trees summarized in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
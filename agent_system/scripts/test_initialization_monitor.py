@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test that the system initialization monitor leaves the "initializing" state.
+
+Drives monitor_initialization_completion through both ways a task can
+finish: already terminal when the monitor starts (found by its lookup of
+the task row) and finishing later (woken by the task completion notifier).
+Task rows are served from memory, shaped like TaskRepository.get_by_id's
+dicts, so no database is needed.
+"""
+
+import asyncio
+import sys
+import os
+from pathlib import Path
+
+# Change to the agent_system directory
+agent_system_dir = Path(__file__).parent.parent
+os.chdir(agent_system_dir)
+sys.path.insert(0, str(agent_system_dir))
+
+from api import main
+from core.runtime.task_notifications import task_notifier
+
+
+async def _monitor(rows: dict, task_id: int, finish=None) -> list:
+    """Run the monitor against in-memory task rows; returns the system states it broadcast."""
+    broadcast = []
+
+    async def get_by_id(tid):
+        return rows.get(int(tid))
+
+    async def broadcast_json(data):
+        broadcast.append(data["state"])
+
+    original = main.database.tasks.get_by_id, main.manager.broadcast_json
+    main.database.tasks.get_by_id = get_by_id
+    main.manager.broadcast_json = broadcast_json
+    try:
+        main.app.state.initializing = True
+        monitor = asyncio.create_task(main.monitor_initialization_completion(task_id))
+        await asyncio.sleep(0.05)
+        if finish:
+            finish()
+        await asyncio.wait_for(monitor, timeout=5)
+        assert main.app.state.initializing is False
+        return broadcast
+    finally:
+        main.database.tasks.get_by_id, main.manager.broadcast_json = original
+
+
+def test_monitor_finds_completed_task():
+    """A task already completed when monitoring starts ends initialization."""
+    rows = {1: {"id": 1, "status": "completed"}}
+    assert asyncio.run(_monitor(rows, 1)) == ["ready"]
+
+
+def test_monitor_woken_by_notifier():
+    """A running task ends initialization once the notifier reports it."""
+    rows = {2: {"id": 2, "status": "running"}}
+
+    def finish():
+        rows[2]["status"] = "failed"
+        task_notifier.notify(2, "failed", error="boom")
+
+    assert asyncio.run(_monitor(rows, 2, finish)) == ["uninitialized"]
+
+
+if __name__ == "__main__":
+    test_monitor_finds_completed_task()
+    print("✅ Completed task found by lookup")
+    test_monitor_woken_by_notifier()
+    print("✅ Running task woken by the notifier")
@@ -16,6 +16,7 @@ class BaseMCPTool(ABC):
         self.permissions: List[str] = []
         self.timeout_seconds: int = 300
         self.retry_count: int = 0
+        self.parallel_safe: bool = False  # Read-only tools may run concurrently
     
     @abstractmethod
     async def execute(self, **kwargs) -> MCPToolResult:
@@ -161,6 +162,11 @@ class MCPToolRegistry:
         
         return await tool.execute_with_timeout(**tool_call.parameters)
     
+    def is_parallel_safe(self, name: str) -> bool:
+        """Check if a tool can run concurrently with other safe calls"""
+        tool = self.get_tool(name)
+        return bool(tool and tool.parallel_safe)
+    
     def list_tools(self) -> Dict[str, List[str]]:
         """List all registered tools by category"""
         return dict(self._tool_categories)
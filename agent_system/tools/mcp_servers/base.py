@@ -3,7 +3,7 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Set
 from abc import ABC, abstractmethod
 import time
 
@@ -29,6 +29,7 @@ class MCPServer(ABC):
         self.server_name = server_name
         self.permission_manager = permission_manager
         self.tools: Dict[str, Callable] = {}
+        self.parallel_safe_tools: Set[str] = set()
         self.is_running = False
         
     @abstractmethod
@@ -36,9 +37,15 @@ class MCPServer(ABC):
         """Register all tools provided by this server."""
         pass
     
-    def register_tool(self, tool_name: str, handler: Callable):
-        """Register a tool handler."""
+    def register_tool(self, tool_name: str, handler: Callable, parallel_safe: bool = False):
+        """Register a tool handler.
+        
+        parallel_safe marks read-only tools that may run concurrently with
+        other parallel-safe calls from the same agent response.
+        """
         self.tools[tool_name] = handler
+        if parallel_safe:
+            self.parallel_safe_tools.add(tool_name)
         logger.info(f"Registered tool '{tool_name}' on server '{self.server_name}'")
     
     async def start(self):
@@ -113,6 +120,10 @@ class MCPServer(ABC):
         """List available tools on this server."""
         return list(self.tools.keys())
     
+    def is_parallel_safe(self, tool_name: str) -> bool:
+        """Check if a tool can run concurrently with other safe calls."""
+        return tool_name in self.parallel_safe_tools
+    
     def get_server_info(self) -> Dict[str, Any]:
         """Get server information."""
         return {
@@ -23,10 +23,10 @@ class EntityManagerMCP(MCPServer):
         """Register essential entity management tools."""
         # Core CRUD operations
         self.register_tool("create_entity", self.create_entity)
-        self.register_tool("get_entity", self.get_entity)
+        self.register_tool("get_entity", self.get_entity, parallel_safe=True)
         self.register_tool("update_entity", self.update_entity)
         self.register_tool("delete_entity", self.delete_entity)
-        self.register_tool("list_entities", self.list_entities)
+        self.register_tool("list_entities", self.list_entities, parallel_safe=True)
         
         # Specialized entity creation
         self.register_tool("create_agent", self.create_agent)
@@ -108,27 +108,16 @@ class EntityManagerMCP(MCPServer):
         return new_id
     
     async def list_agents(self, filters: Optional[Dict[str, Any]] = None, 
-                         agent_type: str = None, task_id: int = None) -> List[Dict[str, Any]]:
+                         agent_type: str = None, task_id: int = None,
+                         limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """List agents with optional filters."""
         # Check permissions
         if not await self.permission_manager.check_permission(agent_type, task_id, "read", "agent"):
             raise PermissionError("Insufficient permissions to list agents")
         
-        agents = await self.entity_manager.get_entities_by_type(EntityType.AGENT)
-        
-        # Apply filters if provided
-        if filters:
-            # Simple filtering implementation
-            filtered = []
-            for agent in agents:
-                match = True
-                for key, value in filters.items():
-                    if not hasattr(agent, key) or getattr(agent, key) != value:
-                        match = False
-                        break
-                if match:
-                    filtered.append(agent)
-            agents = filtered
+        agents = await self.entity_manager.list_entities(
+            EntityType.AGENT, limit=limit, offset=offset, filters=filters
+        )
         
         return [
             {
@@ -264,17 +253,17 @@ class EntityManagerMCP(MCPServer):
         }
     
     async def list_processes(self, category: Optional[str] = None,
-                           agent_type: str = None, task_id: int = None) -> List[Dict[str, Any]]:
+                           agent_type: str = None, task_id: int = None,
+                           limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """List available processes."""
         # Check permissions
         if not await self.permission_manager.check_permission(agent_type, task_id, "read", "process"):
             raise PermissionError("Insufficient permissions to list processes")
         
-        processes = await self.entity_manager.get_entities_by_type(EntityType.PROCESS)
-        
-        # Filter by category if provided
-        if category:
-            processes = [p for p in processes if p.metadata.get("category") == category]
+        processes = await self.entity_manager.list_entities(
+            EntityType.PROCESS, limit=limit, offset=offset,
+            filters={"metadata.category": category} if category else None
+        )
         
         return [
             {
@@ -361,46 +350,32 @@ class EntityManagerMCP(MCPServer):
         return success
     
     async def search_documents(self, query: str, filters: Optional[Dict[str, Any]] = None,
-                             agent_type: str = None, task_id: int = None) -> List[Dict[str, Any]]:
-        """Search documents by content or metadata."""
+                             agent_type: str = None, task_id: int = None,
+                             limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Search documents by content or metadata, best matches first."""
         # Check permissions
         if not await self.permission_manager.check_permission(agent_type, task_id, "read", "document"):
             raise PermissionError("Insufficient permissions to search documents")
         
-        docs = await self.entity_manager.get_entities_by_type(EntityType.CONTEXT)
-        
-        # Simple search implementation
-        results = []
-        query_lower = query.lower()
-        
-        for doc in docs:
-            # Search in content, title, and name
-            if (query_lower in doc.content.lower() or 
-                query_lower in doc.title.lower() or 
-                query_lower in doc.name.lower()):
-                
-                # Apply filters if provided
-                if filters:
-                    match = True
-                    for key, value in filters.items():
-                        if key == "category" and doc.category != value:
-                            match = False
-                            break
-                        elif key == "format" and doc.format != value:
-                            match = False
-                            break
-                    if not match:
-                        continue
-                
-                results.append({
-                    "id": doc.id,
-                    "name": doc.name,
-                    "title": doc.title,
-                    "category": doc.category,
-                    "preview": doc.content[:200] + "..." if len(doc.content) > 200 else doc.content
-                })
+        docs = await self.entity_manager.search_entities(
+            EntityType.DOCUMENT,
+            query,
+            fields=["name", "title", "content"],
+            limit=limit,
+            offset=offset,
+            filters={key: value for key, value in (filters or {}).items() if key in ("category", "format")}
+        )
         
-        return results
+        return [
+            {
+                "id": doc.entity_id,
+                "name": doc.name,
+                "title": doc.title,
+                "category": doc.category,
+                "preview": doc.content[:200] + "..." if len(doc.content) > 200 else doc.content
+            }
+            for doc in docs
+        ]
     
     # Tool Management Tools
     
@@ -426,17 +401,17 @@ class EntityManagerMCP(MCPServer):
         }
     
     async def list_tools_entities(self, category: Optional[str] = None,
-                                 agent_type: str = None, task_id: int = None) -> List[Dict[str, Any]]:
+                                 agent_type: str = None, task_id: int = None,
+                                 limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """List tool entities (not MCP tools)."""
         # Check permissions
         if not await self.permission_manager.check_permission(agent_type, task_id, "read", "tool"):
             raise PermissionError("Insufficient permissions to list tools")
         
-        tools = await self.entity_manager.get_entities_by_type(EntityType.TOOL)
-        
-        # Filter by category if provided
-        if category:
-            tools = [t for t in tools if t.metadata.get("category") == category]
+        tools = await self.entity_manager.list_entities(
+            EntityType.TOOL, limit=limit, offset=offset,
+            filters={"metadata.category": category} if category else None
+        )
         
         return [
             {
@@ -623,35 +598,28 @@ class EntityManagerMCP(MCPServer):
         return success
     
     async def list_entities(self, entity_type: str, filters: Optional[Dict[str, Any]] = None,
-                          agent_type: str = None, task_id: int = None) -> List[Dict[str, Any]]:
-        """List entities of any type."""
+                          agent_type: str = None, task_id: int = None,
+                          limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List one page of entities of any type."""
         # Check permissions
         if not await self.permission_manager.check_permission(agent_type, task_id, "read", entity_type.lower()):
             raise PermissionError(f"Insufficient permissions to list {entity_type}")
         
         # Delegate to specific list methods based on type
         if entity_type.upper() == "AGENT":
-            return await self.list_agents(filters, agent_type, task_id)
+            return await self.list_agents(filters, agent_type, task_id, limit, offset)
         elif entity_type.upper() == "PROCESS":
-            return await self.list_processes(filters.get("category") if filters else None, agent_type, task_id)
+            return await self.list_processes(filters.get("category") if filters else None, agent_type, task_id, limit, offset)
         elif entity_type.upper() == "TOOL":
-            return await self.list_tools_entities(filters.get("category") if filters else None, agent_type, task_id)
+            return await self.list_tools_entities(filters.get("category") if filters else None, agent_type, task_id, limit, offset)
         else:
-            # For other types, get all from entity manager
-            entities = await self.entity_manager.get_entities_by_type(EntityType[entity_type.upper()])
-            
-            # Apply basic filters
-            if filters:
-                filtered = []
-                for entity in entities:
-                    match = True
-                    for key, value in filters.items():
-                        if hasattr(entity, key) and getattr(entity, key) != value:
-                            match = False
-                            break
-                    if match:
-                        filtered.append(entity)
-                entities = filtered
+            # For other types, load the page from the entity manager in one batch
+            entities = await self.entity_manager.list_entities(
+                EntityType[entity_type.upper()],
+                limit=limit,
+                offset=offset,
+                filters=filters
+            )
             
             return [
                 {
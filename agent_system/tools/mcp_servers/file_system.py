@@ -60,14 +60,14 @@ class FileSystemMCPServer(MCPServer):
     
     def register_tools(self):
         """Register all file system tools."""
-        self.register_tool("read_file", self.read_file)
+        self.register_tool("read_file", self.read_file, parallel_safe=True)
         self.register_tool("write_file", self.write_file)
-        self.register_tool("list_directory", self.list_directory)
+        self.register_tool("list_directory", self.list_directory, parallel_safe=True)
         self.register_tool("create_directory", self.create_directory)
         self.register_tool("delete_file", self.delete_file)
         self.register_tool("copy_file", self.copy_file)
         self.register_tool("move_file", self.move_file)
-        self.register_tool("get_file_info", self.get_file_info)
+        self.register_tool("get_file_info", self.get_file_info, parallel_safe=True)
     
     def _is_path_allowed(self, path: str) -> bool:
         """Check if a path is within allowed directories."""
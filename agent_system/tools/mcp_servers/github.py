@@ -542,9 +542,9 @@ class GitHubMCPServer(MCPServer):
     
     def register_tools(self):
         """Register GitHub tools."""
-        self.register_tool("get_status", self.get_status)
-        self.register_tool("get_diff", self.get_diff)
-        self.register_tool("get_log", self.get_log)
+        self.register_tool("get_status", self.get_status, parallel_safe=True)
+        self.register_tool("get_diff", self.get_diff, parallel_safe=True)
+        self.register_tool("get_log", self.get_log, parallel_safe=True)
         self.register_tool("create_branch", self.create_branch)
         self.register_tool("commit", self.commit_changes)
         self.register_tool("push", self.push_changes)
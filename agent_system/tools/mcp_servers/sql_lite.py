@@ -16,6 +16,9 @@ from pathlib import Path
 
 from .base import MCPServer
 from core.permissions.manager import DatabasePermissionManager
+from core.entity_search import (
+    SEARCH_TABLE, SEARCH_TABLES, SEARCH_COLUMNS, INDEX_EXISTS_QUERY, build_search_query
+)
 
 
 class SQLiteMCPServer(MCPServer):
@@ -162,13 +165,13 @@ class SQLiteMCPServer(MCPServer):
     
     def register_tools(self):
         """Register all SQL tools."""
-        self.register_tool("execute_query", self.execute_query)
-        self.register_tool("get_tables", self.get_tables)
-        self.register_tool("get_schema", self.get_schema)
-        self.register_tool("get_row_count", self.get_row_count)
-        self.register_tool("get_recent_records", self.get_recent_records)
-        self.register_tool("search_records", self.search_records)
-        self.register_tool("get_statistics", self.get_statistics)
+        self.register_tool("execute_query", self.execute_query, parallel_safe=True)
+        self.register_tool("get_tables", self.get_tables, parallel_safe=True)
+        self.register_tool("get_schema", self.get_schema, parallel_safe=True)
+        self.register_tool("get_row_count", self.get_row_count, parallel_safe=True)
+        self.register_tool("get_recent_records", self.get_recent_records, parallel_safe=True)
+        self.register_tool("search_records", self.search_records, parallel_safe=True)
+        self.register_tool("get_statistics", self.get_statistics, parallel_safe=True)
     
     def _get_connection(self) -> sqlite3.Connection:
         """Get a database connection with row factory."""
@@ -411,10 +414,17 @@ class SQLiteMCPServer(MCPServer):
         search_column: str,
         search_term: str,
         limit: int = 50,
+        offset: int = 0,
         agent_type: str = None,
         task_id: int = None
     ) -> Dict[str, Any]:
-        """Search records in a table."""
+        """
+        Search records in a table.
+        
+        Text columns covered by the full-text index are searched through it
+        (BM25-ranked, supports "phrases" and prefix* terms); anything else
+        falls back to a LIKE scan.
+        """
         try:
             # Validate inputs
             if not table_name.replace('_', '').isalnum():
@@ -428,14 +438,38 @@ class SQLiteMCPServer(MCPServer):
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            query = f"""
-                SELECT * FROM {table_name}
-                WHERE {search_column} LIKE ?
-                LIMIT ?
-            """
+            ranked = False
+            if (table_name in SEARCH_TABLES and search_column in SEARCH_COLUMNS and
+                    cursor.execute(INDEX_EXISTS_QUERY, (SEARCH_TABLE,)).fetchone()):
+                ranked = True
+                search = build_search_query(
+                    search_term,
+                    entity_types=[SEARCH_TABLES[table_name]],
+                    fields=[search_column],
+                    limit=limit,
+                    offset=offset
+                )
+                if search is None:
+                    results = []
+                else:
+                    search_query, params = search
+                    query = f"""
+                        SELECT t.*, s.score AS search_score, s.snippet AS search_snippet
+                        FROM ({search_query}) s
+                        JOIN {table_name} t ON t.id = s.entity_id
+                        ORDER BY s.score
+                    """
+                    cursor.execute(query, params)
+                    results = [dict(row) for row in cursor.fetchall()]
+            else:
+                query = f"""
+                    SELECT * FROM {table_name}
+                    WHERE {search_column} LIKE ?
+                    LIMIT ? OFFSET ?
+                """
+                cursor.execute(query, (f"%{search_term}%", limit, offset))
+                results = [dict(row) for row in cursor.fetchall()]
             
-            cursor.execute(query, (f"%{search_term}%", limit))
-            results = [dict(row) for row in cursor.fetchall()]
             conn.close()
             
             return {
@@ -443,6 +477,8 @@ class SQLiteMCPServer(MCPServer):
                 "table_name": table_name,
                 "search_column": search_column,
                 "search_term": search_term,
+                "ranked": ranked,
+                "offset": offset,
                 "row_count": len(results),
                 "results": results
             }
@@ -135,6 +135,11 @@ class ToolSystemManager:
             task_id=task_id
         )
     
+    def is_parallel_safe(self, tool_name: str, operation: str) -> bool:
+        """Check if a server operation can run concurrently with other safe calls."""
+        server = self.mcp_registry.get_server(tool_name)
+        return bool(server and server.is_parallel_safe(operation))
+    
     async def _periodic_cleanup(self):
         """Background task to clean up expired permissions."""
         while True:
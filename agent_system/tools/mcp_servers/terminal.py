@@ -405,8 +405,8 @@ class TerminalMCPServer(MCPServer):
     def register_tools(self):
         """Register terminal tools."""
         self.register_tool("execute_command", self.execute_command)
-        self.register_tool("list_allowed_commands", self.list_allowed_commands)
-        self.register_tool("get_working_directory", self.get_working_directory)
+        self.register_tool("list_allowed_commands", self.list_allowed_commands, parallel_safe=True)
+        self.register_tool("get_working_directory", self.get_working_directory, parallel_safe=True)
         self.register_tool("change_directory", self.change_directory)
     
     async def list_allowed_commands(self, agent_type: str = None, task_id: int = None) -> List[str]: